@@ -0,0 +1,165 @@
+import glob
+import multiprocessing
+import os
+import time
+import traceback
+
+import widget_registry
+import wxg_golang_converter
+from conversion_stats import ConversionStats
+from depfiles import depfile_filename_for
+
+
+class ConversionJob(object):
+    def __init__(self, input_filename, output_filename):
+        self.input_filename = input_filename
+        self.output_filename = output_filename
+
+
+class ConversionResult(object):
+    def __init__(self, job, error, elapsed, written=False, stats=None):
+        """
+        :type job: ConversionJob
+        :param error: description of why the conversion failed, or None if it succeeded
+        :type error: str or None
+        :param elapsed: seconds spent on this conversion
+        :type elapsed: float
+        :param written: whether the output file was written, as opposed to left as it was because it was unchanged
+        :type written: bool
+        :param stats: timings and counts for the conversion (see ConversionStats.as_dict), if they were collected
+        :type stats: dict or None
+        """
+        self.job = job
+        self.error = error
+        self.elapsed = elapsed
+        self.written = written
+        self.stats = stats
+
+
+def output_filename_for(input_filename, output_dir, relative_to=None):
+    """The golang file to generate for a .wxg file; next to it, or at the same relative location under output_dir"""
+    base = os.path.splitext(input_filename)[0] + ".go"
+    if output_dir is None:
+        return base
+    if relative_to is None:
+        return os.path.join(output_dir, os.path.basename(base))
+    return os.path.join(output_dir, os.path.relpath(base, relative_to))
+
+
+def jobs_from_globs(patterns, output_dir):
+    """:rtype: list of ConversionJob"""
+    jobs = []
+    for pattern in patterns:
+        for input_filename in sorted(glob.glob(pattern)):
+            jobs.append(ConversionJob(input_filename, output_filename_for(input_filename, output_dir)))
+    return jobs
+
+
+def jobs_from_directory(directory, output_dir):
+    """All the .wxg files under a directory, keeping their layout under output_dir
+    :rtype: list of ConversionJob
+    """
+    jobs = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(".wxg"):
+                input_filename = os.path.join(dirpath, filename)
+                jobs.append(ConversionJob(input_filename, output_filename_for(input_filename, output_dir, directory)))
+    return jobs
+
+
+def jobs_from_manifest(manifest_filename):
+    """
+    Read a manifest with one "input output" pair per line (tab separated if the paths contain spaces).  Blank lines and
+    lines starting with # are skipped, and relative paths are taken as relative to the manifest's directory.
+    :rtype: list of ConversionJob
+    """
+    manifest_dir = os.path.dirname(manifest_filename)
+    jobs = []
+    with open(manifest_filename, "r") as handle:
+        for line_num, line in enumerate(handle, 1):
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            if "\t" in line:
+                parts = [part.strip() for part in line.split("\t") if part.strip() != ""]
+            else:
+                parts = line.split()
+            if len(parts) != 2:
+                raise ValueError("%s:%d: expected an input and an output path, got %r" % (manifest_filename, line_num, line))
+            input_filename, output_filename = [os.path.join(manifest_dir, part) for part in parts]
+            jobs.append(ConversionJob(input_filename, output_filename))
+    return jobs
+
+
+_worker_object_classes_map = None
+_worker_convert_options = None
+_worker_force = None
+_worker_stats_options = None
+_worker_depfiles = None
+
+
+def _init_worker(convert_options, force, stats_options, depfiles):
+    global _worker_object_classes_map, _worker_convert_options, _worker_force, _worker_stats_options, \
+        _worker_depfiles
+    _worker_object_classes_map = widget_registry.default_registry()
+    _worker_convert_options = convert_options
+    _worker_force = force
+    _worker_stats_options = stats_options
+    _worker_depfiles = depfiles
+
+
+def _run_job(job):
+    """:type job: ConversionJob"""
+    start_time = time.time()
+    error = None
+    written = False
+    stats = None
+    if _worker_stats_options is not None:
+        stats = ConversionStats(**_worker_stats_options)
+    try:
+        if not os.path.exists(job.input_filename):
+            error = "Input file '%s' not found" % job.input_filename
+        elif not _worker_force and os.path.exists(job.output_filename):
+            error = "Output file '%s' already exists; use -f to overwrite" % job.output_filename
+        else:
+            output_dir = os.path.dirname(job.output_filename)
+            if output_dir != "" and not os.path.isdir(output_dir):
+                os.makedirs(output_dir)
+            depfile = depfile_filename_for(job.output_filename) if _worker_depfiles else None
+            written = wxg_golang_converter.convert(job.input_filename, job.output_filename,
+                                                   wx_object_classes_map=_worker_object_classes_map, stats=stats,
+                                                   depfile=depfile, **_worker_convert_options)
+    except Exception:
+        error = traceback.format_exc().rstrip()
+    return ConversionResult(job, error, time.time() - start_time, written,
+                            stats.as_dict() if stats is not None else None)
+
+
+def run_batch(jobs, convert_options, force=False, processes=None, result_callback=None, stats_options=None,
+              depfiles=False):
+    """
+    Convert a number of .wxg files using a pool of worker processes.  A failure only affects the file concerned; the
+    rest of the batch carries on.
+    :type jobs: list of ConversionJob
+    :param convert_options: keyword arguments to pass to wxg_golang_converter.convert for each file, e.g. package_name
+    :type convert_options: dict
+    :param processes: number of worker processes, or None for one per CPU
+    :param result_callback: called with each ConversionResult as it completes
+    :param stats_options: if given, collect ConversionStats for each file, created with these keyword arguments
+    :type stats_options: dict or None
+    :param depfiles: write a Make dependency file next to each output (see depfiles.depfile_filename_for)
+    :rtype: list of ConversionResult
+    """
+    results = []
+    pool = multiprocessing.Pool(processes, _init_worker, (convert_options, force, stats_options, depfiles))
+    try:
+        for result in pool.imap_unordered(_run_job, jobs):
+            results.append(result)
+            if result_callback is not None:
+                result_callback(result)
+    finally:
+        pool.close()
+        pool.join()
+    return results
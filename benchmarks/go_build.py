@@ -0,0 +1,105 @@
+"""
+Compare how long the Go compiler takes over generated code with and without --max-function-statements.  For each
+frame size a Go package is written with the code generated from a synthetic .wxg, once with everything in the usual
+few large functions and once split into helper methods, and each package is then compiled with go build.
+
+The packages import wxGo, so this needs a Go toolchain that can build it (e.g. in a GOPATH with GO111MODULE=off).
+wxGo itself is built once and then comes from Go's build cache; only the generated package is recompiled each run.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wxg_golang_converter
+from wxg_synth import generate_wxg
+
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(tempfile.gettempdir(), "wxg_go_build")
+
+# changed before every build, so the generated package is compiled again rather than taken from the build cache
+NONCE_FILE = """package %(package_name)s
+
+const buildNonce = %(nonce)d
+"""
+
+
+def write_package(directory, package_name, source, wxgo_package_name, max_function_statements):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    generated = wxg_golang_converter.convert_source(source, package_name, wxgo_package_name, input_label="benchmark",
+                                                    reproducible=True,
+                                                    max_function_statements=max_function_statements)
+    with open(os.path.join(directory, "frame_wxg.go"), "wb") as handle:
+        handle.write(generated)
+    return len(generated)
+
+
+def time_build(directory, package_name, count):
+    """
+    :return: the seconds each go build of the package took
+    :rtype: list of float
+    """
+    timings = []
+    for run in xrange(count):
+        with open(os.path.join(directory, "nonce.go"), "w") as handle:
+            handle.write(NONCE_FILE % dict(package_name=package_name, nonce=int(time.time() * 1000000) + run))
+        start_time = time.time()
+        subprocess.check_call(["go", "build", "."], cwd=directory)
+        timings.append(time.time() - start_time)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--widgets", default="1000,5000,10000",
+                        help="comma separated widget counts to generate a frame of (default %(default)s)")
+    parser.add_argument("--depth", type=int, default=4,
+                        help="box sizers deep the widgets are nested (default %(default)s)")
+    parser.add_argument("--handlers", type=int, default=200,
+                        help="widgets with an event handler (default %(default)s)")
+    parser.add_argument("--max-function-statements", type=int, default=500, metavar="N",
+                        help="the --max-function-statements to compare against no limit (default %(default)s)")
+    parser.add_argument("--output-directory", default=DEFAULT_OUTPUT_DIRECTORY,
+                        help="where to write a package per frame size and mode (default %(default)s)")
+    parser.add_argument("--wxgo-package-name", default="github.com/dontpanic92/wxGo",
+                        help="golang package name of the version of wxGo to use (default %(default)s)")
+    parser.add_argument("--no-run", default=False, action="store_true",
+                        help="only write the packages, without building them")
+    parser.add_argument("--count", type=int, default=3,
+                        help="builds of each package, keeping the fastest (default %(default)s)")
+    options = parser.parse_args()
+
+    try:
+        widget_counts = [int(widgets) for widgets in options.widgets.split(",")]
+    except ValueError:
+        parser.error("--widgets must be comma separated numbers")
+
+    packages = []
+    for widgets in widget_counts:
+        source = generate_wxg(widgets=widgets, depth=options.depth, handlers=min(options.handlers, widgets))
+        for mode, max_function_statements in (("whole", None), ("split", options.max_function_statements)):
+            package_name = "%s%d" % (mode, widgets)
+            directory = os.path.join(options.output_directory, package_name)
+            size = write_package(directory, package_name, source, options.wxgo_package_name, max_function_statements)
+            print >> sys.stderr, "Wrote %s (%d bytes)" % (directory, size)
+            packages.append((widgets, mode, package_name, directory))
+    if options.no_run:
+        return
+
+    whole_seconds = {}
+    for widgets, mode, package_name, directory in packages:
+        best = min(time_build(directory, package_name, options.count))
+        if mode == "whole":
+            whole_seconds[widgets] = best
+            print >> sys.stderr, "%8d widgets  %-6s %8.2fs" % (widgets, mode, best)
+        else:
+            print >> sys.stderr, "%8d widgets  %-6s %8.2fs  %5.2fx" % (widgets, mode, best,
+                                                                       whole_seconds[widgets] / best)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare how long generated frames take to construct in Go, between the code generation modes.  For each mode a Go
+package is written with the code generated from the same synthetic .wxg and a benchmark that builds and destroys the
+frame, which is then run with go test.
+
+The packages import wxGo, so this needs a Go toolchain that can build it (e.g. in a GOPATH with GO111MODULE=off) and
+a display for wxWidgets to open windows on; under X11 without one, run it with xvfb-run.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wxg_golang_converter
+from generation_options import GenerationOptions
+from wxg_synth import generate_wxg
+
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(tempfile.gettempdir(), "wxg_go_construction")
+
+# name -> the options to generate the code with
+MODES = [
+    ("standard", GenerationOptions()),
+    ("fast", GenerationOptions(fast_construction=True)),
+    ("lazy_pages", GenerationOptions(lazy_notebook_pages=True)),
+    ("fast_lazy_pages", GenerationOptions(fast_construction=True, lazy_notebook_pages=True)),
+]
+
+BENCHMARK_TEST = """package %(package_name)s
+
+import (
+\t"testing"
+
+\t"%(wxgo_package_name)s/wx"
+)
+
+var app = wx.NewApp()
+
+func BenchmarkConstruction(b *testing.B) {
+\tfor i := 0; i < b.N; i++ {
+\t\tframe := initBenchFrame0(nil)
+\t\tframe.Destroy()
+\t}
+}
+"""
+
+BENCHMARK_RESULT = re.compile(r"^BenchmarkConstruction\S*\s+(\d+)\s+([\d.]+) ns/op")
+
+
+def write_packages(output_directory, source, wxgo_package_name, modes):
+    """
+    Write a Go package for each mode with the generated code and the construction benchmark
+    :return: the directory of each mode's package
+    :rtype: list of (str, str)
+    """
+    directories = []
+    for name, options in modes:
+        directory = os.path.join(output_directory, name)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        generated = wxg_golang_converter.convert_source(source, name, wxgo_package_name, input_label="benchmark",
+                                                        reproducible=True, options=options)
+        with open(os.path.join(directory, "frame_wxg.go"), "wb") as handle:
+            handle.write(generated)
+        with open(os.path.join(directory, "construction_test.go"), "w") as handle:
+            handle.write(BENCHMARK_TEST % dict(package_name=name, wxgo_package_name=wxgo_package_name))
+        directories.append((name, directory))
+    return directories
+
+
+def run_benchmark(directory, count):
+    """
+    :return: the nanoseconds per construction of each run
+    :rtype: list of float
+    """
+    output = subprocess.check_output(["go", "test", "-run", "^$", "-bench", "Construction", "-count", str(count)],
+                                     cwd=directory)
+    timings = []
+    for line in output.splitlines():
+        match = BENCHMARK_RESULT.match(line)
+        if match is not None:
+            timings.append(float(match.group(2)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--widgets", type=int, default=500,
+                        help="widgets in the frame (default %(default)s)")
+    parser.add_argument("--depth", type=int, default=4,
+                        help="box sizers deep the widgets are nested (default %(default)s)")
+    parser.add_argument("--notebooks", type=int, default=1,
+                        help="notebooks in the frame (default %(default)s)")
+    parser.add_argument("--pages", type=int, default=15,
+                        help="pages per notebook (default %(default)s)")
+    parser.add_argument("--mode", action="append", default=[],
+                        help="only generate the named mode; may be repeated (default all of %s)" %
+                             ", ".join(name for name, mode_options in MODES))
+    parser.add_argument("--output-directory", default=DEFAULT_OUTPUT_DIRECTORY,
+                        help="where to write a package per mode (default %(default)s)")
+    parser.add_argument("--wxgo-package-name", default="github.com/dontpanic92/wxGo",
+                        help="golang package name of the version of wxGo to use (default %(default)s)")
+    parser.add_argument("--no-run", default=False, action="store_true",
+                        help="only write the packages, without running the benchmarks")
+    parser.add_argument("--count", type=int, default=5,
+                        help="runs of each benchmark, keeping the fastest (default %(default)s)")
+    options = parser.parse_args()
+
+    modes = MODES
+    if len(options.mode) > 0:
+        known = dict(MODES)
+        for name in options.mode:
+            if name not in known:
+                parser.error("unknown mode %r" % name)
+        modes = [(name, known[name]) for name in options.mode]
+
+    # no handlers or custom widgets, so the frame builds without any other Go code
+    source = generate_wxg(widgets=options.widgets, depth=options.depth, notebooks=options.notebooks,
+                          pages=options.pages)
+    directories = write_packages(options.output_directory, source, options.wxgo_package_name, modes)
+    for name, directory in directories:
+        print >> sys.stderr, "Wrote %s" % directory
+    if options.no_run:
+        return
+
+    baseline = None
+    for name, directory in directories:
+        timings = run_benchmark(directory, options.count)
+        if len(timings) == 0:
+            print >> sys.stderr, "%-16s no benchmark results" % name
+            continue
+        best = min(timings)
+        if baseline is None:
+            baseline = best
+        print >> sys.stderr, "%-16s %12.0f ns/op  %5.2fx" % (name, best, baseline / best)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Time the converter's cold start: how long a fresh interpreter takes to import its command line entry point
+(wxg_to_golang), and to import it and convert a small .wxg with it.  Each is run in a new process --repeat times,
+keeping the fastest, and timed both from inside the process and including the interpreter's own startup.  One import
+is also broken down by module, in the format of python -X importtime; the interpreter's own -X importtime is used
+where it has one (Python 3.7 and later), and otherwise the breakdown comes from timing each call of __import__ that
+loads something new.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from wxg_synth import generate_wxg
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run in the new process; prints the seconds taken, from before the converter is imported to once the work is done
+CHILD_SCRIPT = """
+import sys
+import time
+start_time = time.time()
+sys.path.insert(0, %(root_directory)r)
+import wxg_to_golang
+%(work)s
+sys.stdout.write("%%r\\n" %% (time.time() - start_time))
+"""
+
+# as running wxg_to_golang.py, with what it reports on stderr kept out of the benchmark's own output
+CONVERT_WORK = """
+import os
+sys.argv = ["wxg_to_golang.py", "--in", %(input_filename)r, "--out", %(output_filename)r, "--force"]
+stderr = sys.stderr
+sys.stderr = open(os.devnull, "w")
+wxg_to_golang.main()
+sys.stderr = stderr
+"""
+
+# the -X importtime output of Python 3.7, for interpreters without it
+IMPORT_TIME_HOOK = """
+import __builtin__
+import sys
+import time
+
+_original_import = __builtin__.__import__
+_depth = [0]
+_child_seconds = [0.0]
+
+
+def _timed_import(name, *args, **kwargs):
+    if name in sys.modules:
+        return _original_import(name, *args, **kwargs)
+    modules_before = len(sys.modules)
+    outer_child_seconds = _child_seconds[0]
+    _child_seconds[0] = 0.0
+    _depth[0] += 1
+    start_time = time.time()
+    try:
+        return _original_import(name, *args, **kwargs)
+    finally:
+        seconds = time.time() - start_time
+        _depth[0] -= 1
+        if len(sys.modules) > modules_before:
+            sys.stderr.write("import time: %9d | %10d | %s%s\\n" % ((seconds - _child_seconds[0]) * 1e6, seconds * 1e6,
+                                                                  "  " * _depth[0], name))
+        _child_seconds[0] = outer_child_seconds + seconds
+
+
+__builtin__.__import__ = _timed_import
+"""
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S.*)$")
+
+
+def time_child(python, script, repeat):
+    """
+    Run a script in a new process repeat times
+    :return: the fastest seconds reported by the script, and the fastest including the interpreter's startup
+    :rtype: (float, float)
+    """
+    best_in_process = None
+    best_wall = None
+    for _ in range(repeat):
+        start_time = time.time()
+        output = subprocess.check_output([python, "-c", script], cwd=ROOT_DIRECTORY)
+        wall = time.time() - start_time
+        in_process = float(output.splitlines()[-1])
+        best_in_process = in_process if best_in_process is None else min(best_in_process, in_process)
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+    return best_in_process, best_wall
+
+
+def has_importtime(python):
+    output = subprocess.check_output([python, "-c", "import sys; print(sys.version_info >= (3, 7))"])
+    return output.strip() == "True"
+
+
+def import_breakdown(python):
+    """
+    Break down one import of the converter by module
+    :return: (self microseconds, cumulative microseconds, depth, module name) for each import, innermost first
+    :rtype: list of (int, int, int, str)
+    """
+    script = CHILD_SCRIPT % dict(root_directory=ROOT_DIRECTORY, work="")
+    if has_importtime(python):
+        command = [python, "-X", "importtime", "-c", script]
+    else:
+        command = [python, "-c", IMPORT_TIME_HOOK + script]
+    process = subprocess.Popen(command, cwd=ROOT_DIRECTORY, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    assert process.returncode == 0, "import failed:\n%s" % stderr
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            records.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--python", default=sys.executable,
+                        help="interpreter to run the converter with (default %(default)s)")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="new processes per measurement, keeping the fastest (default %(default)s)")
+    parser.add_argument("--widgets", type=int, default=20,
+                        help="widgets in the .wxg converted (default %(default)s)")
+    parser.add_argument("--top", type=int, default=15,
+                        help="modules to list in the breakdown, slowest first by their own time "
+                             "(default %(default)s)")
+    parser.add_argument("--output",
+                        help="JSON file to save the results to")
+    parser.add_argument("--baseline",
+                        help="JSON results saved with --output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fractional slowdown that counts as a regression (default %(default)s)")
+    options = parser.parse_args()
+
+    handle, input_filename = tempfile.mkstemp(suffix=".wxg")
+    output_filename = input_filename[:-len(".wxg")] + ".go"
+    try:
+        with os.fdopen(handle, "wb") as input_handle:
+            input_handle.write(generate_wxg(widgets=options.widgets, notebooks=1, pages=2))
+        measurements = [
+            ("import", ""),
+            ("convert", CONVERT_WORK % dict(input_filename=input_filename, output_filename=output_filename)),
+        ]
+        results = {"python": subprocess.check_output([options.python, "-c", "import platform; "
+                                                                            "print(platform.python_version())"]).strip(),
+                   "platform": platform.platform(),
+                   "timings": {}}
+        for name, work in measurements:
+            script = CHILD_SCRIPT % dict(root_directory=ROOT_DIRECTORY, work=work)
+            in_process, wall = time_child(options.python, script, options.repeat)
+            results["timings"][name] = {"in_process": in_process, "wall": wall}
+            print >> sys.stderr, "%-8s %8.1fms in process %8.1fms with interpreter startup" % (name, in_process * 1000,
+                                                                                            wall * 1000)
+    finally:
+        os.remove(input_filename)
+        if os.path.exists(output_filename):
+            os.remove(output_filename)
+
+    records = import_breakdown(options.python)
+    print >> sys.stderr, "Slowest imports by their own time (self us, cumulative us):"
+    for self_us, cumulative_us, depth, module_name in sorted(records, reverse=True)[:options.top]:
+        print >> sys.stderr, "  %9d %10d  %s" % (self_us, cumulative_us, module_name)
+    results["modules"] = [module_name for self_us, cumulative_us, depth, module_name in records]
+
+    if options.output is not None:
+        with open(options.output, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+    if options.baseline is not None:
+        with open(options.baseline, "r") as handle:
+            baseline = json.load(handle)
+        regressions = []
+        for name, timings in sorted(results["timings"].items()):
+            before = baseline["timings"].get(name, {}).get("in_process")
+            if before is None:
+                continue
+            change = (timings["in_process"] - before) / before
+            if change > options.threshold:
+                regressions.append("%s: %.1fms -> %.1fms (%+.0f%%)" % (name, before * 1000, timings["in_process"] * 1000,
+                                                                      change * 100))
+        if len(regressions) > 0:
+            print >> sys.stderr, "Regressions against %s:" % options.baseline
+            for regression in regressions:
+                print >> sys.stderr, "  %s" % regression
+            sys.exit(1)
+        print >> sys.stderr, "No regressions beyond %.0f%% against %s" % (options.threshold * 100, options.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Time the phases of a conversion (parsing, walking the objects, code generation) on synthetic .wxg documents of
+different sizes and shapes, and compare the results against a baseline
+"""
+import argparse
+import StringIO
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import widget_registry
+import wxg_golang_converter
+from codegen import GenFile
+from wxg_parser import iter_application_objects
+from wxg_synth import generate_wxg
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+PHASES = ["parse", "walk", "code_gen"]
+
+# name -> generate_wxg parameters
+SCENARIOS = [
+    ("widgets_100", dict(widgets=100, depth=2)),
+    ("widgets_1000", dict(widgets=1000, depth=2)),
+    ("widgets_5000", dict(widgets=5000, depth=2)),
+    ("depth_16", dict(widgets=1000, depth=16)),
+    ("depth_64", dict(widgets=1000, depth=64)),
+    ("notebook_pages_20", dict(widgets=1000, notebooks=1, pages=20)),
+    ("notebook_pages_200", dict(widgets=1000, notebooks=2, pages=100)),
+    ("custom_widgets_1000", dict(widgets=100, custom_widgets=1000)),
+    ("handlers_1000", dict(widgets=3000, handlers=1000)),
+    ("frames_50", dict(widgets=100, frames=50, notebooks=1, pages=4, handlers=10)),
+]
+
+
+class _QuietStdout(object):
+    """The converter prints diagnostics to stdout; keep them out of the report"""
+    def __enter__(self):
+        self._stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        sys.stdout.close()
+        sys.stdout = self._stdout
+
+
+def time_conversion(source):
+    """Convert a .wxg document once, timing each phase
+    :rtype: dict[str, float]
+    """
+    wx_object_classes_map = widget_registry.default_registry()
+    timings = {}
+
+    start_time = time.time()
+    forms = [form for form in iter_application_objects(StringIO.StringIO(source)) if form.nodeName == "object"]
+    timings["parse"] = time.time() - start_time
+
+    start_time = time.time()
+    out = GenFile(wxg_golang_converter.generation_comments("benchmark", True), "github.com/dontpanic92/wxGo")
+    for form in forms:
+        wxg_golang_converter.convert_form(form, out, wx_object_classes_map)
+    timings["walk"] = time.time() - start_time
+
+    start_time = time.time()
+    output_handle = StringIO.StringIO()
+    out.code_gen(output_handle, "main")
+    timings["code_gen"] = time.time() - start_time
+
+    timings["output_lines"] = output_handle.getvalue().count("\n")
+    return timings
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_scenarios(scenarios, repeat):
+    """
+    Run each scenario repeat times, keeping the median time for each phase.  A single fast or slow run moves the
+    median much less than it does the fastest time, so results are steadier from one invocation to the next.
+    """
+    results = {}
+    for name, params in scenarios:
+        source = generate_wxg(**params)
+        runs = []
+        with _QuietStdout():
+            for _ in range(repeat):
+                # as timeit does, keep garbage collection from landing at random points in the timings
+                gc.collect()
+                gc.disable()
+                try:
+                    runs.append(time_conversion(source))
+                finally:
+                    gc.enable()
+        timings = dict((phase, median([run[phase] for run in runs])) for phase in PHASES)
+        timings["output_lines"] = runs[0]["output_lines"]
+        timings["total"] = sum(timings[phase] for phase in PHASES)
+        results[name] = {"params": params, "input_bytes": len(source), "timings": timings}
+        print >> sys.stderr, "%-22s %s total %.4fs" % (name, " ".join("%s %.4fs" % (phase, timings[phase])
+                                                                      for phase in PHASES), timings["total"])
+    return results
+
+
+def compare(results, baseline, threshold, min_time):
+    """
+    Find phases that got slower than the baseline by more than the threshold
+    :param threshold: allowed slowdown as a fraction, e.g. 0.25 for 25%
+    :param min_time: ignore phases that take less than this many seconds in the baseline, as too noisy to compare
+    :rtype: list of str
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline["scenarios"]:
+            continue
+        baseline_timings = baseline["scenarios"][name]["timings"]
+        for phase in PHASES + ["total"]:
+            before = baseline_timings[phase]
+            after = result["timings"][phase]
+            if before < min_time:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append("%s %s: %.4fs -> %.4fs (%+.0f%%)" % (name, phase, before, after, change * 100))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", action="append", default=[],
+                        help="only run the named scenario; may be repeated (default all of %s)" %
+                             ", ".join(name for name, params in SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=15,
+                        help="runs per scenario, keeping the median (default %(default)s)")
+    parser.add_argument("--output",
+                        help="JSON file to save the results to")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON results to compare against (default %(default)s)")
+    parser.add_argument("--update-baseline",
+                        default=False, action="store_true",
+                        help="save the results as the new baseline instead of comparing against it")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fractional slowdown of a phase that counts as a regression (default %(default)s)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="don't compare phases taking less than this many seconds in the baseline "
+                             "(default %(default)s)")
+    options = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if len(options.scenario) > 0:
+        known = dict(SCENARIOS)
+        for name in options.scenario:
+            if name not in known:
+                parser.error("unknown scenario %r" % name)
+        scenarios = [(name, known[name]) for name in options.scenario]
+
+    results = {"python": platform.python_version(),
+               "platform": platform.platform(),
+               "scenarios": run_scenarios(scenarios, options.repeat),
+               }
+
+    if options.output is not None:
+        with open(options.output, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+    if options.update_baseline:
+        with open(options.baseline, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+        print >> sys.stderr, "Saved baseline to %s" % options.baseline
+        return
+
+    if not os.path.exists(options.baseline):
+        print >> sys.stderr, "No baseline at %s to compare against" % options.baseline
+        return
+
+    with open(options.baseline, "r") as handle:
+        baseline = json.load(handle)
+    regressions = compare(results["scenarios"], baseline, options.threshold, options.min_time)
+    if len(regressions) > 0:
+        print >> sys.stderr, "Regressions against %s:" % options.baseline
+        for regression in regressions:
+            print >> sys.stderr, "  %s" % regression
+        sys.exit(1)
+    print >> sys.stderr, "No regressions beyond %.0f%% against %s" % (options.threshold * 100, options.baseline)
+
+
+if __name__ == "__main__":
+    main()
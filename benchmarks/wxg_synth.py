@@ -0,0 +1,176 @@
+"""Generate synthetic .wxg documents of a given size and shape, for benchmarking the converter"""
+import argparse
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+WIDGET_KINDS = ["label", "button", "list_box", "button", "bitmap", "spacer"]
+
+
+class _Writer(object):
+    def __init__(self):
+        self.parts = []
+        self.indent = 0
+        self.counter = 0
+
+    def unique_name(self, prefix):
+        self.counter += 1
+        return "%s_%d" % (prefix, self.counter)
+
+    def line(self, text):
+        self.parts.append("    " * self.indent + text + "\n")
+
+    def open(self, tag, **attributes):
+        attrs = "".join(" %s=%s" % (name, quoteattr(value)) for name, value in sorted(attributes.items()))
+        self.line("<%s%s>" % (tag, attrs))
+        self.indent += 1
+
+    def close(self, tag):
+        self.indent -= 1
+        self.line("</%s>" % tag)
+
+    def leaf(self, tag, text, **attributes):
+        attrs = "".join(" %s=%s" % (name, quoteattr(value)) for name, value in sorted(attributes.items()))
+        self.line("<%s%s>%s</%s>" % (tag, attrs, escape(text), tag))
+
+
+class _Container(object):
+    """A box sizer that will get a share of the widgets"""
+    def __init__(self):
+        self.items = []
+
+
+def _write_sizeritem(w, child_writer, option=0, flag="wxEXPAND"):
+    w.open("object", **{"class": "sizeritem"})
+    w.leaf("option", str(option))
+    w.leaf("border", "0")
+    w.leaf("flag", flag)
+    child_writer()
+    w.close("object")
+
+
+def _write_widget(w, kind, handler_budget):
+    name = w.unique_name(kind)
+    if kind == "label":
+        w.open("object", name=name, base="EditStaticText", **{"class": "wxStaticText"})
+        w.leaf("label", "Label %s" % name)
+    elif kind == "button":
+        w.open("object", name=name, base="EditButton", **{"class": "wxButton"})
+        w.leaf("label", "Button %s" % name)
+        if handler_budget[0] > 0:
+            handler_budget[0] -= 1
+            w.open("events")
+            w.leaf("handler", "On%s" % name.title().replace("_", ""), event="EVT_BUTTON")
+            w.close("events")
+    elif kind == "list_box":
+        w.open("object", name=name, base="EditListBox", **{"class": "wxListBox"})
+        w.leaf("tooltip", "Tooltip for %s" % name)
+        w.open("choices")
+        w.close("choices")
+    elif kind == "bitmap":
+        w.open("object", name=name, base="EditStaticBitmap", **{"class": "wxStaticBitmap"})
+        w.leaf("size", "16, 16")
+    elif kind == "custom":
+        w.open("object", name=name, base="CustomWidget", **{"class": "CustomWidget%d" % (w.counter % 7)})
+        w.open("arguments")
+        w.leaf("argument", "$parent")
+        w.leaf("argument", "$id")
+        w.close("arguments")
+    elif kind == "spacer":
+        w.open("object", name="spacer", base="EditSpacer", **{"class": "spacer"})
+        w.leaf("width", "8")
+        w.leaf("height", "8")
+    else:
+        assert False, "unknown widget kind %r" % kind
+    w.close("object")
+
+
+def _write_sizer(w, container, orient, handler_budget):
+    w.open("object", name=w.unique_name("sizer"), base="EditBoxSizer", **{"class": "wxBoxSizer"})
+    w.leaf("orient", orient)
+    next_orient = "wxHORIZONTAL" if orient == "wxVERTICAL" else "wxVERTICAL"
+    for item in container.items:
+        if isinstance(item, _Container):
+            _write_sizeritem(w, lambda: _write_sizer(w, item, next_orient, handler_budget), option=1)
+        elif isinstance(item, tuple):
+            _write_sizeritem(w, lambda: _write_notebook(w, item[1], handler_budget), option=1)
+        else:
+            _write_sizeritem(w, lambda: _write_widget(w, item, handler_budget))
+    w.close("object")
+
+
+def _write_panel(w, name, container, handler_budget):
+    w.open("object", name=name, base="EditPanel", **{"class": "wxPanel"})
+    w.leaf("style", "wxTAB_TRAVERSAL")
+    _write_sizer(w, container, "wxVERTICAL", handler_budget)
+    w.close("object")
+
+
+def _write_notebook(w, page_containers, handler_budget):
+    name = w.unique_name("notebook")
+    page_names = ["%s_pane_%d" % (name, i) for i in range(len(page_containers))]
+    w.open("object", name=name, base="EditNotebook", **{"class": "wxNotebook"})
+    w.open("tabs")
+    for i, page_name in enumerate(page_names):
+        w.leaf("tab", "Page %d" % i, window=page_name)
+    w.close("tabs")
+    for page_name, page_container in zip(page_names, page_containers):
+        _write_panel(w, page_name, page_container, handler_budget)
+    w.close("object")
+
+
+def generate_wxg(widgets=100, depth=2, notebooks=0, pages=0, custom_widgets=0, handlers=0, frames=1):
+    """
+    Generate a .wxg document
+    :param widgets: number of ordinary widgets (labels, buttons, list boxes, bitmaps, spacers) per frame
+    :param depth: how many box sizers deep the widgets of each frame are nested
+    :param notebooks: number of notebooks per frame
+    :param pages: number of pages (and tabs) per notebook
+    :param custom_widgets: number of CustomWidget objects per frame
+    :param handlers: number of button event handlers per frame, up to the number of buttons
+    :param frames: number of top level frames
+    :rtype: str
+    """
+    w = _Writer()
+    w.line('<?xml version="1.0"?>')
+    w.open("application", name="app", top_window="frame_0", encoding="UTF-8", **{"class": "BenchApp"})
+    for frame_num in range(frames):
+        # a chain of nested sizers, each holding a share of the widgets, plus a sizer per notebook page
+        containers = [_Container() for _ in range(max(depth, 1))]
+        for outer, inner in zip(containers, containers[1:]):
+            outer.items.append(inner)
+        for _ in range(notebooks):
+            page_containers = [_Container() for _ in range(pages)]
+            containers[0].items.append(("notebook", page_containers))
+            containers.extend(page_containers)
+
+        for i in range(widgets):
+            containers[i % len(containers)].items.append(WIDGET_KINDS[i % len(WIDGET_KINDS)])
+        for i in range(custom_widgets):
+            containers[i % len(containers)].items.append("custom")
+
+        w.open("object", name="frame_%d" % frame_num, base="EditFrame", **{"class": "BenchFrame%d" % frame_num})
+        w.leaf("title", "Benchmark frame %d" % frame_num)
+        w.leaf("size", "800, 600")
+        w.leaf("background", "#e0e0e0")
+        _write_sizer(w, containers[0], "wxVERTICAL", [handlers])
+        w.close("object")
+    w.close("application")
+    return "".join(w.parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widgets", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--notebooks", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=0)
+    parser.add_argument("--custom-widgets", type=int, default=0)
+    parser.add_argument("--handlers", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=1)
+    options = parser.parse_args()
+    sys.stdout.write(generate_wxg(options.widgets, options.depth, options.notebooks, options.pages,
+                                  options.custom_widgets, options.handlers, options.frames))
+
+
+if __name__ == "__main__":
+    main()
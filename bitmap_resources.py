@@ -0,0 +1,260 @@
+"""
+Embedded images for the embed_bitmaps option of generation_options.GenerationOptions.  The generated frame code only
+names each image by the path written in the .wxg (see bitmap_expression), so it doesn't depend on what the images
+contain and can be cached and regenerated incrementally as usual.  The images themselves go in a resource file per
+output, packed into a single string literal with each distinct image stored once, and a runtime file shared by the
+package decodes each image the first time it is used.
+"""
+import hashlib
+import os
+
+from output_files import read_existing, write_if_changed
+from wxg_parser import iter_application_objects
+from xml_helpers import child_element_text
+
+# base of each object that shows an image -> the tag its image path is in
+EMBEDDED_BITMAP_TAGS = {"EditStaticBitmap": "bitmap"}
+
+# wxGlade bitmap properties starting with these refer to stock art or code rather than a file
+NON_FILE_BITMAP_PREFIXES = ("art:", "code:", "empty:", "var:")
+
+# named so they're never mistaken for a frame's file in split mode (see split_output.is_generated_frame_file)
+RUNTIME_FILENAME = "wxg_bitmaps_runtime.go"
+SPLIT_RESOURCE_FILENAME = "wxg_bitmaps.go"
+
+_DIGEST_PREFIX = "// bitmaps digest: "
+
+_RUNTIME_SOURCE = """package %(package_name)s
+
+// Generated by wxg_to_golang: decoding of the bitmaps embedded in the generated frames
+
+import (
+\t"io/ioutil"
+\t"os"
+\t"sync"
+
+\t"%(wxgo_package_name)s/wx"
+)
+
+type wxgBitmapEntry struct {
+\tpath       string
+\thash       string
+\tstart, end int
+}
+
+var (
+\twxgBitmapsLock   sync.Mutex
+\twxgBitmapHashes  = map[string]string{}
+\twxgBitmapData    = map[string]string{}
+\twxgBitmapsByHash = map[string]wx.Bitmap{}
+)
+
+// wxgRegisterBitmaps records where each embedded image is in a resource file's data; it is called from the init
+// function of each generated resource file
+func wxgRegisterBitmaps(data string, entries []wxgBitmapEntry) {
+\tfor _, entry := range entries {
+\t\tif hash, ok := wxgBitmapHashes[entry.path]; ok && hash != entry.hash {
+\t\t\tpanic("wxg_to_golang: bitmap " + entry.path + " was embedded with different contents by two generated files")
+\t\t}
+\t\twxgBitmapHashes[entry.path] = entry.hash
+\t\twxgBitmapData[entry.hash] = data[entry.start:entry.end]
+\t}
+}
+
+// wxgBitmap returns the embedded image with the given path from the .wxg, decoding it the first time any path
+// with the same contents is asked for
+func wxgBitmap(path string) wx.Bitmap {
+\twxgBitmapsLock.Lock()
+\tdefer wxgBitmapsLock.Unlock()
+\thash, ok := wxgBitmapHashes[path]
+\tif !ok {
+\t\treturn wx.NullBitmap
+\t}
+\tif bitmap, ok := wxgBitmapsByHash[hash]; ok {
+\t\treturn bitmap
+\t}
+\tbitmap := wxgDecodeBitmap(wxgBitmapData[hash])
+\twxgBitmapsByHash[hash] = bitmap
+\t// the decoded bitmap is all that's needed from now on
+\tdelete(wxgBitmapData, hash)
+\treturn bitmap
+}
+
+// wxgDecodeBitmap has wx load the image through a temporary file, so it can be in any format wx can read
+func wxgDecodeBitmap(data string) wx.Bitmap {
+\tfile, err := ioutil.TempFile("", "wxg_bitmap")
+\tif err != nil {
+\t\treturn wx.NullBitmap
+\t}
+\tdefer os.Remove(file.Name())
+\t_, err = file.WriteString(data)
+\tif closeErr := file.Close(); err == nil {
+\t\terr = closeErr
+\t}
+\tif err != nil {
+\t\treturn wx.NullBitmap
+\t}
+\treturn wx.NewBitmap(file.Name(), wx.BITMAP_TYPE_ANY)
+}
+"""
+
+_RESOURCE_HEADER = """package %(package_name)s
+
+// Generated by wxg_to_golang: the bitmaps of the frames generated from %(input_label)s
+%(digest_line)s
+
+func init() {
+\twxgRegisterBitmaps(""+
+"""
+
+# (absolute path) -> (size, mtime, content hash), so images that haven't changed aren't hashed again
+_content_hashes = {}
+# resource filename -> {content hash: (Go literal, length)} of the images last written to it
+_literals = {}
+
+
+def is_file_bitmap(bitmap):
+    """Whether a wxGlade bitmap property names an image file, rather than stock art, code or nothing"""
+    return bitmap.strip() != "" and not bitmap.startswith(NON_FILE_BITMAP_PREFIXES)
+
+
+def go_string_literal(data):
+    """
+    A Go interpreted string literal for arbitrary bytes
+    :type data: str or unicode
+    :rtype: str
+    """
+    if isinstance(data, unicode):
+        data = data.encode("utf-8")
+    # string_escape leaves out " and escapes ', the other way round to Go, and otherwise only uses escapes Go also has
+    return '"%s"' % data.encode("string_escape").replace("\\'", "'").replace('"', '\\"')
+
+
+def bitmap_expression(bitmap):
+    """The Go expression for the embedded image of a bitmap property"""
+    return "wxgBitmap(%s)" % go_string_literal(bitmap)
+
+
+def collect_bitmap_paths(source):
+    """
+    The image files the objects of a .wxg document show, as written in it, without duplicates
+    :param source: file-like object to read the .wxg XML from
+    :rtype: list of str
+    """
+    paths = []
+    seen = set()
+    for form in iter_application_objects(source):
+        pending = [form]
+        while len(pending) > 0:
+            element = pending.pop()
+            if element.nodeName != "object":
+                continue
+            tag_name = EMBEDDED_BITMAP_TAGS.get(element.getAttribute("base"))
+            if tag_name is not None:
+                bitmap = child_element_text(element, tag_name)
+                if is_file_bitmap(bitmap) and bitmap not in seen:
+                    seen.add(bitmap)
+                    paths.append(bitmap)
+            pending.extend(reversed(element.childNodes))
+    return paths
+
+
+def resource_filename_for(output_filename):
+    """The resource file for the bitmaps of a single output file"""
+    stem, extension = os.path.splitext(output_filename)
+    if extension != ".go":
+        stem = output_filename
+    return "%s_bitmaps.go" % stem
+
+
+def content_hash(filename):
+    """
+    The sha1 of a file's contents, remembered for as long as its size and modification time stay the same
+    :rtype: str
+    """
+    filename = os.path.abspath(filename)
+    stat = os.stat(filename)
+    remembered = _content_hashes.get(filename)
+    if remembered is not None and remembered[:2] == (stat.st_size, stat.st_mtime):
+        return remembered[2]
+    with open(filename, "rb") as handle:
+        digest = hashlib.sha1(handle.read()).hexdigest()
+    _content_hashes[filename] = (stat.st_size, stat.st_mtime, digest)
+    return digest
+
+
+def resources_digest(package_name, input_label, hashed_paths):
+    """The digest recorded in a resource file of everything it is generated from"""
+    digest = hashlib.sha1("%s\0%s" % (package_name, input_label))
+    for bitmap, filename, digest_of_contents in hashed_paths:
+        digest.update("\0%s\0%s" % (go_string_literal(bitmap), digest_of_contents))
+    return digest.hexdigest()
+
+
+def write_resource_files(input_filename, resource_filename, package_name, wxgo_package_name, input_label,
+                         stats=None):
+    """
+    Write the resource file with the images the objects of a .wxg file show, and the runtime file alongside it.  The
+    images are found relative to the .wxg file.  The resource file records a digest of the images' contents, and is
+    left alone if that hasn't changed; only the images that have changed since the last write are read and encoded.
+    :param input_label: how to refer to the input in the comments at the top of the resource file
+    :type stats: conversion_stats.ConversionStats or None
+    :return: (filename, whether it was written) for the resource file and the runtime file
+    :rtype: list of (str, bool)
+    """
+    input_directory = os.path.dirname(input_filename)
+    with open(input_filename, "rb") as input_handle:
+        paths = collect_bitmap_paths(input_handle)
+
+    hashed_paths = []
+    for bitmap in paths:
+        filename = os.path.join(input_directory, bitmap)
+        assert os.path.isfile(filename), "bitmap %r in %s not found at %s" % (bitmap, input_filename, filename)
+        hashed_paths.append((bitmap, filename, content_hash(filename)))
+    digest_line = _DIGEST_PREFIX + resources_digest(package_name, input_label, hashed_paths)
+
+    runtime_filename = os.path.join(os.path.dirname(resource_filename), RUNTIME_FILENAME)
+    results = []
+    existing = read_existing(resource_filename)
+    if existing is not None and ("\n%s\n" % digest_line) in existing[:4096]:
+        results.append((resource_filename, False))
+        if stats is not None:
+            stats.count("bitmaps_unchanged", len(paths))
+    else:
+        results.append((resource_filename, write_if_changed(resource_filename, _resource_source(
+            resource_filename, package_name, input_label, digest_line, hashed_paths, stats))))
+    results.append((runtime_filename, write_if_changed(runtime_filename, _RUNTIME_SOURCE % dict(
+        package_name=package_name, wxgo_package_name=wxgo_package_name))))
+    return results
+
+
+def _resource_source(resource_filename, package_name, input_label, digest_line, hashed_paths, stats):
+    previous_literals = _literals.get(resource_filename, {})
+    literals = {}
+    parts = [_RESOURCE_HEADER % dict(package_name=package_name, input_label=input_label, digest_line=digest_line)]
+    entries = []
+    offsets = {}
+    length = 0
+    for bitmap, filename, digest in hashed_paths:
+        if digest not in offsets:
+            literal, data_length = previous_literals.get(digest, (None, 0))
+            if literal is None:
+                with open(filename, "rb") as handle:
+                    data = handle.read()
+                literal, data_length = go_string_literal(data), len(data)
+                if stats is not None:
+                    stats.count("bitmap_bytes_encoded", data_length)
+            offsets[digest] = (length, length + data_length)
+            length += data_length
+            literals[digest] = (literal, data_length)
+            parts.append("\t\t%s+\n" % literal)
+        start, end = offsets[digest]
+        entries.append("\t\t\t{%s, \"%s\", %d, %d},\n" % (go_string_literal(bitmap), digest, start, end))
+    parts.append("\t\t\"\",\n\t\t[]wxgBitmapEntry{\n")
+    parts.extend(entries)
+    parts.append("\t\t})\n}\n")
+    _literals[resource_filename] = literals
+    if stats is not None:
+        stats.count("bitmaps_embedded", len(hashed_paths))
+        stats.count("bitmaps_distinct", len(offsets))
+    return "".join(parts)
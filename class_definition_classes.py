@@ -1,4 +1,103 @@
-from xml_helpers import element_text, get_path_elements
+import sys
+
+from xml_helpers import element_index, element_text, get_path_elements
+
+# where a ConstructorParamsPlan extractor takes its value from
+SOURCE_DOM_OBJECT = 0
+SOURCE_DOM_CHILD_OBJECT = 1
+SOURCE_ATTRIBUTE = 2
+SOURCE_CHILD_TEXT = 3
+
+
+class ConstructorParamsPlan(object):
+    """
+    A constructor_params_form and properties_for_constructor list (see WxObjectClass) compiled into the steps needed to
+    build the constructor parameters for an object, so the entries only get checked and classified once per class
+    rather than once per object
+    """
+    __slots__ = ("constructor_params_form", "extractors", "single_value")
+
+    def __init__(self, constructor_params_form, properties_for_constructor):
+        self.constructor_params_form = constructor_params_form
+        self.extractors = []
+        """:type: list[(int, str, str, function, str, str)]"""
+        for properties_entry in properties_for_constructor:
+            if len(properties_entry) == 2:
+                property_name, convert_func = properties_entry
+                default_value = ""
+            elif len(properties_entry) == 3:
+                property_name, convert_func, default_value = properties_entry
+            else:
+                assert False, "invalid properties_for_constructor entry %r" % (properties_entry,)
+            if property_name == "DOM_OBJECT":
+                source, key = SOURCE_DOM_OBJECT, None
+            elif property_name == "DOM_CHILD_OBJECT":
+                source, key = SOURCE_DOM_CHILD_OBJECT, None
+            elif property_name.startswith("@"):
+                source, key = SOURCE_ATTRIBUTE, property_name[1:]
+            else:
+                source, key = SOURCE_CHILD_TEXT, property_name
+            # converters that are worth timing separately say which stats phase they belong to
+            stats_phase = getattr(convert_func, "stats_phase", None)
+            self.extractors.append((source, key, property_name, convert_func, default_value, stats_phase))
+        self.single_value = len(self.extractors) == 1
+
+    def build(self, dom_obj, item_child, stats=None):
+        """
+        Get the constructor parameters expression for an object
+        :type dom_obj: wxg_parser.WxgElement
+        :param item_child: for containers, the object the parameters are for inside dom_obj
+        :type stats: conversion_stats.ConversionStats or None
+        :rtype: str or None
+        """
+        if self.constructor_params_form is None:
+            return None
+        if len(self.extractors) == 0:
+            return self.constructor_params_form % ()
+
+        index = element_index(dom_obj)
+        constructor_param_values = []
+        for source, key, property_name, convert_func, default_value, stats_phase in self.extractors:
+            if source == SOURCE_CHILD_TEXT:
+                pre_conversion_value = index.texts.get(key)
+            elif source == SOURCE_ATTRIBUTE:
+                pre_conversion_value = index.attributes.get(key, "")
+            elif source == SOURCE_DOM_OBJECT:
+                pre_conversion_value = dom_obj
+            else:
+                pre_conversion_value = item_child
+            if pre_conversion_value is None:
+                converted_value = default_value
+            else:
+                try:
+                    if stats is not None and stats_phase is not None:
+                        stats.count(stats_phase + "_calls")
+                        with stats.phase(stats_phase):
+                            converted_value = convert_func(pre_conversion_value)
+                    else:
+                        converted_value = convert_func(pre_conversion_value)
+                except:
+                    print "During conversion of %s class=%s %s value %r:" % (dom_obj.nodeName, dom_obj.getAttribute("class"), property_name, pre_conversion_value)
+                    raise
+            if converted_value is None or converted_value == "":
+                msg = "During conversion of %s class=%s property '%s' value %r, got converted value %r" % (dom_obj.nodeName,
+                                                                                                           dom_obj.getAttribute("class"),
+                                                                                                           property_name,
+                                                                                                           pre_conversion_value,
+                                                                                                           converted_value)
+                assert False, msg
+            constructor_param_values.append(converted_value)
+        if self.single_value:
+            constructor_param_values = constructor_param_values[0]
+        else:
+            constructor_param_values = tuple(constructor_param_values)
+        try:
+            return self.constructor_params_form % constructor_param_values
+        except TypeError:
+            print >> sys.stderr, "Got"
+            print >> sys.stderr, repr(self.constructor_params_form)
+            print >> sys.stderr, repr(constructor_param_values)
+            raise
 
 
 class WxObjectClass(object):
@@ -31,7 +130,6 @@ class WxObjectClass(object):
         from the XML in an arbitrarily complex way.
         :type properties_for_constructor: None or list[(str, function) or (str, function, str)]
         """
-        self._cur_obj = None
         self._wxg_name = wxg_name
         self.base_name = base_name
         self._wx_class_name = wx_class_name
@@ -44,6 +142,25 @@ class WxObjectClass(object):
             raise TypeError("properties_for_constructor must be list, tuple, or None")
         self.constructor_params_form = constructor_params_form
         self.properties_for_constructor = properties_for_constructor
+        self._constructor_plan = None
+        self._property_plan = None
+
+    @property
+    def constructor_plan(self):
+        """The constructor parameters of this class compiled for building, on first use
+        :rtype: ConstructorParamsPlan
+        """
+        if self._constructor_plan is None:
+            self._constructor_plan = ConstructorParamsPlan(self.constructor_params_form, self.properties_for_constructor)
+        return self._constructor_plan
+
+    @property
+    def property_plan(self):
+        """The registered properties as a list of (tag name, go property setter name, value function)"""
+        if self._property_plan is None:
+            self._property_plan = [(tag_name, go_property_name, value_func)
+                                   for tag_name, (go_property_name, value_func) in self.properties.iteritems()]
+        return self._property_plan
 
     @property
     def wxg_name(self):
@@ -63,16 +180,45 @@ class WxObjectClass(object):
     def add_property(self, tag_name, go_property_name, value_func=None, go_property_set_prefix="Set"):
         assert tag_name not in self.properties
         self.properties[tag_name] = (go_property_set_prefix + go_property_name, value_func)
+        self._property_plan = None
 
-    def setup_for_dom_obj(self, obj):
-        """:type obj: xml.dom.minidom.Element"""
-        assert self._cur_obj is None
-        self._cur_obj = obj
+    def resolve(self, obj):
+        """
+        Get the details of this class as they apply to a particular object tag.  This doesn't modify the class
+        definition, so the same definition can be used by any number of conversions at once.
+        :type obj: wxg_parser.WxgElement
+        :rtype: ResolvedObjectClass
+        """
+        return ResolvedObjectClass(self, self.wxg_name, self.wx_class_name, self.constructor_name,
+                                   self.constructor_params_form, self.properties_for_constructor, self.constructor_needs_parent,
+                                   self.constructor_plan)
 
-    def teardown_for_dom_obj(self, obj):
-        """:type obj: xml.dom.minidom.Element"""
-        assert self._cur_obj == obj
-        self._cur_obj = None
+
+class ResolvedObjectClass(object):
+    """
+    The definition of a WX object class as it applies to one object tag, with any values that vary for different
+    instances of the tag filled in
+    """
+    __slots__ = ("definition", "wxg_name", "wx_class_name", "constructor_name", "constructor_params_form",
+                 "properties_for_constructor", "constructor_needs_parent", "constructor_plan")
+
+    def __init__(self, definition, wxg_name, wx_class_name, constructor_name, constructor_params_form,
+                 properties_for_constructor, constructor_needs_parent, constructor_plan=None):
+        """
+        :type definition: WxObjectClass
+        :param constructor_plan: the compiled constructor_params_form and properties_for_constructor, if already available
+        :type constructor_plan: ConstructorParamsPlan or None
+        """
+        self.definition = definition
+        self.wxg_name = wxg_name
+        self.wx_class_name = wx_class_name
+        self.constructor_name = constructor_name
+        self.constructor_params_form = constructor_params_form
+        self.properties_for_constructor = properties_for_constructor
+        self.constructor_needs_parent = constructor_needs_parent
+        if constructor_plan is None:
+            constructor_plan = ConstructorParamsPlan(constructor_params_form, properties_for_constructor)
+        self.constructor_plan = constructor_plan
 
 
 class WxContainer(WxObjectClass):
@@ -92,6 +238,17 @@ class WxContainer(WxObjectClass):
         self.add_method_name = add_method_name
         self.use_as_parent_object_for_enclosed_objects = use_as_parent_object_for_enclosed_objects
         self.expect_one_child = expect_one_child
+        self._subobject_plan = None
+
+    @property
+    def subobject_plan(self):
+        """The parameters for adding an enclosed object compiled for building, on first use
+        :rtype: ConstructorParamsPlan
+        """
+        if self._subobject_plan is None:
+            self._subobject_plan = ConstructorParamsPlan(self.subobject_constructor_params_form,
+                                                         self.subobject_properties_for_constructor or [])
+        return self._subobject_plan
 
     def add_subobject_field(self, tag_name, property_name, value_func=None):
         assert tag_name not in self.subobject_fields
@@ -102,15 +259,13 @@ class WxCustomWidget(WxObjectClass):
     def __init__(self):
         super(WxCustomWidget, self).__init__(None, "CustomWidget", None, None)
 
-    def setup_for_dom_obj(self, obj):
-        """:type obj: xml.dom.minidom.Element"""
-        super(WxCustomWidget, self).setup_for_dom_obj(obj)
-
-        # init the class-name-based properties
+    def resolve(self, obj):
+        """:type obj: wxg_parser.WxgElement"""
+        # let's assume that the custom class will always exist inside the same package
+        # and that the caller can always wrap it if necessary
         file_class_name = obj.getAttribute("class")
-        self.init_class_name_for_custom_class(file_class_name)
 
-        # init the constructor param list based properties
+        # the constructor param list based properties
         argument_placeholders = []
         for argument_obj in get_path_elements(obj, "arguments/argument"):
             argument_placeholders.append(element_text(argument_obj))
@@ -128,17 +283,5 @@ class WxCustomWidget(WxObjectClass):
             if param == "$id":
                 constructor_params_form_parts[i] = "wx.ID_ANY"
 
-        self.init_constructor_params_for_custom_class(", ".join(constructor_params_form_parts), constructor_properties, takes_parent_param)
-
-    def init_class_name_for_custom_class(self, file_class_name):
-        # let's assume that the custom class will always exist inside the same package
-        # and that the caller can always wrap it if necessary
-        self._wxg_name = file_class_name
-        self._wx_class_name = file_class_name
-        self._constructor_name = "New%s" % file_class_name
-
-    def init_constructor_params_for_custom_class(self, constructor_params_form, properties_for_constructor,
-                                                 constructor_needs_parent):
-        self.constructor_params_form = constructor_params_form
-        self.properties_for_constructor = properties_for_constructor
-        self.constructor_needs_parent = constructor_needs_parent
+        return ResolvedObjectClass(self, file_class_name, file_class_name, "New%s" % file_class_name,
+                                   ", ".join(constructor_params_form_parts), constructor_properties, takes_parent_param)
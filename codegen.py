@@ -1,7 +1,96 @@
+import array
+import marshal
+import zlib
+
+from generation_options import GenerationOptions
+
+# first element of a serialized GenFile; bump when the layout below changes
+IR_FORMAT = "wxg_golang_ir/3"
+
+
+class Member(object):
+    __slots__ = ("name", "type_name")
+    serial_kinds = "ss"
+
+    def __init__(self, name, type_name):
+        self.name = name
+        self.type_name = type_name
+
+
+class InitLine(object):
+    """Creates an object; base is the object's base in the .wxg (e.g. EditButton), if known"""
+    __slots__ = ("member_name", "constructor", "additional_params_expressions", "takes_parent", "parent_object_name",
+                 "base")
+    serial_kinds = "sssbss"
+
+    def __init__(self, member_name, constructor, additional_params_expressions, takes_parent, parent_object_name,
+                 base=None):
+        self.member_name = member_name
+        self.constructor = constructor
+        self.additional_params_expressions = additional_params_expressions
+        self.takes_parent = takes_parent
+        self.parent_object_name = parent_object_name
+        self.base = base
+
+
+class PropertyLine(object):
+    __slots__ = ("field_name", "property_name", "additional_params_expressions")
+    serial_kinds = "sss"
+
+    def __init__(self, field_name, property_name, additional_params_expressions):
+        self.field_name = field_name
+        self.property_name = property_name
+        self.additional_params_expressions = additional_params_expressions
+
+
+class LayoutLine(object):
+    """
+    Adds an object (or spacer) to its parent.  For items of a sizer, the proportion, flag and border that
+    additional_params_expressions was built from are kept as well, for the sizer optimisation pass
+    """
+    __slots__ = ("parent_field_name", "cur_field_name", "additional_params_expressions", "obj_in_struct", "method",
+                 "proportion", "flag", "border")
+    serial_kinds = "sssbsisi"
+
+    def __init__(self, parent_field_name, cur_field_name, additional_params_expressions, obj_in_struct, method,
+                 proportion=None, flag=None, border=None):
+        self.parent_field_name = parent_field_name
+        self.cur_field_name = cur_field_name
+        self.additional_params_expressions = additional_params_expressions
+        self.obj_in_struct = obj_in_struct
+        self.method = method
+        self.proportion = proportion
+        """:type: int or None"""
+        self.flag = flag
+        """:type: str or None"""
+        self.border = border
+        """:type: int or None"""
+
+
+class Binding(object):
+    __slots__ = ("event_handler", "event_id", "field_to_bind")
+    serial_kinds = "sss"
+
+    def __init__(self, event_handler, event_id, field_to_bind):
+        self.event_handler = event_handler
+        self.event_id = event_id
+        self.field_to_bind = field_to_bind
+
 
 class GenStruct(object):
-    def __init__(self, name, base_class, constructor, self_field_name, title):
+    """
+    A struct to generate for a form.  The lines added to it are kept as records whose strings are interned in the
+    strings table, which GenFile shares between all its structs, since the same field, constructor and method names
+    come up over and over
+    """
+
+    def __init__(self, name, base_class, constructor, self_field_name, title, strings=None):
+        if strings is None:
+            strings = {}
+        self.strings = strings
+        """:type: dict"""
         self.init_lines = []
+        """:type: list of InitLine"""
         self.name = name
         self.base_class = base_class
         self.constructor = constructor
@@ -11,23 +100,80 @@ class GenStruct(object):
         """:type: str"""
 
         self.members = []
+        """:type: list of Member"""
         self.layout_lines = []
+        """:type: list of LayoutLine"""
 
         self.properties_lines = []
+        """:type: list of PropertyLine"""
 
         self.bindings = []
+        """:type: list of Binding"""
 
-    def add_init_line(self, member_name, constructor, additional_params_expressions, takes_parent, parent_object_name=None):
-        self.init_lines.append((member_name, constructor, additional_params_expressions, takes_parent, parent_object_name))
+    def add_member(self, name, type_name):
+        intern = self.strings.setdefault
+        self.members.append(Member(intern(name, name), intern(type_name, type_name)))
+
+    def add_init_line(self, member_name, constructor, additional_params_expressions, takes_parent, parent_object_name=None,
+                      base=None):
+        intern = self.strings.setdefault
+        self.init_lines.append(InitLine(intern(member_name, member_name), intern(constructor, constructor),
+                                        additional_params_expressions, takes_parent,
+                                        intern(parent_object_name, parent_object_name), intern(base, base)))
 
     def add_property_line(self, field_name, property_name, additional_params_expressions):
-        self.properties_lines.append((field_name, property_name, additional_params_expressions))
+        intern = self.strings.setdefault
+        self.properties_lines.append(PropertyLine(intern(field_name, field_name), intern(property_name, property_name),
+                                                  intern(additional_params_expressions, additional_params_expressions)))
 
-    def add_layout_line(self, parent_field_name, cur_field_name, additional_params_expressions, obj_in_struct=True, method="Add"):
-        self.layout_lines.append((parent_field_name, cur_field_name, additional_params_expressions, obj_in_struct, method))
+    def add_layout_line(self, parent_field_name, cur_field_name, additional_params_expressions, obj_in_struct=True, method="Add",
+                        proportion=None, flag=None, border=None):
+        intern = self.strings.setdefault
+        self.layout_lines.append(LayoutLine(intern(parent_field_name, parent_field_name), intern(cur_field_name, cur_field_name),
+                                            intern(additional_params_expressions, additional_params_expressions),
+                                            obj_in_struct, intern(method, method), proportion, intern(flag, flag), border))
 
     def add_binding(self, event_handler, event_id, field_to_bind):
-        self.bindings.append((event_handler, event_id, field_to_bind))
+        intern = self.strings.setdefault
+        self.bindings.append(Binding(event_handler, intern(event_id, event_id), intern(field_to_bind, field_to_bind)))
+
+
+# how a None int field is packed
+_NONE_INT = -2 ** 31
+
+
+def _pack_records(records, record_class, string_ref):
+    """Flatten records into an array of ints: string table indexes (-1 for None), 0/1 for booleans and ints"""
+    width = len(record_class.serial_kinds)
+    values = array.array("i", [0]) * (len(records) * width)
+    for column, (kind, field_name) in enumerate(zip(record_class.serial_kinds, record_class.__slots__)):
+        field_values = [getattr(record, field_name) for record in records]
+        if kind == "s":
+            values[column::width] = array.array("i", [string_ref(value) for value in field_values])
+        elif kind == "i":
+            values[column::width] = array.array("i", [_NONE_INT if value is None else value for value in field_values])
+        else:
+            values[column::width] = array.array("i", [1 if value else 0 for value in field_values])
+    return values.tostring()
+
+
+def _unpack_records(data, record_class, strings):
+    """
+    Rebuild records flattened by _pack_records
+    :param strings: the string table, with None appended so that an index of -1 gives None
+    """
+    values = array.array("i")
+    values.fromstring(data)
+    width = len(record_class.serial_kinds)
+    columns = []
+    for column, kind in enumerate(record_class.serial_kinds):
+        if kind == "s":
+            columns.append([strings[value] for value in values[column::width]])
+        elif kind == "i":
+            columns.append([None if value == _NONE_INT else value for value in values[column::width]])
+        else:
+            columns.append([value != 0 for value in values[column::width]])
+    return map(record_class, *columns)
 
 
 def golang_str_repr(s):
@@ -41,114 +187,697 @@ def golang_int(i, default=0):
     return int(i)
 
 
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class CodeEmitter(object):
+    """
+    Collects the text of a generated file in a list of fragments and writes it out with a single write call, or with
+    chunk_size set, with a write at the end of each section once about that many characters have built up, so a very
+    large file needn't be held in memory whole
+    """
+
+    def __init__(self, output_handle, chunk_size=None, encoding=None):
+        """
+        :param encoding: if set, encode unicode text with this before writing it, for output handles that take bytes
+        """
+        self.output_handle = output_handle
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.length_written = 0
+        self.fragments = []
+        """:type: list of str"""
+
+    def end_section(self):
+        if self.chunk_size is not None and sum(map(len, self.fragments)) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.fragments) == 0:
+            return
+        chunk = "".join(self.fragments)
+        # emptied in place, as code_gen holds on to the list's append method
+        del self.fragments[:]
+        if self.encoding is not None and isinstance(chunk, unicode):
+            chunk = chunk.encode(self.encoding)
+        self.output_handle.write(chunk)
+        self.length_written += len(chunk)
+
+
 class GenFile(object):
     """Main code generation class"""
 
-    def __init__(self, generation_comments, wxgo_package_name):
+    def __init__(self, generation_comments, wxgo_package_name=None):
+        """
+        :param wxgo_package_name: the wxGo package to import, unless one is given to code_gen
+        """
         self.structs = []
         """:type: list of GenStruct"""
+        self.strings = {}
         self.generation_comments = generation_comments
         self.wxgo_package_name = wxgo_package_name
 
-    def code_gen(self, output_handle, package_name):
-        """Generate a golang source code file for the structs this object has been populated with"""
-        print >> output_handle, "package %s" % package_name
+    def new_struct(self, name, base_class, constructor, self_field_name, title):
+        """Add a struct to the file, sharing the file's interned strings
+        :rtype: GenStruct
+        """
+        struct = GenStruct(name, base_class, constructor, self_field_name, title, self.strings)
+        self.structs.append(struct)
+        return struct
+
+    def split(self):
+        """
+        A GenFile per struct, sharing this file's generation comments and interned strings
+        :rtype: list of GenFile
+        """
+        files = []
+        for struct in self.structs:
+            gen_file = GenFile(self.generation_comments, self.wxgo_package_name)
+            gen_file.strings = self.strings
+            gen_file.structs.append(struct)
+            files.append(gen_file)
+        return files
+
+    def to_bytes(self):
+        """
+        Serialize the structs to a compact binary form, so code can be generated from them again (e.g. for other
+        package names) without going back to the .wxg.  Every string is stored once, in a table that the records
+        refer to by index.
+        :rtype: str
+        """
+        strings = []
+        string_ids = {}
+
+        def string_ref(s):
+            if s is None:
+                return -1
+            string_id = string_ids.get(s)
+            if string_id is None:
+                string_id = string_ids[s] = len(strings)
+                strings.append(s)
+            return string_id
+
+        structs = []
+        for struct in self.structs:
+            structs.append((tuple(string_ref(s) for s in (struct.name, struct.base_class, struct.constructor,
+                                                          struct.self_field_name, struct.title, struct.sizer_field_name)),
+                            _pack_records(struct.members, Member, string_ref),
+                            _pack_records(struct.init_lines, InitLine, string_ref),
+                            _pack_records(struct.layout_lines, LayoutLine, string_ref),
+                            _pack_records(struct.properties_lines, PropertyLine, string_ref),
+                            _pack_records(struct.bindings, Binding, string_ref)))
+        return zlib.compress(marshal.dumps((IR_FORMAT, self.generation_comments, self.wxgo_package_name, strings, structs)))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load structs serialized with to_bytes
+        :rtype: GenFile
+        """
+        ir_format, generation_comments, wxgo_package_name, strings, structs = marshal.loads(zlib.decompress(data))
+        assert ir_format == IR_FORMAT, "unsupported intermediate representation format %r" % (ir_format,)
+
+        gen_file = cls(generation_comments, wxgo_package_name)
+        gen_file.strings = dict((s, s) for s in strings)
+        strings.append(None)
+        for header, members, init_lines, layout_lines, properties_lines, bindings in structs:
+            name, base_class, constructor, self_field_name, title, sizer_field_name = [strings[ref] for ref in header]
+            struct = gen_file.new_struct(name, base_class, constructor, self_field_name, title)
+            struct.sizer_field_name = sizer_field_name
+            struct.members = _unpack_records(members, Member, strings)
+            struct.init_lines = _unpack_records(init_lines, InitLine, strings)
+            struct.layout_lines = _unpack_records(layout_lines, LayoutLine, strings)
+            struct.properties_lines = _unpack_records(properties_lines, PropertyLine, strings)
+            struct.bindings = _unpack_records(bindings, Binding, strings)
+        return gen_file
+
+    def code_gen(self, output_handle, package_name, chunk_size=None, encoding=None, wxgo_package_name=None,
+                 options=None):
+        """
+        Generate a golang source code file for the structs this object has been populated with
+        :param wxgo_package_name: the wxGo package to import, if not the one the GenFile was created with
+        :param chunk_size: write the file out in chunks of about this many characters, rather than all at once
+        :param encoding: see CodeEmitter
+        :param options: the options to generate the code with; those that apply to walking the objects have already
+        been used by then
+        :type options: generation_options.GenerationOptions or None
+        :return: the length of what was written
+        :rtype: int
+        """
+        if wxgo_package_name is None:
+            wxgo_package_name = self.wxgo_package_name
+        assert wxgo_package_name is not None, "no wxGo package name to import"
+
+        emitter = CodeEmitter(output_handle, chunk_size, encoding)
+        self.emit_header(emitter, package_name, wxgo_package_name)
 
-        print >> output_handle, ""
+        for struct in self.structs:
+            self.emit_struct(emitter, struct, options)
 
-        for comment in self.generation_comments:
-            print >> output_handle, "// %s" % comment
+        emitter.flush()
+        return emitter.length_written
 
-        print >> output_handle, ""
+    def emit_header(self, emitter, package_name, wxgo_package_name):
+        """Emit the package clause, generation comments and imports that start every generated file
+        :type emitter: CodeEmitter
+        """
+        emit = emitter.fragments.append
 
-        print >> output_handle, "import ("
-        print >> output_handle, '\t"%s/wx"' % self.wxgo_package_name
-        print >> output_handle, ")"
+        emit("package %s\n" % package_name)
 
-        print >> output_handle, ""
+        emit("\n")
 
-        for struct in self.structs:
-            print >> output_handle, "type %s struct {" % struct.name
-            print >> output_handle, "\t%s" % struct.base_class
-            for name, typename in struct.members:
-                print >> output_handle, "\t%s %s" % (name, typename)
-            print >> output_handle, "}"
-            print >> output_handle, ""
-
-            events_struct_name = "%sEvents" % struct.name
-
-            # interface for bindings
-            print >> output_handle, "type %s interface {" % events_struct_name
-            for event_handler, event_id, field_to_bind in struct.bindings:
-                print >> output_handle, "\t%s(e wx.Event)" % event_handler
-            print >> output_handle, "}"
-
-            print >> output_handle, ""
-
-            # init function
-            print >> output_handle, "func init%s(eventInterface %s) *%s {" % (struct.name, events_struct_name, struct.name)
-            print >> output_handle, "\tout := &%s{}" % struct.name
-            print >> output_handle, "\tout.%s = %s(wx.NullWindow, wx.ID_ANY, %s)" % (struct.self_field_name, struct.constructor, golang_str_repr(struct.title))
-
-            for member_name, constructor, additional_params_expressions, takes_parent, parent_object_name in struct.init_lines:
-                param_fragments = []
-                if takes_parent:
-                    if parent_object_name is not None:
-                        parent_name = "out.%s" % parent_object_name
+        for comment in self.generation_comments:
+            emit("// %s\n" % comment)
+
+        emit("\n")
+
+        emit("import (\n")
+        emit('\t"%s/wx"\n' % wxgo_package_name)
+        emit(")\n")
+
+        emit("\n")
+
+    def emit_struct(self, emitter, struct, options=None):
+        """Emit the struct, events interface, init function and methods for one form
+        :type emitter: CodeEmitter
+        :type struct: GenStruct
+        :type options: generation_options.GenerationOptions or None
+        """
+        if options is None:
+            options = GenerationOptions()
+        fast_construction = options.fast_construction
+        max_function_statements = options.max_function_statements
+        emit = emitter.fragments.append
+
+        lazy_pages = None
+        if options.lazy_notebook_pages:
+            lazy_pages = LazyNotebookPages(struct)
+            if len(lazy_pages.notebooks) == 0:
+                lazy_pages = None
+
+        window_ids = {}
+        dispatch_table = None
+        if options.table_event_dispatch:
+            dispatch_table = EventDispatchTable(struct)
+            if len(dispatch_table.groups) == 0:
+                dispatch_table = None
+            else:
+                window_ids = dict((member_name, "out.%s+%s" % (FIRST_WINDOW_ID_FIELD, window_id))
+                                  for member_name, window_id in dispatch_table.window_ids.iteritems())
+
+                # offsets from the first of the IDs each instance reserves
+                emit("const (\n")
+                for index, member_name in enumerate(dispatch_table.window_id_order):
+                    if index == 0:
+                        emit("\t%s = iota\n" % dispatch_table.window_ids[member_name])
                     else:
-                        parent_name = "out"
-                    param_fragments.append(parent_name)
-                if additional_params_expressions is not None:
-                    param_fragments.append(additional_params_expressions)
-                init_line = "out.%s = %s(%s)" % (member_name, constructor, ", ".join(param_fragments))
-                print >> output_handle, "\t%s" % init_line
-
-            print >> output_handle, "\t"
-            print >> output_handle, "\tout.set_properties()"
-            print >> output_handle, "\tout.do_layout()"
-            print >> output_handle, "\t"
-
-            # bindings
-            for event_handler, event_id, field_to_bind in struct.bindings:
-                print >> output_handle, "\twx.Bind(out, wx.%s, eventInterface.%s, out.%s.GetId())" % (event_id, event_handler, field_to_bind)
-
-            print >> output_handle, "\t"
-            print >> output_handle, "\treturn out"
-            print >> output_handle, "}"
-            print >> output_handle, ""
-
-            # layout method
-            print >> output_handle, "func (out %s) do_layout() {" % struct.name
-            for parent_field_name, cur_field_name, additional_params_expressions, obj_in_struct, method in struct.layout_lines:
-                # assert layout_line.endswith(";")
-                if obj_in_struct:
-                    cur_field_name = "out.%s" % cur_field_name
-                if additional_params_expressions is None:
-                    layout_line = "out.%s.%s(%s)" % (parent_field_name, method, cur_field_name)
-                else:
-                    layout_line = "out.%s.%s(%s, %s)" % (parent_field_name, method, cur_field_name, additional_params_expressions)
-                print >> output_handle, "\t%s" % layout_line
-
-            print "\t"
-            if struct.sizer_field_name is not None:
-                print >> output_handle, "\tout.%s.SetSizer(out.%s)" % (struct.self_field_name, struct.sizer_field_name)
-            print >> output_handle, "\tout.%s.Layout()" % struct.self_field_name
-            print >> output_handle, "}"
-            print >> output_handle, ""
-
-            # properties method
-            print >> output_handle, "func (window %s) set_properties() {" % struct.name
-            print >> output_handle, "\twindow.SetTitle(%s)" % golang_str_repr(struct.title)
-            for field_name, property_name, additional_params_expressions in struct.properties_lines:
-                if field_name is None:
-                    field_fragment = ""
+                        emit("\t%s\n" % dispatch_table.window_ids[member_name])
+                emit(")\n")
+                emit("\n")
+
+        events_struct_name = "%sEvents" % struct.name
+
+        emit("type %s struct {\n" % struct.name)
+        emit("\t%s\n" % struct.base_class)
+        for member in struct.members:
+            emit("\t%s %s\n" % (member.name, member.type_name))
+        if dispatch_table is not None:
+            emit("\t%s int\n" % FIRST_WINDOW_ID_FIELD)
+        if lazy_pages is not None:
+            emit("\teventInterface %s\n" % events_struct_name)
+            for notebook_name, page_names in lazy_pages.notebooks:
+                emit("\t%s_pages_built [%d]bool\n" % (notebook_name, len(page_names)))
+        emit("}\n")
+        emit("\n")
+
+        # interface for bindings
+        emit("type %s interface {\n" % events_struct_name)
+        for binding in struct.bindings:
+            emit("\t%s(e wx.Event)\n" % binding.event_handler)
+        emit("}\n")
+
+        emit("\n")
+        emitter.end_section()
+
+        init_lines = struct.init_lines
+        layout_lines = struct.layout_lines
+        properties_lines = struct.properties_lines
+        bindings = struct.bindings
+        if dispatch_table is not None:
+            bindings = dispatch_table.unbatched_bindings
+        if lazy_pages is not None:
+            init_lines, page_init_lines = lazy_pages.split_lines(init_lines, "member_name")
+            layout_lines, page_layout_lines = lazy_pages.split_layout_lines(layout_lines)
+            properties_lines, page_properties_lines = lazy_pages.split_lines(properties_lines, "field_name")
+            bindings, page_bindings = lazy_pages.split_lines(bindings, "field_to_bind")
+
+        timed_struct_name = None
+        timing_declaration = ""
+        if options.startup_timing:
+            timed_struct_name = struct.name
+            timing_declaration = "\tvar timingStart wxgTimingMark\n"
+
+        def init_line_code(line):
+            code = _init_line_code(line, window_ids.get(line.member_name))
+            if timed_struct_name is not None:
+                code = _timed_code(code, timed_struct_name, "construct", line.member_name, line.base)
+            return code
+
+        def timed_call_code(code, phase, member_name=None):
+            if timed_struct_name is not None:
+                code = _timed_code(code, timed_struct_name, phase, member_name, None)
+            return code
+
+        # init function
+        emit("func init%s(eventInterface %s) *%s {\n" % (struct.name, events_struct_name, struct.name))
+        emit(timing_declaration)
+        emit("\tout := &%s{}\n" % struct.name)
+        frame_code = "\tout.%s = %s(wx.NullWindow, wx.ID_ANY, %s)\n" % (struct.self_field_name, struct.constructor, golang_str_repr(struct.title))
+        emit(timed_call_code(frame_code, "construct", struct.self_field_name))
+        if lazy_pages is not None:
+            emit("\tout.eventInterface = eventInterface\n")
+        if dispatch_table is not None:
+            emit("\tout.%s = wx.WindowNewControlId(%d)\n" % (FIRST_WINDOW_ID_FIELD,
+                                                             len(dispatch_table.window_id_order)))
+        if fast_construction:
+            emit("\tout.%s.Freeze()\n" % struct.self_field_name)
+
+        init_statements = [init_line_code(line) for line in init_lines]
+        init_parts = _split_statements(init_statements, max_function_statements)
+        if init_parts is None:
+            emit("".join(init_statements))
+        else:
+            for index in xrange(len(init_parts)):
+                emit("\tout.init_part_%d()\n" % (index + 1))
+
+        emit("\t\n")
+        emit(timed_call_code("\tout.set_properties()\n", "set_properties"))
+        emit(timed_call_code("\tout.do_layout()\n", "do_layout"))
+        emit("\t\n")
+
+        # bindings
+        binding_statements = [_binding_code(binding) for binding in bindings]
+        binding_parts = _split_statements(binding_statements, max_function_statements)
+        if binding_parts is None:
+            emit("".join(binding_statements))
+        else:
+            for index in xrange(len(binding_parts)):
+                emit("\tout.bind_part_%d(eventInterface)\n" % (index + 1))
+
+        if dispatch_table is not None:
+            for event_id, first_window_id, last_window_id, handlers in dispatch_table.groups:
+                table_name = "%s_handlers" % event_id
+                emit("\t%s := []func(wx.Event){\n" % table_name)
+                for handler in handlers:
+                    emit("\t\t%s,\n" % ("nil" if handler is None else "eventInterface.%s" % handler))
+                emit("\t}\n")
+                emit("\twx.Bind(out, wx.%s, func(e wx.Event) {\n" % event_id)
+                emit("\t\tif handler := %s[e.GetId()-out.%s-%s]; handler != nil {\n" % (table_name, FIRST_WINDOW_ID_FIELD,
+                                                                                     first_window_id))
+                emit("\t\t\thandler(e)\n")
+                emit("\t\t} else {\n")
+                emit("\t\t\te.Skip()\n")
+                emit("\t\t}\n")
+                emit("\t}, out.%s+%s, out.%s+%s)\n" % (FIRST_WINDOW_ID_FIELD, first_window_id, FIRST_WINDOW_ID_FIELD,
+                                                       last_window_id))
+
+        if lazy_pages is not None:
+            # build a page's contents the first time it's selected, and the contents of the page shown to start with
+            for notebook_name, page_names in lazy_pages.notebooks:
+                emit("\twx.Bind(out, wx.EVT_NOTEBOOK_PAGE_CHANGED, func(e wx.Event) {\n")
+                if fast_construction:
+                    # pages built up front are laid out along with the frame
+                    emit("\t\tif out.build_%s_page(out.%s.GetSelection()) {\n" % (notebook_name, notebook_name))
+                    emit("\t\t\tout.%s.GetCurrentPage().Layout()\n" % notebook_name)
+                    emit("\t\t}\n")
                 else:
-                    field_fragment = ".%s" % field_name
-                if additional_params_expressions is None:
-                    property_line = "window%s.%s()" % (field_fragment, property_name)
+                    emit("\t\tout.build_%s_page(out.%s.GetSelection())\n" % (notebook_name, notebook_name))
+                emit("\t\te.Skip()\n")
+                emit("\t}, out.%s.GetId())\n" % notebook_name)
+                emit("\tout.build_%s_page(out.%s.GetSelection())\n" % (notebook_name, notebook_name))
+
+        if fast_construction:
+            # the only top level layout, once everything is in place
+            emit(timed_call_code("\tout.%s.Layout()\n" % struct.self_field_name, "layout"))
+            emit("\tout.%s.Thaw()\n" % struct.self_field_name)
+
+        emit("\t\n")
+        emit("\treturn out\n")
+        emit("}\n")
+        emit("\n")
+        emitter.end_section()
+
+        if init_parts is not None:
+            _emit_parts(emitter, "func (out *%s) init_part_" % struct.name, "()", init_parts, timing_declaration)
+        if binding_parts is not None:
+            _emit_parts(emitter, "func (out *%s) bind_part_" % struct.name, "(eventInterface %s)" % events_struct_name,
+                        binding_parts)
+
+        # methods take the struct by pointer in fast_construction mode, rather than copying it
+        receiver_type = "*%s" % struct.name if fast_construction else struct.name
+
+        # layout method
+        emit("func (out %s) do_layout() {\n" % receiver_type)
+        layout_statements = [_layout_line_code(line) for line in layout_lines]
+        layout_parts = _split_statements(layout_statements, max_function_statements)
+        if layout_parts is None:
+            emit("".join(layout_statements))
+        else:
+            for index in xrange(len(layout_parts)):
+                emit("\tout.do_layout_part_%d()\n" % (index + 1))
+
+        emit("\t\n")
+        if struct.sizer_field_name is not None:
+            emit("\tout.%s.SetSizer(out.%s)\n" % (struct.self_field_name, struct.sizer_field_name))
+        if not fast_construction:
+            emit("\tout.%s.Layout()\n" % struct.self_field_name)
+        emit("}\n")
+        emit("\n")
+        emitter.end_section()
+
+        if layout_parts is not None:
+            _emit_parts(emitter, "func (out %s) do_layout_part_" % receiver_type, "()", layout_parts)
+
+        # properties method
+        emit("func (window %s) set_properties() {\n" % receiver_type)
+        emit("\twindow.SetTitle(%s)\n" % golang_str_repr(struct.title))
+        properties_statements = [_property_line_code("window", line) for line in properties_lines]
+        properties_parts = _split_statements(properties_statements, max_function_statements)
+        if properties_parts is None:
+            emit("".join(properties_statements))
+        else:
+            for index in xrange(len(properties_parts)):
+                emit("\twindow.set_properties_part_%d()\n" % (index + 1))
+
+        emit("}\n")
+        emit("\n")
+        emitter.end_section()
+
+        if properties_parts is not None:
+            _emit_parts(emitter, "func (window %s) set_properties_part_" % receiver_type, "()", properties_parts)
+
+        if lazy_pages is None:
+            return
+
+        # functions building the contents of each page, and choosing which to build
+        no_lines = []
+
+        for notebook_name, page_names in lazy_pages.notebooks:
+            built_name = "out.%s_pages_built" % notebook_name
+            if fast_construction:
+                emit("func (out *%s) build_%s_page(index int) bool {\n" % (struct.name, notebook_name))
+            else:
+                emit("func (out *%s) build_%s_page(index int) {\n" % (struct.name, notebook_name))
+            emit("\tif index < 0 || index >= len(%s) || %s[index] {\n" % (built_name, built_name))
+            emit("\t\treturn%s\n" % (" false" if fast_construction else ""))
+            emit("\t}\n")
+            emit("\t%s[index] = true\n" % built_name)
+            emit("\tswitch index {\n")
+            for index, page_name in enumerate(page_names):
+                emit("\tcase %d:\n" % index)
+                emit("\t\tout.build_%s()\n" % page_name)
+            emit("\t}\n")
+            if fast_construction:
+                emit("\treturn true\n")
+            emit("}\n")
+            emit("\n")
+
+            for page_name in page_names:
+                bindings = page_bindings.get(page_name, no_lines)
+                sections = [[init_line_code(line) for line in page_init_lines.get(page_name, no_lines)],
+                            [_property_line_code("out", line) for line in page_properties_lines.get(page_name, no_lines)],
+                            [_layout_line_code(line) for line in page_layout_lines.get(page_name, no_lines)],
+                            [_binding_code(binding) for binding in bindings]]
+                statements = [statement for section in sections for statement in section]
+                init_statement_count = len(sections[0])
+                first_binding = len(statements) - len(bindings)
+                parts = _split_statements(statements, max_function_statements)
+
+                emit("func (out *%s) build_%s() {\n" % (struct.name, page_name))
+                if parts is None:
+                    if init_statement_count > 0:
+                        emit(timing_declaration)
+                    if len(bindings) > 0:
+                        emit("\teventInterface := out.eventInterface\n")
+                    # the sections are only set apart by blank lines in a single function
+                    emit("\t\n".join("".join(section) for section in sections))
                 else:
-                    property_line = "window%s.%s(%s)" % (field_fragment, property_name, additional_params_expressions)
-                print >> output_handle, "\t%s" % property_line
-
-            print >> output_handle, "}"
-            print >> output_handle, ""
+                    for index in xrange(len(parts)):
+                        emit("\tout.build_%s_part_%d()\n" % (page_name, index + 1))
+                if not fast_construction:
+                    emit("\tout.%s.Layout()\n" % page_name)
+                emit("}\n")
+                emit("\n")
+                emitter.end_section()
+
+                if parts is not None:
+                    start = 0
+                    for index, part in enumerate(parts):
+                        emit("func (out *%s) build_%s_part_%d() {\n" % (struct.name, page_name, index + 1))
+                        if start < init_statement_count:
+                            emit(timing_declaration)
+                        if start + len(part) > first_binding:
+                            emit("\teventInterface := out.eventInterface\n")
+                        emit("".join(part))
+                        emit("}\n")
+                        emit("\n")
+                        emitter.end_section()
+                        start += len(part)
+
+
+def _split_statements(statements, max_statements):
+    """
+    The statements in consecutive parts of up to max_statements each, or None if they fit in one function.  Blank
+    statements, which only space out the code, are left out of the parts, so that each holds that many real ones.
+    :type statements: list of str
+    :type max_statements: int or None
+    :rtype: list of list of str or None
+    """
+    if max_statements is None:
+        return None
+    statements = [statement for statement in statements if statement.strip() != ""]
+    if len(statements) <= max_statements:
+        return None
+    return [statements[start:start + max_statements] for start in xrange(0, len(statements), max_statements)]
+
+
+def _emit_parts(emitter, signature_start, signature_end, parts, prologue=""):
+    """
+    Emit a helper function for each part from _split_statements, numbered from 1
+    :type emitter: CodeEmitter
+    :param signature_start: the function's signature up to its number
+    :param signature_end: the function's signature after its number
+    :param prologue: code to start each function with
+    """
+    emit = emitter.fragments.append
+    for index, part in enumerate(parts):
+        emit("%s%d%s {\n" % (signature_start, index + 1, signature_end))
+        emit(prologue)
+        emit("".join(part))
+        emit("}\n")
+        emit("\n")
+        emitter.end_section()
+
+
+def _timed_code(code, struct_name, phase, member_name, base):
+    """
+    Wrap code in startup timing calls (see startup_timing), which need timingStart declared in the function
+    :param member_name: the object the code is for, if any
+    :param base: the object's base in the .wxg, if known
+    """
+    return "\ttimingStart = wxgTimingStart()\n%s\twxgTimingEnd(timingStart, %s, %s, %s, %s)\n" % (
+        code, golang_str_repr(struct_name), golang_str_repr(phase), golang_str_repr(member_name or ""),
+        golang_str_repr(base or ""))
+
+
+def _init_line_code(line, window_id=None):
+    """
+    :type line: InitLine
+    :param window_id: the ID to create the window with in place of wx.ID_ANY, if any
+    """
+    additional_params_expressions = line.additional_params_expressions
+    if window_id is not None:
+        additional_params_expressions = window_id + additional_params_expressions[len(ANY_WINDOW_ID):]
+    if line.takes_parent:
+        if line.parent_object_name is not None:
+            parent_name = "out.%s" % line.parent_object_name
+        else:
+            parent_name = "out"
+        if additional_params_expressions is not None:
+            return "\tout.%s = %s(%s, %s)\n" % (line.member_name, line.constructor, parent_name, additional_params_expressions)
+        return "\tout.%s = %s(%s)\n" % (line.member_name, line.constructor, parent_name)
+    elif additional_params_expressions is not None:
+        return "\tout.%s = %s(%s)\n" % (line.member_name, line.constructor, additional_params_expressions)
+    return "\tout.%s = %s()\n" % (line.member_name, line.constructor)
+
+
+def _layout_line_code(line):
+    """:type line: LayoutLine"""
+    cur_field_name = line.cur_field_name
+    if line.obj_in_struct:
+        cur_field_name = "out.%s" % cur_field_name
+    if line.additional_params_expressions is None:
+        return "\tout.%s.%s(%s)\n" % (line.parent_field_name, line.method, cur_field_name)
+    return "\tout.%s.%s(%s, %s)\n" % (line.parent_field_name, line.method, cur_field_name, line.additional_params_expressions)
+
+
+def _property_line_code(receiver_name, line):
+    """:type line: PropertyLine"""
+    if line.field_name is None:
+        field_fragment = ""
+    else:
+        field_fragment = ".%s" % line.field_name
+    if line.additional_params_expressions is None:
+        return "\t%s%s.%s()\n" % (receiver_name, field_fragment, line.property_name)
+    return "\t%s%s.%s(%s)\n" % (receiver_name, field_fragment, line.property_name, line.additional_params_expressions)
+
+
+def _binding_code(binding):
+    """:type binding: Binding"""
+    return "\twx.Bind(out, wx.%s, eventInterface.%s, out.%s.GetId())\n" % (binding.event_id, binding.event_handler, binding.field_to_bind)
+
+
+class LazyNotebookPages(object):
+    """
+    Which of a struct's lines build the contents of notebook pages, for generating code that builds each page's
+    contents the first time the page is selected rather than all up front.  The page windows themselves are still
+    created and added to their notebooks straight away, as placeholders for the contents to go in.  Notebooks inside
+    a lazily built page have their pages built along with it.
+    """
+
+    def __init__(self, struct):
+        """:type struct: GenStruct"""
+        pages_by_notebook = {}
+        notebook_names = []
+        for line in struct.layout_lines:
+            if line.method == "AddPage" and line.obj_in_struct:
+                if line.parent_field_name not in pages_by_notebook:
+                    pages_by_notebook[line.parent_field_name] = []
+                    notebook_names.append(line.parent_field_name)
+                pages_by_notebook[line.parent_field_name].append(line.cur_field_name)
+        page_notebooks = {}
+        for notebook_name, page_names in pages_by_notebook.iteritems():
+            for page_name in page_names:
+                page_notebooks[page_name] = notebook_name
+
+        # objects are created after the window they're in, so a single pass finds the page each one is built in
+        self.owner_pages = {}
+        """:type: dict[str, str]"""
+        lazy_notebooks = set()
+        owner_pages = self.owner_pages
+        for init_line in struct.init_lines:
+            parent_name = init_line.parent_object_name
+            if parent_name in page_notebooks and page_notebooks[parent_name] in lazy_notebooks:
+                owner_pages[init_line.member_name] = parent_name
+            elif parent_name in owner_pages:
+                owner_pages[init_line.member_name] = owner_pages[parent_name]
+            if init_line.member_name in pages_by_notebook and init_line.member_name not in owner_pages:
+                lazy_notebooks.add(init_line.member_name)
+
+        self.notebooks = [(notebook_name, pages_by_notebook[notebook_name])
+                          for notebook_name in notebook_names if notebook_name in lazy_notebooks]
+        """:type: list of (str, list of str)"""
+        # a page's own sizer is set in the page's builder
+        self.layout_owner_pages = dict(owner_pages)
+        for notebook_name, page_names in self.notebooks:
+            for page_name in page_names:
+                self.layout_owner_pages[page_name] = page_name
+
+    def split_lines(self, lines, field_name, owners=None):
+        """
+        Separate the lines to run up front from those building the contents of each page, by the object each is for
+        :param field_name: the lines' field naming the object
+        :return: the lines to run up front, and the lines for each page
+        :rtype: (list, dict[str, list])
+        """
+        if owners is None:
+            owners = self.owner_pages
+        eager_lines = []
+        page_lines = {}
+        for line in lines:
+            page_name = owners.get(getattr(line, field_name))
+            if page_name is None:
+                eager_lines.append(line)
+            elif page_name in page_lines:
+                page_lines[page_name].append(line)
+            else:
+                page_lines[page_name] = [line]
+        return eager_lines, page_lines
+
+    def split_layout_lines(self, lines):
+        """As split_lines, for layout lines"""
+        return self.split_lines(lines, "parent_field_name", self.layout_owner_pages)
+
+
+ANY_WINDOW_ID = "wx.ID_ANY"
+# the struct field holding the first of the window IDs reserved for an EventDispatchTable
+FIRST_WINDOW_ID_FIELD = "firstWindowId"
+
+
+class EventDispatchTable(object):
+    """
+    How to bind a struct's event handlers with one wx.Bind per event type rather than one per handler.  The bound
+    windows are created with consecutive IDs, grouped by event type, and each event type is bound once for the range
+    of IDs its windows have, with a table from ID to handler.  Each instance reserves its IDs as one block with
+    wx.WindowNewControlId, so they come from wx's own pool of negative IDs and can't be the same as the IDs other code
+    gives its windows explicitly (such as a custom widget's children numbered from wx.ID_HIGHEST + 1).  Windows whose constructor doesn't take wx.ID_ANY as its
+    first parameter can't be given an ID, so their handlers are bound one by one as usual, as are any further handlers
+    for an event a window already has one for.
+    """
+
+    def __init__(self, struct):
+        """:type struct: GenStruct"""
+        init_lines = dict((init_line.member_name, init_line) for init_line in struct.init_lines)
+
+        bindings_by_event = {}
+        event_ids = []
+        self.unbatched_bindings = []
+        """:type: list of Binding"""
+        for binding in struct.bindings:
+            init_line = init_lines.get(binding.field_to_bind)
+            if init_line is None or init_line.additional_params_expressions is None or \
+                    not init_line.additional_params_expressions.startswith(ANY_WINDOW_ID):
+                self.unbatched_bindings.append(binding)
+                continue
+            handlers = bindings_by_event.get(binding.event_id)
+            if handlers is None:
+                handlers = bindings_by_event[binding.event_id] = {}
+                event_ids.append(binding.event_id)
+            if binding.field_to_bind in handlers:
+                self.unbatched_bindings.append(binding)
+                continue
+            handlers[binding.field_to_bind] = binding
+
+        # windows are numbered in order of the first event type they're bound for, so each type's range has few gaps
+        self.window_id_order = []
+        """:type: list of str"""
+        self.window_ids = {}
+        """
+        The constant for each window's offset from the first of the struct's IDs
+        :type: dict[str, str]
+        """
+        for event_id in event_ids:
+            for binding in struct.bindings:
+                member_name = binding.field_to_bind
+                if binding.event_id == event_id and bindings_by_event[event_id].get(member_name) is binding and \
+                        member_name not in self.window_ids:
+                    self.window_ids[member_name] = "id_%s_%s" % (struct.name, member_name)
+                    self.window_id_order.append(member_name)
+        positions = dict((member_name, position) for position, member_name in enumerate(self.window_id_order))
+
+        self.groups = []
+        """
+        For each event type: the offsets of the first and last window ID bound for it, and the handler for each ID
+        from first to last (or None)
+        :type: list of (str, str, str, list of str)
+        """
+        for event_id in event_ids:
+            handlers = bindings_by_event[event_id]
+            first = min(positions[member_name] for member_name in handlers)
+            last = max(positions[member_name] for member_name in handlers)
+            table = [None] * (last - first + 1)
+            for member_name, binding in handlers.iteritems():
+                table[positions[member_name] - first] = binding.event_handler
+            self.groups.append((event_id, self.window_ids[self.window_id_order[first]],
+                                self.window_ids[self.window_id_order[last]], table))
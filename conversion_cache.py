@@ -0,0 +1,197 @@
+import errno
+import hashlib
+import os
+import sys
+
+from output_files import replace_file
+from widget_registry import builtin_source_filenames, find_module_source
+
+# the modules whose source determines what gets generated for a given input, along with the built-in widget definitions
+CONVERTER_MODULES = ["wxg_golang_converter", "class_definition_classes", "codegen", "xml_helpers", "wxg_parser",
+                     "sizer_optimizer", "bitmap_resources", "property_values", "widget_registry", "generation_options"]
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# once past max_size, a cache is cut down to this fraction of it, so that it is measured again only after a good many
+# more puts rather than on every one
+EVICT_TO_FRACTION = 0.9
+
+_converter_fingerprint = None
+# source file -> digest, read once per process as for the converter's fingerprint
+_source_digests = {}
+
+
+def module_source_filename(module_name):
+    __import__(module_name)
+    filename = sys.modules[module_name].__file__
+    if filename.endswith(".pyc") or filename.endswith(".pyo"):
+        filename = filename[:-1]
+    return filename
+
+
+def converter_source_filenames():
+    """The source files of CONVERTER_MODULES and of the built-in widget definitions, which are found without importing
+    them"""
+    return [module_source_filename(module_name) for module_name in CONVERTER_MODULES] + builtin_source_filenames()
+
+
+def converter_fingerprint():
+    """A hash of the source of the converter and its widget registry, so cache entries from another version of the
+    converter are never used"""
+    global _converter_fingerprint
+    if _converter_fingerprint is None:
+        digest = hashlib.sha256()
+        for filename in converter_source_filenames():
+            with open(filename, "rb") as handle:
+                digest.update(handle.read())
+            digest.update("\0")
+        _converter_fingerprint = digest.hexdigest()
+    return _converter_fingerprint
+
+
+def source_digest(filename):
+    """The digest of a source file, or an empty string if there is none to read"""
+    if filename is None:
+        return ""
+    digest = _source_digests.get(filename)
+    if digest is None:
+        try:
+            with open(filename, "rb") as handle:
+                digest = hashlib.sha256(handle.read()).hexdigest()
+        except IOError:
+            digest = ""
+        _source_digests[filename] = digest
+    return digest
+
+
+def definitions_fingerprint(sources, bases=None):
+    """
+    A hash of the widget definitions other than the built-in ones, which converter_fingerprint covers: where each is
+    loaded from (which for an entry point includes its distribution's version), and the source of its modules
+    :param sources: as from widget_registry.definition_sources
+    :type sources: dict[str, (list of str, str)]
+    :param bases: only the definitions for these bases; by default all of them
+    """
+    digest = hashlib.sha256()
+    base_names = sources.keys() if bases is None else [base_name for base_name in bases if base_name in sources]
+    for base_name in sorted(base_names):
+        module_names, description = sources[base_name]
+        parts = [base_name, description] + [source_digest(find_module_source(module_name))
+                                            for module_name in module_names]
+        for part in parts:
+            digest.update(part.encode("utf-8") if isinstance(part, unicode) else part)
+            digest.update("\0")
+    return digest.hexdigest()
+
+
+def file_digest(filename, chunk_size=65536):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as handle:
+        while True:
+            data = handle.read(chunk_size)
+            if len(data) == 0:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class ConversionCache(object):
+    """
+    A directory of generated golang source keyed by a hash of everything that goes into generating it.
+
+    Entries are stored as <directory>/<first two hex digits of key>/<key>.go and are only ever created by renaming a
+    complete temporary file into place, so any number of processes can share one cache directory.  Reading an entry
+    updates its modification time, and when the cache grows past max_size the least recently used entries are removed
+    until it is down to EVICT_TO_FRACTION of max_size.
+
+    The size of the cache is only measured, by listing every entry, on the first put and whenever the entries put since
+    would take it past max_size; in between, puts just add to that measurement.  Entries put by other processes are
+    only seen at the next measurement, so a cache shared by several can briefly grow past max_size by what the others
+    put in the meantime.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        # the size of the cache as last measured, plus what has been put since; None until first measured
+        self._size_estimate = None
+
+    def key(self, input_digest, package_name, wxgo_package_name, header_key, definitions_key):
+        """
+        :param input_digest: hash of the input .wxg file bytes
+        :param header_key: anything else that ends up in the output, e.g. the input path shown in its comments
+        :param definitions_key: the definitions_fingerprint of the widget definitions converted with
+        """
+        digest = hashlib.sha256()
+        for part in (input_digest, package_name, wxgo_package_name, header_key, definitions_key,
+                     converter_fingerprint()):
+            digest.update(part.encode("utf-8") if isinstance(part, unicode) else part)
+            digest.update("\0")
+        return digest.hexdigest()
+
+    def _entry_filename(self, key):
+        return os.path.join(self.directory, key[:2], key + ".go")
+
+    def get(self, key):
+        """:rtype: str or None"""
+        filename = self._entry_filename(key)
+        try:
+            with open(filename, "rb") as handle:
+                data = handle.read()
+        except IOError as e:
+            if e.errno == errno.ENOENT:
+                return None
+            raise
+        try:
+            os.utime(filename, None)
+        except OSError:
+            # evicted by another process in the meantime; we already have the data
+            pass
+        return data
+
+    def put(self, key, data):
+        filename = self._entry_filename(key)
+        shard_dir = os.path.dirname(filename)
+        try:
+            os.makedirs(shard_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        replace_file(filename, data)
+        if self._size_estimate is not None:
+            self._size_estimate += len(data)
+        if self._size_estimate is None or self._size_estimate > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        """:rtype: list[(float, int, str)]"""
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(".go"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries if the cache is bigger than max_size, down to EVICT_TO_FRACTION of it"""
+        entries = self._entries()
+        total_size = sum(size for mtime, size, path in entries)
+        if total_size <= self.max_size:
+            self._size_estimate = total_size
+            return
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_size * EVICT_TO_FRACTION:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # another process got to it first
+                pass
+            total_size -= size
+        self._size_estimate = total_size
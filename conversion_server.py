@@ -0,0 +1,313 @@
+"""
+A long running conversion service, so build tools can convert many .wxg files without paying for Python startup and
+imports each time.
+
+Requests and responses are JSON objects, one per line.  A conversion request looks like
+    {"id": 1, "input": "path/to/file.wxg", "package_name": "main", "wxgo_package_name": "github.com/dontpanic92/wxGo"}
+with "xml": "<application>...</application>" in place of "input" to convert XML sent inline, and optionally any of
+"reproducible", "optimize_sizers", "lazy_notebook_pages", "fast_construction" and "table_event_dispatch" set to true,
+and "max_function_statements" set to a number (see the wxg_to_golang options of the same names).  The response
+carries the same id and either {"ok": true, "source": "..."} or
+{"ok": false, "error": {"type": ..., "message": ..., "traceback": ...}}.  The request {"id": 2, "command": "stats"}
+gets the server's queue metrics back as {"ok": true, "stats": {...}}.
+
+Requests on a connection may be pipelined, and responses are sent as conversions finish, so they can come back in a
+different order than the requests were sent.  A conversion that fails outside the converter, because its worker process
+died or its result couldn't be sent back, gets an error response too; one whose worker died is only noticed once it
+has gone without a result for the request timeout.
+"""
+import SocketServer
+import StringIO
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+
+import widget_registry
+import wxg_golang_converter
+from generation_options import GenerationOptions
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_REQUEST_TIMEOUT = 300.0
+# how often the conversions handed to the pool are checked for failures and timeouts
+WATCH_INTERVAL = 0.5
+
+
+class ServerMetrics(object):
+    """Counters for the conversions the server has queued and completed"""
+
+    def __init__(self, processes, max_pending):
+        self._lock = threading.Lock()
+        self.processes = processes
+        self.max_pending = max_pending
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    def started(self):
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+    def finished(self, ok, elapsed):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            if not ok:
+                self.failed += 1
+            self.total_seconds += elapsed
+
+    def snapshot(self):
+        with self._lock:
+            return {"processes": self.processes,
+                    "max_pending": self.max_pending,
+                    "pending": self.pending,
+                    "queued": max(0, self.pending - self.processes),
+                    "peak_pending": self.peak_pending,
+                    "completed": self.completed,
+                    "failed": self.failed,
+                    "mean_seconds": self.total_seconds / self.completed if self.completed > 0 else 0.0,
+                    }
+
+
+_worker_object_classes_map = None
+
+
+def _init_worker():
+    global _worker_object_classes_map
+    # keep anything the converter prints out of a stdio protocol stream
+    sys.stdout = sys.stderr
+    _worker_object_classes_map = widget_registry.default_registry()
+
+
+def error_response(request_id, error_type, message, tb=None):
+    return {"id": request_id, "ok": False, "error": {"type": error_type, "message": message, "traceback": tb}}
+
+
+def _convert_request(request):
+    """Carry out a conversion request in a worker process
+    :type request: dict
+    :rtype: dict
+    """
+    request_id = request.get("id")
+    start_time = time.time()
+    try:
+        package_name = request.get("package_name", "main")
+        wxgo_package_name = request.get("wxgo_package_name", "github.com/dontpanic92/wxGo")
+        reproducible = bool(request.get("reproducible", False))
+        max_function_statements = request.get("max_function_statements")
+        if max_function_statements is not None:
+            max_function_statements = int(max_function_statements)
+            assert max_function_statements >= 1, "max_function_statements must be at least 1"
+        options = GenerationOptions(optimize_sizers=bool(request.get("optimize_sizers", False)),
+                                    lazy_notebook_pages=bool(request.get("lazy_notebook_pages", False)),
+                                    fast_construction=bool(request.get("fast_construction", False)),
+                                    table_event_dispatch=bool(request.get("table_event_dispatch", False)),
+                                    max_function_statements=max_function_statements)
+        if "xml" in request:
+            input_handle = StringIO.StringIO(request["xml"].encode("utf-8"))
+            input_label = "<inline>"
+        else:
+            input_handle = open(request["input"], "rb")
+            input_label = request["input"]
+        try:
+            generated = wxg_golang_converter.convert_source(input_handle, package_name, wxgo_package_name,
+                                                            input_label=input_label, reproducible=reproducible,
+                                                            wx_object_classes_map=_worker_object_classes_map,
+                                                            options=options)
+        finally:
+            input_handle.close()
+        response = {"id": request_id, "ok": True, "source": generated.decode("utf-8")}
+    except Exception as e:
+        response = error_response(request_id, type(e).__name__, str(e), traceback.format_exc())
+    response["seconds"] = time.time() - start_time
+    return response
+
+
+class ConversionService(object):
+    """Hands requests from any number of connections to a bounded pool of worker processes"""
+
+    def __init__(self, processes=None, max_pending=DEFAULT_MAX_PENDING, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+        """
+        :param request_timeout: seconds after which a conversion with no result gets an error response, and stops
+        counting towards max_pending; the pool replaces a worker that dies, but the conversion it had is lost
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.pool = multiprocessing.Pool(processes, _init_worker)
+        self.metrics = ServerMetrics(processes, max_pending)
+        self.request_timeout = request_timeout
+        # submitting blocks once this many conversions are outstanding, which stops us reading further requests
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # (request id, AsyncResult, submit time, function completing the request) for each conversion in the pool
+        self._watched = []
+        self._watched_lock = threading.Lock()
+        self._closing = threading.Event()
+        # conversions given up on after request_timeout, which the pool still counts as outstanding
+        self._abandoned = 0
+        self._watcher = threading.Thread(target=self._watch)
+        self._watcher.daemon = True
+        self._watcher.start()
+
+    def close(self):
+        self._closing.set()
+        self._watcher.join()
+        if self._abandoned > 0:
+            # a pool waits forever on close for conversions lost with their worker
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
+
+    def submit(self, request, completed):
+        """
+        Hand a request to the pool, calling completed with its response once it is done.  The pool only calls back
+        for results it got from a worker, so the watcher completes the rest; either way, completed is called once.
+        """
+        lock = threading.Lock()
+        finished = [False]
+
+        def complete_once(response):
+            with lock:
+                if finished[0]:
+                    return
+                finished[0] = True
+            completed(response)
+
+        result = self.pool.apply_async(_convert_request, (request,), callback=complete_once)
+        with self._watched_lock:
+            self._watched.append((request.get("id"), result, time.time(), complete_once))
+
+    def _watch(self):
+        """Give error responses to conversions that failed in the pool, or have had no result for too long"""
+        while not self._closing.is_set():
+            self._closing.wait(WATCH_INTERVAL)
+            with self._watched_lock:
+                watched = self._watched
+                self._watched = []
+            still_watched = []
+            for request_id, result, submit_time, complete_once in watched:
+                elapsed = time.time() - submit_time
+                if result.ready():
+                    # successful results were already passed to the callback
+                    if not result.successful():
+                        try:
+                            result.get(0)
+                        except Exception as e:
+                            response = error_response(request_id, type(e).__name__, str(e), traceback.format_exc())
+                            response["seconds"] = elapsed
+                            complete_once(response)
+                elif elapsed > self.request_timeout:
+                    self._abandoned += 1
+                    response = error_response(request_id, "Timeout",
+                                              "no result after %.0fs; the worker converting it may have died" % elapsed)
+                    response["seconds"] = elapsed
+                    complete_once(response)
+                else:
+                    still_watched.append((request_id, result, submit_time, complete_once))
+            with self._watched_lock:
+                self._watched.extend(still_watched)
+
+    def serve_stream(self, input_handle, output_handle):
+        """Handle the requests arriving on one stream until it ends, waiting for all their responses to be sent"""
+        write_lock = threading.Lock()
+        outstanding = [0]
+        done = threading.Condition()
+
+        def send(response):
+            line = json.dumps(response) + "\n"
+            with write_lock:
+                try:
+                    output_handle.write(line)
+                    output_handle.flush()
+                except (IOError, OSError):
+                    # the client went away; nothing to send the response to
+                    pass
+
+        def completed(response):
+            self.metrics.finished(response["ok"], response["seconds"])
+            self._slots.release()
+            send(response)
+            with done:
+                outstanding[0] -= 1
+                done.notify_all()
+
+        for line in iter(input_handle.readline, ""):
+            if line.strip() == "":
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                send(error_response(None, "BadRequest", str(e)))
+                continue
+
+            if request.get("command") == "stats":
+                send({"id": request.get("id"), "ok": True, "stats": self.metrics.snapshot()})
+                continue
+            if "command" in request:
+                send(error_response(request.get("id"), "BadRequest", "unknown command %r" % request["command"]))
+                continue
+            if "xml" not in request and "input" not in request:
+                send(error_response(request.get("id"), "BadRequest", "request needs an 'input' path or inline 'xml'"))
+                continue
+
+            self._slots.acquire()
+            self.metrics.started()
+            with done:
+                outstanding[0] += 1
+            self.submit(request, completed)
+
+        with done:
+            while outstanding[0] > 0:
+                done.wait()
+
+
+class _ConnectionHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        self.server.service.serve_stream(self.rfile, self.wfile)
+
+
+class UnixConversionServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        """:type service: ConversionService"""
+        self.service = service
+        SocketServer.UnixStreamServer.__init__(self, socket_path, _ConnectionHandler)
+
+
+def serve_unix_socket(socket_path, processes=None, max_pending=DEFAULT_MAX_PENDING,
+                      request_timeout=DEFAULT_REQUEST_TIMEOUT, log=sys.stderr):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    service = ConversionService(processes, max_pending, request_timeout)
+    server = UnixConversionServer(socket_path, service)
+    print >> log, "Serving conversions on %s with %d worker(s)" % (socket_path, service.metrics.processes)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+        service.close()
+
+
+def serve_stdio(processes=None, max_pending=DEFAULT_MAX_PENDING, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+    service = ConversionService(processes, max_pending, request_timeout)
+    output_handle = sys.stdout
+    # keep anything else printed in this process out of the protocol stream
+    sys.stdout = sys.stderr
+    try:
+        service.serve_stream(sys.stdin, output_handle)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,127 @@
+import contextlib
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # not available before Python 3.4; fall back to the process's peak resident set size
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def _start_memory_tracking():
+    if tracemalloc is not None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+
+def _peak_memory():
+    """:rtype: int or None"""
+    if tracemalloc is not None:
+        return tracemalloc.get_traced_memory()[1]
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes everywhere except macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def memory_source():
+    if tracemalloc is not None:
+        return "tracemalloc"
+    if resource is not None:
+        return "ru_maxrss"
+    return None
+
+
+class ConversionStats(object):
+    """
+    Timings and counts for the phases of a conversion.
+
+    The phases are "parse" (reading XML into elements), "walk" (turning objects into struct lines), "code_gen" (turning
+    struct lines into golang source) and "write"; "lookup_tag_text" is the part of "walk" spent in LookupTagText
+    lookups.  Parsing is interleaved with walking one form at a time, so a phase's time is the total of all the
+    stretches spent in it.  With track_memory, the peak memory seen by the end of each phase is recorded too; under
+    Python 2 that is the peak size of the whole process rather than just what the phase allocated.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.phase_seconds = {}
+        self.phase_order = []
+        self.phase_peak_memory = {}
+        self.objects_by_base = {}
+        self.counters = {}
+
+    def add_phase_time(self, name, seconds):
+        if name not in self.phase_seconds:
+            self.phase_seconds[name] = 0.0
+            self.phase_order.append(name)
+        self.phase_seconds[name] += seconds
+
+    def _record_peak_memory(self, name):
+        peak = _peak_memory()
+        if peak is not None:
+            self.phase_peak_memory[name] = max(self.phase_peak_memory.get(name, 0), peak)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.track_memory:
+            _start_memory_tracking()
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, time.time() - start_time)
+            if self.track_memory:
+                self._record_peak_memory(name)
+
+    def timed_iter(self, name, iterable):
+        """Iterate, counting the time spent getting each item toward the given phase"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_object(self, base):
+        self.objects_by_base[base] = self.objects_by_base.get(base, 0) + 1
+
+    def as_dict(self):
+        out = {"phases": [{"name": name, "seconds": self.phase_seconds[name]} for name in self.phase_order],
+               "objects_by_base": dict(self.objects_by_base),
+               "counters": dict(self.counters),
+               }
+        if self.track_memory:
+            out["memory_source"] = memory_source()
+            for phase in out["phases"]:
+                phase["peak_memory_bytes"] = self.phase_peak_memory.get(phase["name"])
+        return out
+
+
+def format_stats_text(stats_dict):
+    """Render the output of ConversionStats.as_dict for people to read"""
+    lines = []
+    for phase in stats_dict["phases"]:
+        line = "  %-24s %8.4fs" % (phase["name"], phase["seconds"])
+        if phase.get("peak_memory_bytes") is not None:
+            line += "  peak %.1f MB" % (phase["peak_memory_bytes"] / (1024.0 * 1024.0))
+        lines.append(line)
+    for name, value in sorted(stats_dict["counters"].items()):
+        lines.append("  %-24s %8d" % (name, value))
+    for base, value in sorted(stats_dict["objects_by_base"].items()):
+        lines.append("  objects %-16s %8d" % (base, value))
+    return "\n".join(lines)
@@ -0,0 +1,100 @@
+"""
+Make style dependency files, as also read by Ninja, for generated golang files.  Each lists everything its output was
+generated from: the input, the image files embedded with the embed_bitmaps option and the converter's own source, so
+that a build tool only needs to run the converter again once one of them changes.
+
+An output whose contents come out the same is left alone, modification time and all, so that whatever is built from it
+isn't rebuilt.  Ninja rules should set restat = 1, so Ninja checks for this rather than assuming the output changed.
+Make has no such check, and would keep running the converter for a dependency that is newer than an output left alone,
+so only then is the output's modification time brought up to date (see touch_if_stale).
+"""
+import os
+
+from bitmap_resources import collect_bitmap_paths
+from conversion_cache import converter_source_filenames, module_source_filename
+from output_files import write_if_changed
+
+# modules that generate the files written alongside the output, on top of those of
+# conversion_cache.converter_source_filenames
+SUPPORT_FILE_MODULES = ["startup_timing", "split_output"]
+
+
+def depfile_filename_for(output_filename):
+    return "%s.d" % output_filename
+
+
+def make_path(path):
+    """A path escaped for a Make rule"""
+    if os.sep == "\\":
+        path = path.replace("\\", "/")
+    return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def converter_sources():
+    """
+    The source files of the converter modules that determine what it generates
+    :rtype: list of str
+    """
+    return [os.path.abspath(filename) for filename in converter_source_filenames() +
+            [module_source_filename(module_name) for module_name in SUPPORT_FILE_MODULES]]
+
+
+def dependencies(input_filename, embed_bitmaps=False):
+    """
+    Everything the output for an input is generated from
+    :param input_filename: the .wxg file, or a file saved with wxg_golang_converter.parse_source and GenFile.to_bytes
+    :param embed_bitmaps: include the image files referenced by the .wxg, as for wxg_golang_converter.convert
+    :rtype: list of str
+    """
+    paths = [input_filename]
+    if embed_bitmaps:
+        input_directory = os.path.dirname(input_filename)
+        with open(input_filename, "rb") as input_handle:
+            paths.extend(os.path.normpath(os.path.join(input_directory, bitmap))
+                         for bitmap in collect_bitmap_paths(input_handle))
+    paths.extend(converter_sources())
+    return paths
+
+
+def depfile_source(target, paths):
+    lines = ["%s:" % make_path(target)]
+    lines.extend(" %s" % make_path(path) for path in paths)
+    return " \\\n".join(lines) + "\n"
+
+
+def touch_if_stale(target, paths):
+    """
+    Bring the modification time of an output up to date if any of the files it depends on is newer, leaving it alone
+    otherwise
+    :return: whether it was touched
+    :rtype: bool
+    """
+    try:
+        target_mtime = os.stat(target).st_mtime
+    except OSError:
+        return False
+    for path in paths:
+        try:
+            if os.stat(path).st_mtime > target_mtime:
+                os.utime(target, None)
+                return True
+        except OSError:
+            # a missing dependency is for the build tool to report
+            continue
+    return False
+
+
+def write_depfile(depfile_filename, target, input_filename, embed_bitmaps=False):
+    """
+    Write the dependency file for an output, leaving it alone if it is up to date, and touch the output if it is older
+    than any of its dependencies (see touch_if_stale)
+    :param target: the output, as the build tool names it
+    :return: whether the file was written
+    :rtype: bool
+    """
+    paths = dependencies(input_filename, embed_bitmaps)
+    source = depfile_source(target, paths)
+    if isinstance(source, unicode):
+        source = source.encode("utf-8")
+    touch_if_stale(target, paths)
+    return write_if_changed(depfile_filename, source)
@@ -0,0 +1,59 @@
+import json
+
+from output_files import read_existing, write_if_changed
+
+MANIFEST_FORMAT = 1
+
+
+class FrameFragment(object):
+    """The golang code generated for one top level object of a .wxg file"""
+    __slots__ = ("fingerprint", "struct_name", "code", "regenerated")
+
+    def __init__(self, fingerprint, struct_name, code, regenerated):
+        """
+        :param fingerprint: hash of the object's XML and the converter that generated the code
+        :param struct_name: name of the generated struct, or None if the object doesn't generate one
+        :param regenerated: whether the code was generated in this run rather than reused from the manifest
+        """
+        self.fingerprint = fingerprint
+        self.struct_name = struct_name
+        self.code = code
+        self.regenerated = regenerated
+
+
+def manifest_filename_for(output_filename):
+    """The sidecar manifest kept alongside a generated golang file"""
+    return output_filename + ".frames.json"
+
+
+def load_manifest(filename):
+    """
+    The fragments saved by the last incremental conversion, keyed by fingerprint; empty if there is no usable manifest
+    :rtype: dict[str, FrameFragment]
+    """
+    data = read_existing(filename)
+    if data is None:
+        return {}
+    try:
+        manifest = json.loads(data)
+    except ValueError:
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return {}
+    fragments = {}
+    for frame in manifest["frames"]:
+        fragments[frame["fingerprint"]] = FrameFragment(frame["fingerprint"], frame["name"], frame["code"], False)
+    return fragments
+
+
+def save_manifest(filename, fragments):
+    """
+    :type fragments: list of FrameFragment
+    :return: True if the manifest file was written
+    :rtype: bool
+    """
+    manifest = {"format": MANIFEST_FORMAT,
+                "frames": [{"fingerprint": fragment.fingerprint, "name": fragment.struct_name, "code": fragment.code}
+                           for fragment in fragments],
+                }
+    return write_if_changed(filename, json.dumps(manifest, indent=1, sort_keys=True) + "\n")
@@ -0,0 +1,65 @@
+"""
+The options that change the code generated for a .wxg document, kept together in one record that is handed through
+the converter as a whole.  The cache and incremental manifest keys are made from its canonical serialization (see
+GenerationOptions.key), so every option is part of them without having to be listed there.
+"""
+import json
+
+
+class GenerationOptions(object):
+    """
+    The code generation options, each defaulting to generating the standard code.  Those read while walking the
+    objects are used by wxg_golang_converter.convert_form, and the rest by codegen.GenFile.emit_struct.
+    """
+    __slots__ = ("optimize_sizers", "lazy_notebook_pages", "fast_construction", "table_event_dispatch",
+                 "max_function_statements", "startup_timing", "embed_bitmaps")
+
+    def __init__(self, optimize_sizers=False, lazy_notebook_pages=False, fast_construction=False,
+                 table_event_dispatch=False, max_function_statements=None, startup_timing=False, embed_bitmaps=False):
+        """
+        :param optimize_sizers: remove each form's redundant sizers and merge its adjacent spacers (see
+        sizer_optimizer)
+        :param lazy_notebook_pages: build the contents of notebook pages when they're first selected; see
+        codegen.LazyNotebookPages
+        :param fast_construction: generate methods with pointer receivers, so the struct isn't copied for each call,
+        and keep each frame frozen while it is built, laying it out just once at the end
+        :param table_event_dispatch: bind each type of event once for a range of window IDs reserved with
+        wx.WindowNewControlId, and look up the handler in a table; see codegen.EventDispatchTable
+        :param max_function_statements: the most widget constructions, bindings, layout calls or property calls to put
+        in the init function, do_layout or set_properties; any more and they are moved out in order to helper methods
+        holding up to this many each, so no one function is slow to compile.  None for no limit
+        :type max_function_statements: int or None
+        :param startup_timing: time each object's construction, and the set_properties and do_layout calls, with the
+        functions from startup_timing.support_sources, which only record anything when built with the wxgtiming tag
+        :param embed_bitmaps: set the images of bitmap widgets that show an image file to the embedded copy of the file
+        (see bitmap_resources)
+        """
+        self.optimize_sizers = optimize_sizers
+        self.lazy_notebook_pages = lazy_notebook_pages
+        self.fast_construction = fast_construction
+        self.table_event_dispatch = table_event_dispatch
+        self.max_function_statements = max_function_statements
+        self.startup_timing = startup_timing
+        self.embed_bitmaps = embed_bitmaps
+
+    def as_dict(self):
+        """:rtype: dict[str, object]"""
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def key(self):
+        """
+        The options serialized the same way whenever they have the same values, for keying generated code by
+        :rtype: str
+        """
+        return json.dumps(sorted(self.as_dict().items()))
+
+    def __getstate__(self):
+        # __slots__ classes need these to be pickled, e.g. to hand the options to a pool of processes
+        return self.as_dict()
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return "GenerationOptions(%s)" % ", ".join("%s=%r" % (name, getattr(self, name)) for name in self.__slots__)
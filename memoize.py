@@ -0,0 +1,31 @@
+import functools
+
+
+def memoize(maxsize=4096):
+    """
+    Cache the results of a pure single argument function, keeping at most maxsize of them.  Uses
+    functools.lru_cache where it exists; otherwise the cache is simply emptied when it fills up.
+    """
+    lru_cache = getattr(functools, "lru_cache", None)
+    if lru_cache is not None:
+        return lru_cache(maxsize)
+
+    def decorator(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def wrapper(arg):
+            try:
+                return cache[arg]
+            except KeyError:
+                pass
+            result = func(arg)
+            if len(cache) >= maxsize:
+                cache.clear()
+            cache[arg] = result
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
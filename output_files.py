@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+
+def read_existing(filename):
+    """The current contents of a file, or None if it doesn't exist"""
+    try:
+        with open(filename, "rb") as handle:
+            return handle.read()
+    except IOError:
+        return None
+
+
+def new_file_mode(filename):
+    """The permissions to give a replacement for filename: those of the existing file, else the umask default"""
+    try:
+        return os.stat(filename).st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def replace_file(filename, data):
+    """Write a file atomically, by writing a temporary file alongside it and renaming that into place"""
+    directory = os.path.dirname(filename)
+    mode = new_file_mode(filename)
+    fd, temp_filename = tempfile.mkstemp(dir=directory if directory != "" else ".",
+                                         prefix=".%s." % os.path.basename(filename), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp_filename, mode)
+        if os.name == "nt" and os.path.exists(filename):
+            # rename won't replace an existing file on Windows
+            os.remove(filename)
+        os.rename(temp_filename, filename)
+    except:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+def write_if_changed(filename, data):
+    """
+    Write a file only if its contents would change, leaving its modification time alone otherwise
+    :type data: str
+    :return: True if the file was written
+    :rtype: bool
+    """
+    if read_existing(filename) == data:
+        return False
+    replace_file(filename, data)
+    return True
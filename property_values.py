@@ -0,0 +1,60 @@
+"""
+Converters from wxg property values to golang expressions, shared by the converter and the widget definitions (see
+widget_registry)
+"""
+import functools
+
+from memoize import memoize
+from xml_helpers import element_text, element_index, get_path_lookup_table
+
+
+@memoize()
+def const_convert(s):
+    """Convert a wxg const value to the golang expression for the relevant constant"""
+    if s.startswith("wx") and s[2:].isupper():
+        return "wx.%s" % s[2:]
+    else:
+        assert False, "can't convert const %r" % s
+
+
+def compose(*functions):
+    # https://mathieularose.com/function-composition-in-python/
+    return functools.reduce(lambda f, g: lambda x: f(g(x)), functions, lambda x: x)
+
+
+@memoize()
+def make_size_expr(size_str):
+    values = [int(x.strip()) for x in size_str.split(",")]
+    size_expr = "wx.NewSize(%d, %d)" % tuple(values)
+    return size_expr
+
+
+def golang_bool_repr(x):
+    if x:
+        return "true"
+    else:
+        return "false"
+
+
+class LookupTagText(object):
+    """ A value converter that looks up values in a lookup table somewhere in the DOM """
+    stats_phase = "lookup_tag_text"
+
+    def __init__(self, subobject_property_name, tag_path, attr_name, converter):
+        self.subobject_property_name = subobject_property_name
+        self.tag_path = tag_path
+        self.attr_name = attr_name
+        self.converter = converter
+
+    def __call__(self, dom_obj):
+        """:type dom_obj: wxg_parser.WxgElement"""
+        index = element_index(dom_obj)
+        if self.subobject_property_name.startswith("@"):
+            match_value = index.attribute(self.subobject_property_name[1:])
+        else:
+            match_value = index.child_text(self.subobject_property_name)
+
+        child_element = get_path_lookup_table(dom_obj, self.tag_path, self.attr_name).get(match_value)
+        if child_element is None:
+            return None
+        return self.converter(element_text(child_element))
@@ -0,0 +1,169 @@
+"""
+An optional pass over a generated struct that removes box sizers which make no difference to the layout, and merges
+adjacent spacers, so the generated code creates fewer objects.  Only rewrites that give exactly the same layout are
+made:
+
+- a sizer whose only item fills it (proportion of 1 or more, wx.EXPAND, no border) is replaced by that item, which
+  takes over the sizer's own place and parameters in its parent.  Where the sizer is set on a window with SetSizer,
+  the item must be a sizer too.
+- a sizer added to a sizer of the same orientation with proportion 0, wx.EXPAND and no border, and holding only items
+  of proportion 0, has its items moved into its parent in its place.
+- adjacent AddSpacer calls on the same sizer become one AddSpacer of the total size, and likewise adjacent
+  AddStretchSpacer calls become one with the total proportion.
+
+Sizers that anything else refers to (properties, event bindings, or as the parent of a window) are left alone.
+"""
+
+# constructors of the sizers the passes apply to; they all take the orientation as their only parameter
+BOX_SIZER_CONSTRUCTORS = ("wx.NewBoxSizer",)
+
+
+class SizerOptimizationResult(object):
+    __slots__ = ("sizers_removed", "spacers_merged")
+
+    def __init__(self, sizers_removed=0, spacers_merged=0):
+        self.sizers_removed = sizers_removed
+        self.spacers_merged = spacers_merged
+
+    @property
+    def objects_removed(self):
+        return self.sizers_removed + self.spacers_merged
+
+
+def optimize_sizers(struct):
+    """
+    Rewrite a struct's layout in place
+    :type struct: codegen.GenStruct
+    :rtype: SizerOptimizationResult
+    """
+    result = SizerOptimizationResult()
+    result.sizers_removed = _collapse_sizers(struct)
+    result.spacers_merged = _merge_spacers(struct)
+    return result
+
+
+def _fills_parent(line):
+    """:type line: codegen.LayoutLine"""
+    return line.proportion >= 1 and line.flag == "wx.EXPAND" and line.border == 0
+
+
+def _collapse_sizers(struct):
+    """Remove the sizers that can be; returns how many were"""
+    # in the order they are created, so the result doesn't depend on dict ordering
+    box_sizer_lines = [init_line for init_line in struct.init_lines if init_line.constructor in BOX_SIZER_CONSTRUCTORS]
+    box_sizers = dict((init_line.member_name, init_line) for init_line in box_sizer_lines)
+
+    referenced = set()
+    for init_line in struct.init_lines:
+        referenced.add(init_line.parent_object_name)
+    for property_line in struct.properties_lines:
+        referenced.add(property_line.field_name)
+    for binding in struct.bindings:
+        referenced.add(binding.field_to_bind)
+
+    # the line adding each object to its parent, and each parent's items in order; kept up to date as sizers are
+    # removed, with the layout lines only rebuilt at the end, so a long chain of sizers doesn't take quadratic time
+    placements = {}
+    items = {}
+    for line in struct.layout_lines:
+        if line.obj_in_struct:
+            placements[line.cur_field_name] = line
+        items.setdefault(line.parent_field_name, []).append(line)
+    removed_members = set()
+    removed_lines = set()
+    # id of a placement line -> the items that take its place
+    expansions = {}
+
+    changed = True
+    while changed:
+        # each removal can make another possible, e.g. of a sizer's parent once it holds a single item
+        changed = False
+        for init_line in box_sizer_lines:
+            sizer_name = init_line.member_name
+            if sizer_name in removed_members or sizer_name in referenced:
+                continue
+            placement = placements.get(sizer_name)
+            is_window_sizer = sizer_name == struct.sizer_field_name
+            if placement is None and not is_window_sizer:
+                continue
+            sizer_items = items.get(sizer_name, [])
+
+            if len(sizer_items) == 1:
+                only_item = sizer_items[0]
+                if only_item.obj_in_struct and only_item.method == "Add" and only_item.proportion is not None and \
+                        _fills_parent(only_item):
+                    set_on_window = is_window_sizer or placement.method != "Add"
+                    if not set_on_window or only_item.cur_field_name in box_sizers:
+                        if is_window_sizer:
+                            struct.sizer_field_name = only_item.cur_field_name
+                        if placement is not None:
+                            placement.cur_field_name = only_item.cur_field_name
+                            placements[only_item.cur_field_name] = placement
+                        removed_lines.add(id(only_item))
+                        del items[sizer_name]
+                        removed_members.add(sizer_name)
+                        changed = True
+                        continue
+
+            if placement is not None and placement.method == "Add" and placement.proportion == 0 and \
+                    placement.flag == "wx.EXPAND" and placement.border == 0 and len(sizer_items) > 0:
+                parent_name = placement.parent_field_name
+                parent_init_line = box_sizers.get(parent_name)
+                same_orientation = parent_init_line is not None and \
+                    parent_init_line.additional_params_expressions == init_line.additional_params_expressions
+                if same_orientation and all(item.proportion == 0 for item in sizer_items):
+                    for item in sizer_items:
+                        item.parent_field_name = parent_name
+                    parent_items = items[parent_name]
+                    position = parent_items.index(placement)
+                    parent_items[position:position + 1] = sizer_items
+                    expansions[id(placement)] = sizer_items
+                    del items[sizer_name]
+                    removed_members.add(sizer_name)
+                    changed = True
+
+    if len(removed_members) == 0:
+        return 0
+
+    moved = set()
+    for expanded_items in expansions.itervalues():
+        moved.update(id(item) for item in expanded_items)
+    layout_lines = []
+    for line in struct.layout_lines:
+        if id(line) in moved:
+            # added where the sizer it was moved out of was
+            continue
+        pending = [line]
+        while len(pending) > 0:
+            line = pending.pop()
+            if id(line) in removed_lines:
+                continue
+            if id(line) in expansions:
+                pending.extend(reversed(expansions[id(line)]))
+            else:
+                layout_lines.append(line)
+    struct.layout_lines = layout_lines
+    struct.members = [member for member in struct.members if member.name not in removed_members]
+    struct.init_lines = [init_line for init_line in struct.init_lines if init_line.member_name not in removed_members]
+    return len(removed_members)
+
+
+def _merge_spacers(struct):
+    """Merge adjacent spacers on the same sizer; returns the number of spacers merged away"""
+    merged = 0
+    last_item = {}
+    layout_lines = []
+    for line in struct.layout_lines:
+        previous = last_item.get(line.parent_field_name)
+        if previous is not None and not line.obj_in_struct and not previous.obj_in_struct and \
+                line.method == previous.method and line.method in ("AddSpacer", "AddStretchSpacer"):
+            total = int(previous.cur_field_name) + int(line.cur_field_name)
+            previous.cur_field_name = "%d" % total
+            if line.method == "AddStretchSpacer":
+                previous.proportion = total
+            merged += 1
+            continue
+        last_item[line.parent_field_name] = line
+        layout_lines.append(line)
+    struct.layout_lines = layout_lines
+    return merged
@@ -0,0 +1,206 @@
+import StringIO
+import multiprocessing
+import os
+import time
+
+import wxg_golang_converter
+from bitmap_resources import SPLIT_RESOURCE_FILENAME, write_resource_files as write_bitmap_resource_files
+from codegen import GenFile
+from conversion_stats import ConversionStats
+from depfiles import write_depfile
+from frame_manifest import load_manifest, save_manifest
+from generation_options import GenerationOptions
+from output_files import write_if_changed
+from startup_timing import write_support_files as write_timing_support_files
+
+# every file written in split mode ends with this, which keeps it clear of Go's _test and _GOOS/_GOARCH file suffixes
+SPLIT_FILE_SUFFIX = "_wxg.go"
+# the incremental manifest (see frame_manifest) kept in a split output directory
+SPLIT_MANIFEST_FILENAME = ".wxg_frames.json"
+
+
+def frame_output_filename(struct_name):
+    return "%s%s" % (struct_name.lower(), SPLIT_FILE_SUFFIX)
+
+
+def is_generated_frame_file(filename):
+    """Whether a file looks like one written in split mode, so it is safe to remove once its frame is gone"""
+    if not filename.endswith(SPLIT_FILE_SUFFIX):
+        return False
+    try:
+        with open(filename, "rb") as handle:
+            head = handle.read(4096)
+    except IOError:
+        return False
+    return "\n// Generated by wxg_to_golang" in head
+
+
+def emit_frame_file(gen_file, output_filename, package_name, wxgo_package_name, options=None):
+    """
+    Generate and write the file for a single frame
+    :type gen_file: GenFile
+    :type options: generation_options.GenerationOptions or None
+    :return: whether the file was written, and the seconds spent generating it
+    :rtype: (bool, float)
+    """
+    start_time = time.time()
+    output_handle = StringIO.StringIO()
+    gen_file.code_gen(output_handle, package_name, wxgo_package_name=wxgo_package_name, options=options)
+    generated = output_handle.getvalue()
+    if isinstance(generated, unicode):
+        generated = generated.encode("utf-8")
+    code_gen_seconds = time.time() - start_time
+    return write_if_changed(output_filename, generated), code_gen_seconds
+
+
+def _emit_serialized_frame_file(args):
+    """Pool worker for emit_frame_file, taking the frame's structs serialized with GenFile.to_bytes"""
+    ir_data, output_filename, package_name, wxgo_package_name, options = args
+    return emit_frame_file(GenFile.from_bytes(ir_data), output_filename, package_name, wxgo_package_name, options)
+
+
+def convert_split(input_filename, output_directory, package_name, wxgo_package_name, wx_object_classes_map=None,
+                  reproducible=False, processes=None, stats=None, stats_hook=None, incremental=False,
+                  frames_hook=None, options=None, depfile=None):
+    """
+    Convert a .wxg file to a golang source file per top level frame in output_directory, each with the same package
+    clause, generation comments and imports.  Parsing is done here; the frames' files are generated and written in
+    parallel by a pool of processes, which are handed the frames in their serialized form.  Files left over from
+    frames that are no longer in the .wxg are removed.
+    :param processes: number of processes to generate files with; defaults to the number of CPUs, and no pool is
+    started for a single process or frame
+    :type stats: conversion_stats.ConversionStats or None
+    :param incremental: as for wxg_golang_converter.convert, with the manifest kept in output_directory.  Frames are
+    then generated here, since only the changed ones need generating at all
+    :param frames_hook: as for wxg_golang_converter.convert
+    :param options: the options to generate the code with.  With startup_timing, the timing support files (see
+    startup_timing.write_support_files) are also written to output_directory, and with embed_bitmaps, the images of
+    all the frames are written to one resource file with the bitmap runtime file in output_directory (see
+    bitmap_resources.write_resource_files)
+    :type options: generation_options.GenerationOptions or None
+    :param depfile: filename to write a Make dependency file for output_directory to (see depfiles.write_depfile), if
+    any
+    :return: (output filename, whether it was written) for each frame, in the order of the frames in the .wxg
+    :rtype: list of (str, bool)
+    """
+    if stats is None:
+        stats = ConversionStats()
+    if options is None:
+        options = GenerationOptions()
+
+    if not os.path.isdir(output_directory):
+        os.makedirs(output_directory)
+    if options.startup_timing:
+        write_timing_support_files(output_directory, package_name)
+    # the input label is relative to files in output_directory, as for a single output file there
+    input_label = wxg_golang_converter.input_label_for(input_filename, os.path.join(output_directory, "x.go"),
+                                                       reproducible)
+    if incremental:
+        results = _convert_split_incremental(input_filename, output_directory, input_label, package_name,
+                                             wxgo_package_name, wx_object_classes_map, reproducible, stats, frames_hook,
+                                             options)
+        if options.embed_bitmaps:
+            _write_bitmap_resources(input_filename, output_directory, package_name, wxgo_package_name, input_label,
+                                    stats)
+        _remove_stale_frame_files(output_directory, set(output_filename for output_filename, written in results), stats)
+        if depfile is not None:
+            _write_split_depfile(depfile, input_filename, output_directory, stats, options.embed_bitmaps)
+        if stats_hook is not None:
+            stats_hook(stats)
+        return results
+
+    with open(input_filename, "rb") as input_handle:
+        out = wxg_golang_converter.parse_source(input_handle, input_label, reproducible, wx_object_classes_map, stats,
+                                                options)
+
+    frames = []
+    output_filenames = set()
+    for frame_file in out.split():
+        output_filename = os.path.join(output_directory, frame_output_filename(frame_file.structs[0].name))
+        assert output_filename not in output_filenames, \
+            "frames %r and another give the same output file %s" % (frame_file.structs[0].name, output_filename)
+        output_filenames.add(output_filename)
+        frames.append((frame_file, output_filename))
+    stats.count("frames", len(frames))
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    with stats.phase("emit"):
+        if processes <= 1 or len(frames) <= 1:
+            emitted = [emit_frame_file(frame_file, output_filename, package_name, wxgo_package_name, options)
+                       for frame_file, output_filename in frames]
+        else:
+            jobs = [(frame_file.to_bytes(), output_filename, package_name, wxgo_package_name, options)
+                    for frame_file, output_filename in frames]
+            pool = multiprocessing.Pool(min(processes, len(jobs)))
+            try:
+                emitted = pool.map(_emit_serialized_frame_file, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+    results = []
+    for (frame_file, output_filename), (written, code_gen_seconds) in zip(frames, emitted):
+        stats.add_phase_time("code_gen", code_gen_seconds)
+        stats.count("files_written" if written else "files_unchanged")
+        results.append((output_filename, written))
+
+    if options.embed_bitmaps:
+        _write_bitmap_resources(input_filename, output_directory, package_name, wxgo_package_name, input_label, stats)
+    _remove_stale_frame_files(output_directory, output_filenames, stats)
+    if depfile is not None:
+        _write_split_depfile(depfile, input_filename, output_directory, stats, options.embed_bitmaps)
+
+    if stats_hook is not None:
+        stats_hook(stats)
+    return results
+
+
+def _convert_split_incremental(input_filename, output_directory, input_label, package_name, wxgo_package_name,
+                               wx_object_classes_map, reproducible, stats, frames_hook, options):
+    manifest_filename = os.path.join(output_directory, SPLIT_MANIFEST_FILENAME)
+    with stats.phase("manifest"):
+        previous_fragments = load_manifest(manifest_filename)
+    with open(input_filename, "rb") as input_handle:
+        fragments = wxg_golang_converter.generate_fragments(input_handle, wx_object_classes_map, previous_fragments,
+                                                            stats, options)
+    comments = wxg_golang_converter.generation_comments(input_label, reproducible)
+
+    results = []
+    output_filenames = set()
+    with stats.phase("emit"):
+        for fragment in fragments:
+            if fragment.struct_name is None:
+                continue
+            output_filename = os.path.join(output_directory, frame_output_filename(fragment.struct_name))
+            assert output_filename not in output_filenames, \
+                "frames %r and another give the same output file %s" % (fragment.struct_name, output_filename)
+            output_filenames.add(output_filename)
+            generated = wxg_golang_converter.assemble_fragments([fragment], comments, package_name, wxgo_package_name)
+            written = write_if_changed(output_filename, generated)
+            stats.count("files_written" if written else "files_unchanged")
+            results.append((output_filename, written))
+    with stats.phase("manifest"):
+        save_manifest(manifest_filename, fragments)
+    if frames_hook is not None:
+        frames_hook(fragments)
+    return results
+
+
+def _write_bitmap_resources(input_filename, output_directory, package_name, wxgo_package_name, input_label, stats):
+    with stats.phase("bitmaps"):
+        write_bitmap_resource_files(input_filename, os.path.join(output_directory, SPLIT_RESOURCE_FILENAME),
+                                    package_name, wxgo_package_name, input_label, stats)
+
+
+def _write_split_depfile(depfile, input_filename, output_directory, stats, embed_bitmaps):
+    with stats.phase("depfile"):
+        write_depfile(depfile, output_directory, input_filename, embed_bitmaps)
+
+
+def _remove_stale_frame_files(output_directory, output_filenames, stats):
+    for filename in os.listdir(output_directory):
+        path = os.path.join(output_directory, filename)
+        if path not in output_filenames and is_generated_frame_file(path):
+            os.remove(path)
+            stats.count("files_removed")
@@ -0,0 +1,165 @@
+"""
+Go support code for the startup timing calls generated with the startup_timing option (see
+generation_options.GenerationOptions).  It comes as a pair of files for the package the generated code is in, and the
+wxgtiming build tag picks between them: with the tag, each timed step is recorded in a table the application can dump
+with WxgDumpTimings; without it, the timing functions do nothing and are inlined away, so normal builds pay nothing
+for the calls.
+"""
+import os
+
+from output_files import write_if_changed
+
+TIMING_BUILD_TAG = "wxgtiming"
+
+# named so they're never mistaken for a frame's file in split mode (see split_output.is_generated_frame_file)
+ENABLED_FILENAME = "wxg_timing_enabled.go"
+DISABLED_FILENAME = "wxg_timing_disabled.go"
+
+_ENABLED_SOURCE = """//go:build %(tag)s
+// +build %(tag)s
+
+package %(package_name)s
+
+// Generated by wxg_to_golang: startup timing for the generated frames, recorded in builds with the %(tag)s tag
+
+import (
+\t"fmt"
+\t"io"
+\t"sync"
+\t"time"
+)
+
+// WxgTiming is one timed step of building a generated frame: the construction of an object (phase "construct"), or
+// a set_properties, do_layout or layout call
+type WxgTiming struct {
+\tStruct   string
+\tPhase    string
+\tMember   string
+\tBase     string
+\tDuration time.Duration
+}
+
+type wxgTimingMark time.Time
+
+var (
+\twxgTimingsLock sync.Mutex
+\twxgTimings     []WxgTiming
+)
+
+func wxgTimingStart() wxgTimingMark {
+\treturn wxgTimingMark(time.Now())
+}
+
+func wxgTimingEnd(start wxgTimingMark, structName, phase, member, base string) {
+\tduration := time.Since(time.Time(start))
+\twxgTimingsLock.Lock()
+\twxgTimings = append(wxgTimings, WxgTiming{structName, phase, member, base, duration})
+\twxgTimingsLock.Unlock()
+}
+
+// WxgTimings returns the steps timed so far, in the order they finished
+func WxgTimings() []WxgTiming {
+\twxgTimingsLock.Lock()
+\tdefer wxgTimingsLock.Unlock()
+\treturn append([]WxgTiming(nil), wxgTimings...)
+}
+
+// WxgResetTimings forgets the steps timed so far
+func WxgResetTimings() {
+\twxgTimingsLock.Lock()
+\twxgTimings = nil
+\twxgTimingsLock.Unlock()
+}
+
+// WxgDumpTimings writes the steps timed so far as a tab separated table, with the total time of each phase of each
+// struct after them
+func WxgDumpTimings(w io.Writer) {
+\ttimings := WxgTimings()
+\tfmt.Fprintf(w, "struct\\tphase\\tmember\\tbase\\tmicroseconds\\n")
+\ttype phaseKey struct{ structName, phase string }
+\tvar phases []phaseKey
+\ttotals := map[phaseKey]time.Duration{}
+\tfor _, timing := range timings {
+\t\tfmt.Fprintf(w, "%%s\\t%%s\\t%%s\\t%%s\\t%%.1f\\n", timing.Struct, timing.Phase, timing.Member, timing.Base,
+\t\t\tfloat64(timing.Duration)/float64(time.Microsecond))
+\t\tkey := phaseKey{timing.Struct, timing.Phase}
+\t\tif _, seen := totals[key]; !seen {
+\t\t\tphases = append(phases, key)
+\t\t}
+\t\ttotals[key] += timing.Duration
+\t}
+\tfor _, key := range phases {
+\t\tfmt.Fprintf(w, "%%s\\t%%s\\t\\t(total)\\t%%.1f\\n", key.structName, key.phase,
+\t\t\tfloat64(totals[key])/float64(time.Microsecond))
+\t}
+}
+"""
+
+_DISABLED_SOURCE = """//go:build !%(tag)s
+// +build !%(tag)s
+
+package %(package_name)s
+
+// Generated by wxg_to_golang: does-nothing startup timing for the generated frames, for builds without the %(tag)s
+// tag
+
+import (
+\t"io"
+\t"time"
+)
+
+// WxgTiming is one timed step of building a generated frame; none are recorded without the %(tag)s build tag
+type WxgTiming struct {
+\tStruct   string
+\tPhase    string
+\tMember   string
+\tBase     string
+\tDuration time.Duration
+}
+
+type wxgTimingMark struct{}
+
+func wxgTimingStart() wxgTimingMark {
+\treturn wxgTimingMark{}
+}
+
+func wxgTimingEnd(start wxgTimingMark, structName, phase, member, base string) {
+}
+
+// WxgTimings returns nothing without the %(tag)s build tag
+func WxgTimings() []WxgTiming {
+\treturn nil
+}
+
+// WxgResetTimings does nothing without the %(tag)s build tag
+func WxgResetTimings() {
+}
+
+// WxgDumpTimings writes nothing without the %(tag)s build tag
+func WxgDumpTimings(w io.Writer) {
+}
+"""
+
+
+def support_sources(package_name):
+    """
+    The files the timing calls need in the package
+    :return: (filename, source) for each file
+    :rtype: list of (str, str)
+    """
+    values = dict(tag=TIMING_BUILD_TAG, package_name=package_name)
+    return [(ENABLED_FILENAME, _ENABLED_SOURCE % values),
+            (DISABLED_FILENAME, _DISABLED_SOURCE % values)]
+
+
+def write_support_files(directory, package_name):
+    """
+    Write the support files to the directory the generated code is in, leaving them alone if they are up to date
+    :return: (filename, whether it was written) for each file
+    :rtype: list of (str, bool)
+    """
+    results = []
+    for filename, source in support_sources(package_name):
+        path = os.path.join(directory, filename)
+        results.append((path, write_if_changed(path, source)))
+    return results
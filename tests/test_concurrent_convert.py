@@ -0,0 +1,86 @@
+"""
+Stress test for converting from several threads at once with a shared wx_object_classes_map: the widget definitions,
+CustomWidget in particular, are resolved per object rather than changed to suit each one, so every conversion must
+give exactly the same output as it does on its own
+"""
+import os
+import sys
+import unittest
+from multiprocessing.pool import ThreadPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wxg_golang_converter
+from widget_registry import WidgetRegistry
+
+THREADS = 12
+RUNS = 240
+
+# the arguments each CustomWidget class takes, with and without a parent
+CUSTOM_ARGUMENTS = [
+    ["$parent", "$id"],
+    ["$id"],
+    ["$parent", "$id", "wx.DefaultPosition", "wx.DefaultSize"],
+    [],
+    ["$parent", "\"label\"", "42"],
+]
+
+
+def synthetic_wxg(seed, widgets=40):
+    """
+    A .wxg document with a frame per seed, mixing CustomWidgets of different classes and arguments with other widgets
+    :rtype: str
+    """
+    lines = ['<?xml version="1.0"?>',
+             '<application name="app" class="StressApp" top_window="frame_%d">' % seed,
+             '<object class="StressFrame%d" name="frame_%d" base="EditFrame">' % (seed, seed),
+             '<title>Stress frame %d</title>' % seed,
+             '<object class="wxBoxSizer" name="sizer_%d" base="EditBoxSizer">' % seed,
+             '<orient>wxVERTICAL</orient>']
+    for i in range(widgets):
+        lines.append('<object class="sizeritem"><option>%d</option><border>0</border>' % (i % 2))
+        kind = (seed + i) % 3
+        if kind == 0:
+            arguments = CUSTOM_ARGUMENTS[(seed * 7 + i) % len(CUSTOM_ARGUMENTS)]
+            lines.append('<object class="Custom%d" name="custom_%d" base="CustomWidget">' % ((seed + i) % 4, i))
+            lines.append('<arguments>%s</arguments>' % "".join("<argument>%s</argument>" % argument
+                                                               for argument in arguments))
+        elif kind == 1:
+            lines.append('<object class="wxButton" name="button_%d" base="EditButton">' % i)
+            lines.append('<label>Button %d</label>' % i)
+        else:
+            lines.append('<object class="wxStaticText" name="label_%d" base="EditStaticText">' % i)
+            lines.append('<label>Label %d of frame %d</label>' % (i, seed))
+        lines.append('</object></object>')
+    lines.extend(['</object>', '</object>', '</application>'])
+    return "\n".join(lines)
+
+
+class ConcurrentConvertTest(unittest.TestCase):
+
+    def test_concurrent_conversions_match_serial(self):
+        sources = [synthetic_wxg(seed) for seed in range(6)]
+
+        def convert(index, wx_object_classes_map):
+            return wxg_golang_converter.convert_source(sources[index], "main", "github.com/dontpanic92/wxGo",
+                                                      reproducible=True, wx_object_classes_map=wx_object_classes_map)
+
+        serial_map = WidgetRegistry()
+        expected = [convert(index, serial_map) for index in range(len(sources))]
+        self.assertEqual(len(set(expected)), len(sources))
+
+        # a registry of its own, so the threads also race to load the definitions
+        shared_map = WidgetRegistry()
+        indexes = [run % len(sources) for run in range(RUNS)]
+        pool = ThreadPool(THREADS)
+        try:
+            results = pool.map(lambda index: convert(index, shared_map), indexes)
+        finally:
+            pool.close()
+            pool.join()
+        for index, generated in zip(indexes, results):
+            self.assertEqual(generated, expected[index], "source %d converted differently on a thread" % index)
+
+
+if __name__ == "__main__":
+    unittest.main()
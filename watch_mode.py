@@ -0,0 +1,149 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import sys
+import time
+import traceback
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class PollingWaiter(object):
+    """Waits for a fixed time; changes are picked up by checking the files afterwards"""
+    name = "polling"
+
+    def add_directories(self, directories):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+
+class InotifyWaiter(object):
+    """Waits until something happens in one of the watched directories (or the timeout passes), using Linux inotify"""
+    name = "inotify"
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = self._libc.inotify_init()
+        if self._fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self._directories = set()
+
+    def add_directories(self, directories):
+        for directory in directories:
+            if directory in self._directories:
+                continue
+            if self._libc.inotify_add_watch(self._fd, directory.encode(sys.getfilesystemencoding() or "utf-8"),
+                                            WATCH_MASK) >= 0:
+                self._directories.add(directory)
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if readable:
+            # we only use events as a wake-up; what changed is worked out from the files themselves
+            os.read(self._fd, 65536)
+
+
+def make_waiter(use_polling=False):
+    if not use_polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter()
+        except OSError:
+            pass
+    return PollingWaiter()
+
+
+def file_signature(filename):
+    """:rtype: (float, int) or None"""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def watch_directories(jobs, extra_directories=()):
+    """The directories to watch for changes to the inputs of the given jobs"""
+    directories = set()
+    for job in jobs:
+        directories.add(os.path.dirname(os.path.abspath(job.input_filename)))
+    for root in extra_directories:
+        for dirpath, dirnames, filenames in os.walk(root):
+            directories.add(os.path.abspath(dirpath))
+    return directories
+
+
+def watch(collect_jobs, convert_job, extra_directories=(), debounce=0.25, poll_interval=1.0, use_polling=False,
+          log=sys.stderr):
+    """
+    Regenerate outputs whenever their .wxg inputs change, until interrupted.
+
+    Changes are collected until there have been none for the debounce time, so a burst of saves only regenerates each
+    affected output once.  Each regeneration is reported along with how long after the input was saved it finished.
+    :param collect_jobs: returns the current list of batch_conversion.ConversionJob to watch; called on every wake-up,
+    so that e.g. new files in a watched directory get picked up
+    :param convert_job: regenerates the output for one job, returning whether the output file was written
+    :param extra_directories: directory trees to watch for new inputs, beyond the directories of the current inputs
+    """
+    waiter = make_waiter(use_polling)
+    signatures = {}
+    for job in collect_jobs():
+        signatures[(job.input_filename, job.output_filename)] = file_signature(job.input_filename)
+
+    print >> log, "Watching %d .wxg file(s) for changes using %s; press Ctrl-C to stop" % (len(signatures), waiter.name)
+
+    pending = {}
+    last_change_time = None
+    try:
+        while True:
+            jobs = collect_jobs()
+            waiter.add_directories(watch_directories(jobs, extra_directories))
+            waiter.wait(debounce if len(pending) > 0 else poll_interval)
+
+            now = time.time()
+            for job in collect_jobs():
+                key = (job.input_filename, job.output_filename)
+                signature = file_signature(job.input_filename)
+                if signatures.get(key) != signature:
+                    signatures[key] = signature
+                    if signature is not None:
+                        pending[key] = (job, signature[0])
+                        last_change_time = now
+
+            if len(pending) == 0 or now - last_change_time < debounce:
+                continue
+
+            for key in sorted(pending):
+                job, saved_time = pending[key]
+                start_time = time.time()
+                try:
+                    written = convert_job(job)
+                except Exception:
+                    print >> log, "FAILED %s:" % job.input_filename
+                    print >> log, traceback.format_exc().rstrip()
+                    continue
+                end_time = time.time()
+                print >> log, "%s -> %s %s in %.3fs, %.3fs after save" % (job.input_filename, job.output_filename,
+                                                                         "written" if written else "unchanged",
+                                                                         end_time - start_time,
+                                                                         end_time - saved_time)
+            pending = {}
+    except KeyboardInterrupt:
+        pass
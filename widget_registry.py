@@ -0,0 +1,228 @@
+"""
+The definitions of the wxg objects the converter can generate code for (see class_definition_classes), by the base
+attribute of the object.  Each definition is only imported the first time an object with its base is walked, so a
+conversion loads just the definitions its .wxg uses.
+
+Besides the built-in definitions in the widgets package, definitions can be added with WidgetRegistry.register, or
+by other distributions through an entry point in the wxg_to_golang.widgets group named after the base, e.g.
+
+    [wxg_to_golang.widgets]
+    EditCheckBox = mywidgets.check_box:CHECK_BOX
+
+Entry points are only looked at once a base isn't found any other way, so conversions that don't need them don't pay
+for importing pkg_resources.  The cache and incremental manifests, which need to know when the code generated with a
+definition may have changed, also look at them (see definition_sources).
+"""
+import os
+import sys
+
+ENTRY_POINT_GROUP = "wxg_to_golang.widgets"
+
+# base -> "module:attribute" of the built-in definition
+BUILTIN_DEFINITIONS = {
+    "EditPanel": "widgets.panel:PANEL",
+    "EditBoxSizer": "widgets.box_sizer:BOX_SIZER",
+    "EditStaticText": "widgets.static_text:LABEL",
+    "EditListBox": "widgets.list_box:LIST_BOX",
+    "EditStaticBitmap": "widgets.static_bitmap:STATIC_BITMAP",
+    "EditButton": "widgets.button:BUTTON",
+    "EditNotebook": "widgets.notebook:NOTEBOOK",
+    "CustomWidget": "widgets.custom_widget:CUSTOMWIDGET",
+}
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_location(location):
+    """Import a definition given as "module:attribute" """
+    module_name, attribute = location.split(":")
+    __import__(module_name)
+    return getattr(sys.modules[module_name], attribute)
+
+
+def find_module_source(module_name):
+    """
+    The source file of a module, found without importing it if it hasn't been yet (though its package is)
+    :rtype: str or None
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        filename = getattr(module, "__file__", None)
+    else:
+        import pkgutil
+        try:
+            loader = pkgutil.get_loader(module_name)
+        except ImportError:
+            loader = None
+        filename = None
+        if loader is not None and hasattr(loader, "get_filename"):
+            filename = loader.get_filename(module_name)
+    if filename is not None and (filename.endswith(".pyc") or filename.endswith(".pyo")):
+        filename = filename[:-1]
+    return filename
+
+
+def definition_module_names(definition):
+    """
+    The modules a definition object is kept in, looked for among the modules imported so far (so both the one it is
+    made in and any that import it); failing that, the module of its class
+    :rtype: list of str
+    """
+    module_names = [module_name for module_name, module in sorted(sys.modules.items())
+                    if module is not None and any(value is definition for value in vars(module).itervalues())]
+    return module_names or [type(definition).__module__]
+
+
+def definition_sources(wx_object_classes_map):
+    """
+    Where each definition in a wx_object_classes_map comes from, other than the built-in definitions of a
+    WidgetRegistry, which conversion_cache.converter_fingerprint covers.  Together with the source of its module, this
+    tells when the code generated with a definition may have changed (see conversion_cache.definitions_fingerprint).
+    :return: the names of the modules the definition is in, and a description of where it is loaded from, by base
+    :rtype: dict[str, (list of str, str)]
+    """
+    if isinstance(wx_object_classes_map, WidgetRegistry):
+        return wx_object_classes_map.definition_sources()
+    return dict((base_name, (definition_module_names(definition), "object"))
+                for base_name, definition in wx_object_classes_map.items())
+
+
+def builtin_source_filenames():
+    """
+    The source files of the built-in definitions, found without importing them
+    :rtype: list of str
+    """
+    module_names = sorted(set(location.split(":")[0] for location in BUILTIN_DEFINITIONS.itervalues()))
+    return [os.path.join(_DIRECTORY, *module_name.split(".")) + ".py" for module_name in module_names]
+
+
+class WidgetRegistry(dict):
+    """
+    A dict of the definitions by base that imports each one the first time it is looked up with "in", get or [], so it
+    can be given to the converter wherever it takes a wx_object_classes_map.  Iterating, len and the other dict methods
+    only see the definitions loaded so far.
+    """
+
+    def __init__(self, locations=None, use_entry_points=True):
+        """
+        :param locations: "module:attribute" of each definition by base; defaults to BUILTIN_DEFINITIONS
+        :type locations: dict[str, str] or None
+        :param use_entry_points: look for definitions of any other bases in the ENTRY_POINT_GROUP entry points
+        """
+        super(WidgetRegistry, self).__init__()
+        self.locations = dict(BUILTIN_DEFINITIONS if locations is None else locations)
+        self.use_entry_points = use_entry_points
+        self._entry_points = None
+        """:type: dict[str, pkg_resources.EntryPoint] or None"""
+        # the definitions imported from locations or entry points by load, as opposed to those put in directly
+        self._loaded = {}
+
+    def register(self, base_name, definition):
+        """
+        Add a definition, replacing any other for the same base
+        :param definition: the definition, or the "module:attribute" to import it from once it is needed
+        :type definition: class_definition_classes.WxObjectClass or str
+        """
+        if isinstance(definition, basestring):
+            self.locations[base_name] = definition
+            self.pop(base_name, None)
+            self._loaded.pop(base_name, None)
+        else:
+            self[base_name] = definition
+
+    def load(self, base_name):
+        """
+        Get the definition for a base, importing it if it hasn't been yet
+        :rtype: class_definition_classes.WxObjectClass or None
+        """
+        definition = dict.get(self, base_name)
+        if definition is not None:
+            return definition
+        location = self.locations.get(base_name)
+        if location is not None:
+            definition = load_location(location)
+        else:
+            entry_point = self._entry_point(base_name)
+            if entry_point is None:
+                return None
+            definition = entry_point.load()
+        assert definition.base_name == base_name, \
+            "the definition registered for base %s is for base %s" % (base_name, definition.base_name)
+        self._loaded[base_name] = definition
+        self[base_name] = definition
+        return definition
+
+    def definition_sources(self):
+        """
+        Where each definition other than the built-in ones comes from, whether it has been loaded yet or not: its
+        location, or its entry point and the distribution and version providing it, or "object" for one put in
+        directly (see the definition_sources function)
+        :rtype: dict[str, (list of str, str)]
+        """
+        sources = {}
+        for base_name, entry_point in self._load_entry_points().iteritems():
+            sources[base_name] = ([entry_point.module_name], "%s from %s" % (entry_point, entry_point.dist))
+        for base_name, location in self.locations.iteritems():
+            if location == BUILTIN_DEFINITIONS.get(base_name):
+                sources.pop(base_name, None)
+            else:
+                sources[base_name] = ([location.split(":")[0]], location)
+        for base_name, definition in self.items():
+            if self._loaded.get(base_name) is not definition:
+                sources[base_name] = (definition_module_names(definition), "object")
+        return sources
+
+    def _load_entry_points(self):
+        """:rtype: dict[str, pkg_resources.EntryPoint]"""
+        if not self.use_entry_points:
+            return {}
+        if self._entry_points is None:
+            try:
+                import pkg_resources
+            except ImportError:
+                # without setuptools there are no entry points to look at
+                self._entry_points = {}
+                return self._entry_points
+            entry_points = {}
+            for entry_point in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP):
+                entry_points.setdefault(entry_point.name, entry_point)
+            self._entry_points = entry_points
+        return self._entry_points
+
+    def _entry_point(self, base_name):
+        return self._load_entry_points().get(base_name)
+
+    def __missing__(self, base_name):
+        definition = self.load(base_name)
+        if definition is None:
+            raise KeyError(base_name)
+        return definition
+
+    def __contains__(self, base_name):
+        return dict.__contains__(self, base_name) or self.load(base_name) is not None
+
+    def get(self, base_name, default=None):
+        definition = self.load(base_name)
+        if definition is None:
+            return default
+        return definition
+
+
+_default_registry = None
+
+
+def default_registry():
+    """
+    The registry shared by the conversions that aren't given one, with the built-in definitions and those from entry
+    points
+    :rtype: WidgetRegistry
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = WidgetRegistry()
+    return _default_registry
+
+
+def register(base_name, definition):
+    """Add a definition to the default registry (see WidgetRegistry.register)"""
+    default_registry().register(base_name, definition)
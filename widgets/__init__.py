@@ -0,0 +1,4 @@
+"""
+The converter's built-in widget definitions, a module each so that only the ones a .wxg uses get imported (see
+widget_registry)
+"""
@@ -0,0 +1,9 @@
+from class_definition_classes import WxContainer
+from property_values import const_convert
+
+BOX_SIZER = WxContainer("wxBoxSizer", "EditBoxSizer", "wx.BoxSizer", "wx.NewBoxSizer",
+                        "%s", [("orient", const_convert)],
+                        "sizeritem",
+                        "%s, %s, %s", [("option", int), ("flag", const_convert, "0"), ("border", int)],
+                        constructor_needs_parent=False
+                        )
@@ -0,0 +1,19 @@
+import operator
+
+from class_definition_classes import WxObjectClass
+from codegen import golang_str_repr
+from property_values import compose, golang_bool_repr
+
+BUTTON = WxObjectClass(wxg_name="wxButton", base_name="EditButton", wx_class_name="wx.Button",
+                       constructor_name="wx.NewButton",
+                       constructor_params_form="wx.ID_ANY, %s, wx.DefaultPosition, wx.DefaultSize, 0, wx.DefaultValidator, %s",
+                       properties_for_constructor=[("label", golang_str_repr), ("label", golang_str_repr)],
+                       )
+
+BUTTON.add_property("disabled", "Enable", compose(golang_bool_repr, operator.not_, int), go_property_set_prefix="")
+
+"""_init__(self, Window parent, int id=-1, String label=EmptyString,
+            Point pos=DefaultPosition, Size size=DefaultSize,
+            long style=0, Validator validator=DefaultValidator,
+            String name=ButtonNameStr) -> Button
+"""
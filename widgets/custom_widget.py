@@ -0,0 +1,3 @@
+from class_definition_classes import WxCustomWidget
+
+CUSTOMWIDGET = WxCustomWidget()
@@ -0,0 +1,7 @@
+from class_definition_classes import WxObjectClass
+from codegen import golang_str_repr
+
+LIST_BOX = WxObjectClass("wxListBox", "EditListBox", "wx.ListBox", "wx.NewListBox",
+                         "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, []string {}"
+                         )
+LIST_BOX.add_property("tooltip", "ToolTip", golang_str_repr)
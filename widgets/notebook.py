@@ -0,0 +1,12 @@
+from class_definition_classes import WxContainer
+from codegen import golang_str_repr, golang_int
+from property_values import LookupTagText
+
+NOTEBOOK = WxContainer("wxNotebook", "EditNotebook", "wx.Notebook", "wx.NewNotebook",
+                       "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, %s, %s", [("style", golang_int, 0), ("@name", golang_str_repr)],
+                       subobject_wxg_name=None,
+                       expect_one_child=False, add_method_name="AddPage",
+                       subobject_constructor_params_form="%s",
+                       subobject_properties_for_constructor=[("DOM_CHILD_OBJECT", LookupTagText("@name", "../tabs/tab", "window", golang_str_repr))],
+                       use_as_parent_object_for_enclosed_objects=True,
+                       )
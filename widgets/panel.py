@@ -0,0 +1,8 @@
+from class_definition_classes import WxContainer
+from property_values import const_convert
+
+PANEL = WxContainer("wxPanel", "EditPanel", "wx.Panel", "wx.NewPanel",
+                    "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, %s", [("style", const_convert)], None,
+                    add_method_name="SetSizer",
+                    use_as_parent_object_for_enclosed_objects=True,
+                    )
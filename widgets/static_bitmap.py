@@ -0,0 +1,6 @@
+from class_definition_classes import WxObjectClass
+from property_values import make_size_expr
+
+STATIC_BITMAP = WxObjectClass(wxg_name="wxStaticBitmap", base_name="EditStaticBitmap", wx_class_name="wx.StaticBitmap",
+                              constructor_name="wx.NewStaticBitmap", constructor_params_form="wx.ID_ANY, wx.NullBitmap")
+STATIC_BITMAP.add_property("size", "MinSize", make_size_expr)
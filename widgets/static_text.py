@@ -0,0 +1,5 @@
+from class_definition_classes import WxObjectClass
+from codegen import golang_str_repr
+
+LABEL = WxObjectClass("wxStaticText", "EditStaticText", "wx.StaticText", "wx.NewStaticText",
+                      "wx.ID_ANY, %s", [("label", golang_str_repr, '""')])
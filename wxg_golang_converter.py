@@ -1,25 +1,26 @@
-import functools
-import xml.dom.minidom
-import sys
+import hashlib
+import json
+import os
+import StringIO
 import datetime
-import operator
 
-from class_definition_classes import WxContainer, WxObjectClass, WxCustomWidget
-from codegen import golang_str_repr, GenStruct, GenFile, golang_int
-from xml_helpers import child_elements, child_element_text, element_text, get_path_elements
-
-
-def const_convert(s):
-    """Convert a wxg const value to the golang expression for the relevant constant"""
-    if s.startswith("wx") and s[2:].isupper():
-        return "wx.%s" % s[2:]
-    else:
-        assert False, "can't convert const %r" % s
-
-
-def compose(*functions):
-    # https://mathieularose.com/function-composition-in-python/
-    return functools.reduce(lambda f, g: lambda x: f(g(x)), functions, lambda x: x)
+from bitmap_resources import EMBEDDED_BITMAP_TAGS, bitmap_expression, is_file_bitmap, resource_filename_for, \
+    write_resource_files as write_bitmap_resource_files
+from class_definition_classes import WxContainer, WxObjectClass
+from codegen import CodeEmitter, GenFile, golang_int
+from conversion_cache import converter_fingerprint, definitions_fingerprint, file_digest
+from conversion_stats import ConversionStats
+from depfiles import write_depfile
+from frame_manifest import FrameFragment, load_manifest, manifest_filename_for, save_manifest
+from generation_options import GenerationOptions
+from memoize import memoize
+from output_files import write_if_changed
+from property_values import const_convert, make_size_expr
+from sizer_optimizer import optimize_sizers as optimize_struct_sizers
+from startup_timing import write_support_files as write_timing_support_files
+from widget_registry import default_registry, definition_sources
+from wxg_parser import iter_application_objects, parse_application_object, scan_application_objects
+from xml_helpers import child_elements, child_element_text, element_text, element_index
 
 
 def create_dict_from_list(l, key_property_name):
@@ -35,259 +36,485 @@ def create_dict_from_list(l, key_property_name):
     return out
 
 
-def make_size_expr(size_str):
-    values = [int(x.strip()) for x in size_str.split(",")]
-    size_expr = "wx.NewSize(%d, %d)" % tuple(values)
-    return size_expr
+IGNORE_OBJECTS = []  # "EditStaticBitmap"
 
 
-def golang_bool_repr(x):
-    if x:
-        return "true"
-    else:
-        return "false"
+def input_label_for(input_filename, output_filename, reproducible=False):
+    """How to refer to the input file in the generated file; relative to the output file in reproducible mode"""
+    if not reproducible:
+        return input_filename
+    output_dir = os.path.dirname(os.path.abspath(output_filename))
+    return os.path.relpath(os.path.abspath(input_filename), output_dir).replace(os.sep, "/")
 
 
-class LookupTagText(object):
-    """ A value converter that looks up values in a lookup table somewhere in the DOM """
-    def __init__(self, subobject_property_name, tag_path, attr_name, converter):
-        self.subobject_property_name = subobject_property_name
-        self.tag_path = tag_path
-        self.attr_name = attr_name
-        self.converter = converter
+def generation_comments(input_label, reproducible=False):
+    """The comments to put at the top of the generated file; in reproducible mode these leave out the generation time"""
+    if not reproducible:
+        return ["Generated by wxg_to_golang at %s" % datetime.datetime.now(),
+                "from %s" % input_label,
+                ]
+    return ["Generated by wxg_to_golang",
+            "from %s" % input_label,
+            ]
 
-    def __call__(self, dom_obj):
-        """:type dom_obj: xml.dom.minidom.Element"""
-        if self.subobject_property_name.startswith("@"):
-            match_value = dom_obj.getAttribute(self.subobject_property_name[1:])
-        else:
-            match_value = child_element_text(dom_obj, self.subobject_property_name)
 
-        for child_element in get_path_elements(dom_obj, self.tag_path):
-            assert isinstance(child_element, xml.dom.minidom.Element)
-            if child_element.getAttribute(self.attr_name) == match_value:
-                return self.converter(element_text(child_element))
+def generation_comments_for(input_filename, output_filename, reproducible=False):
+    """
+    The comments to put at the top of the generated file for a given input and output file.  In reproducible mode the
+    input path is given relative to the output file, so regenerating from the same input gives identical bytes
+    """
+    return generation_comments(input_label_for(input_filename, output_filename, reproducible), reproducible)
 
-        return None
 
+def convert(input_filename, output_filename, package_name, wxgo_package_name, wx_object_classes_map=None,
+            reproducible=False, cache=None, stats=None, stats_hook=None, incremental=False, frames_hook=None,
+            options=None, depfile=None):
+    """
+    Convert a .wxg file to a golang source file.  The output is generated in memory and only written out (atomically)
+    if it differs from what is already in the output file.
+    :param cache: cache of previously generated output to use and update, if any
+    :type cache: conversion_cache.ConversionCache or None
+    :param stats: where to record timings and counts for the conversion
+    :type stats: conversion_stats.ConversionStats or None
+    :param stats_hook: called with the ConversionStats for the conversion once it is finished
+    :param incremental: keep the code generated for each top level object in a manifest alongside the output (see
+    frame_manifest.manifest_filename_for), and reuse it for objects that haven't changed since
+    :param frames_hook: with incremental, called with the list of frame_manifest.FrameFragment making up the output
+    :param options: the options to generate the code with.  With startup_timing, the timing support files (see
+    startup_timing.write_support_files) are also written alongside the output file, and with embed_bitmaps, the
+    images are written to a resource file (see bitmap_resources.resource_filename_for) with the bitmap runtime file
+    alongside it
+    :type options: GenerationOptions or None
+    :param depfile: filename to write a Make dependency file for the output to (see depfiles.write_depfile), if any
+    :return: True if the output file was written, False if it already had the generated contents
+    :rtype: bool
+    """
+    if stats is None:
+        stats = ConversionStats()
+    if options is None:
+        options = GenerationOptions()
+    if wx_object_classes_map is None:
+        wx_object_classes_map = default_registry()
+
+    input_label = input_label_for(input_filename, output_filename, reproducible)
+
+    generated = None
+    cache_key = None
+    if cache is not None:
+        with stats.phase("cache_lookup"):
+            header_key = json.dumps([reproducible, input_label, options.key()])
+            cache_key = cache.key(file_digest(input_filename), package_name, wxgo_package_name, header_key,
+                                  definitions_fingerprint(definition_sources(wx_object_classes_map)))
+            generated = cache.get(cache_key)
+        stats.count("cache_hits" if generated is not None else "cache_misses")
+
+    if generated is None and incremental:
+        manifest_filename = manifest_filename_for(output_filename)
+        with stats.phase("manifest"):
+            previous_fragments = load_manifest(manifest_filename)
+        with open(input_filename, "rb") as input_handle:
+            fragments = generate_fragments(input_handle, wx_object_classes_map, previous_fragments, stats, options)
+        with stats.phase("code_gen"):
+            generated = assemble_fragments(fragments, generation_comments(input_label, reproducible), package_name,
+                                           wxgo_package_name)
+        with stats.phase("manifest"):
+            save_manifest(manifest_filename, fragments)
+        if frames_hook is not None:
+            frames_hook(fragments)
+
+        if cache is not None:
+            with stats.phase("cache_store"):
+                cache.put(cache_key, generated)
+    elif generated is None:
+        with open(input_filename, "rb") as input_handle:
+            generated = convert_source(input_handle, package_name, wxgo_package_name, input_label=input_label,
+                                       reproducible=reproducible, wx_object_classes_map=wx_object_classes_map,
+                                       stats=stats, options=options)
+
+        if cache is not None:
+            with stats.phase("cache_store"):
+                cache.put(cache_key, generated)
+
+    with stats.phase("write"):
+        if options.startup_timing:
+            write_timing_support_files(os.path.dirname(output_filename) or ".", package_name)
+        written = write_if_changed(output_filename, generated)
+    if options.embed_bitmaps:
+        with stats.phase("bitmaps"):
+            write_bitmap_resource_files(input_filename, resource_filename_for(output_filename), package_name,
+                                        wxgo_package_name, input_label, stats)
+    if depfile is not None:
+        with stats.phase("depfile"):
+            write_depfile(depfile, output_filename, input_filename, options.embed_bitmaps)
+    stats.count("bytes_written", len(generated) if written else 0)
+
+    if stats_hook is not None:
+        stats_hook(stats)
+    return written
+
+
+def convert_source(source, package_name, wxgo_package_name, output_stream=None, input_label="<string>",
+                   reproducible=False, wx_object_classes_map=None, stats=None, stats_hook=None, stream_chunk_size=None,
+                   options=None):
+    """
+    Generate the golang source for a .wxg document held in memory
+    :param source: the .wxg XML, or a file-like object to read it from
+    :type source: str or unicode or file
+    :param output_stream: file-like object to write the generated source to, if any
+    :param input_label: how to refer to the input in the comments at the top of the generated source
+    :param stats: where to record timings and counts for the conversion
+    :type stats: conversion_stats.ConversionStats or None
+    :param stats_hook: called with the ConversionStats for the conversion once it is finished
+    :param stream_chunk_size: with output_stream, write the source to it in chunks of about this many characters as
+    it is generated, rather than generating it all first; the write time is then counted as part of code_gen
+    :param options: the options to generate the code with; no support or resource files are written for them
+    :type options: GenerationOptions or None
+    :return: the generated source, UTF-8 encoded, or None if it was written to output_stream
+    :rtype: str or None
+    """
+    if stats is None:
+        stats = ConversionStats()
 
-BOX_SIZER = WxContainer("wxBoxSizer", "EditBoxSizer", "wx.BoxSizer", "wx.NewBoxSizer",
-                        "%s", [("orient", const_convert)],
-                        "sizeritem",
-                        "%s, %s, %s", [("option", int), ("flag", const_convert, "0"), ("border", int)],
-                        constructor_needs_parent=False
-                        )
-
-PANEL = WxContainer("wxPanel", "EditPanel", "wx.Panel", "wx.NewPanel",
-                    "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, %s", [("style", const_convert)], None,
-                    add_method_name="SetSizer",
-                    use_as_parent_object_for_enclosed_objects=True,
-                    )
-
-NOTEBOOK = WxContainer("wxNotebook", "EditNotebook", "wx.Notebook", "wx.NewNotebook",
-                       "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, %s, %s", [("style", golang_int, 0), ("@name", golang_str_repr)],
-                       subobject_wxg_name=None,
-                       expect_one_child=False, add_method_name="AddPage",
-                       subobject_constructor_params_form="%s",
-                       subobject_properties_for_constructor=[("DOM_CHILD_OBJECT", LookupTagText("@name", "../tabs/tab", "window", golang_str_repr))],
-                       use_as_parent_object_for_enclosed_objects=True,
-                       )
-
-CUSTOMWIDGET = WxCustomWidget()
-
-LABEL = WxObjectClass("wxStaticText", "EditStaticText", "wx.StaticText", "wx.NewStaticText",
-                      "wx.ID_ANY, %s", [("label", golang_str_repr, '""')])
-LIST_BOX = WxObjectClass("wxListBox", "EditListBox", "wx.ListBox", "wx.NewListBox",
-                         "wx.ID_ANY, wx.DefaultPosition, wx.DefaultSize, []string {}"
-                         )
-LIST_BOX.add_property("tooltip", "ToolTip", golang_str_repr)
-
-STATIC_BITMAP = WxObjectClass(wxg_name="wxStaticBitmap", base_name="EditStaticBitmap", wx_class_name="wx.StaticBitmap",
-                              constructor_name="wx.NewStaticBitmap", constructor_params_form="wx.ID_ANY, wx.NullBitmap")
-
-BUTTON = WxObjectClass(wxg_name="wxButton", base_name="EditButton", wx_class_name="wx.Button",
-                       constructor_name="wx.NewButton",
-                       constructor_params_form="wx.ID_ANY, %s, wx.DefaultPosition, wx.DefaultSize, 0, wx.DefaultValidator, %s",
-                       properties_for_constructor=[("label", golang_str_repr), ("label", golang_str_repr)],
-                       )
-
-BUTTON.add_property("disabled", "Enable", compose(golang_bool_repr, operator.not_, int), go_property_set_prefix="")
-
-"""_init__(self, Window parent, int id=-1, String label=EmptyString,
-            Point pos=DefaultPosition, Size size=DefaultSize,
-            long style=0, Validator validator=DefaultValidator,
-            String name=ButtonNameStr) -> Button
-"""
-
-STATIC_BITMAP.add_property("size", "MinSize", make_size_expr)
-IGNORE_OBJECTS = []  # STATIC_BITMAP.base_name
-
-OBJECTS = [
-    PANEL,
-    BOX_SIZER,
-    LABEL,
-    LIST_BOX,
-    STATIC_BITMAP,
-    BUTTON,
-    NOTEBOOK,
-    CUSTOMWIDGET
-]
-""":type: list of WxObject"""
-
-
-def convert(input_filename, output_filename, package_name, wxgo_package_name):
-
-    generation_comments = ["Generated by wxg_to_golang at %s" % datetime.datetime.now(),
-                           "from %s" % input_filename,
-                           ]
-
-    with open(output_filename, "w") as output_handle:
-        dom = xml.dom.minidom.parse(input_filename)
-
-        out = GenFile(generation_comments, wxgo_package_name)
-
-        # form_class_map = {"EditFrame": "wx.Frame"}
-
-        appnodes = list(child_elements(dom, "application"))
-        assert len(appnodes) == 1
-        application = appnodes[0]
-
-        wx_object_classes_map = create_dict_from_list(OBJECTS, "base_name")
-
-        for form in child_elements(application, "object"):
-            form_base = form.getAttribute("base")
-            if form_base == "EditFrame":
-                form_classname = "wx.Frame"
-                form_constructor = "wx.NewFrame"
-                form_struct_field_name = form_classname.rsplit(".", 1)[-1]
-                st = GenStruct(form.getAttribute("class"), form_classname, form_constructor, form_struct_field_name, child_element_text(form, "title"))
-                out.structs.append(st)
-
-                size = child_element_text(form, "size", None)
-                if size is not None:
-                    size_expr = make_size_expr(size)
-                    st.add_property_line(None, "SetSize", size_expr)
-
-                bgcolor = child_element_text(form, "background", None)
-                if bgcolor is not None:
-                    color_obj_expr = colour_obj_for_web_colour(bgcolor)
-                    st.add_property_line(None, "SetBackgroundColour", color_obj_expr)
-
-                item_pops = [(obj, form_struct_field_name, None) for obj in child_elements(form, "object")]
-
-                need_sizer = True
-
-                while len(item_pops) > 0:
-                    obj, parent_field_name, parent_object_name = item_pops.pop(0)
-
-                    object_base = obj.getAttribute("base")
-                    if object_base in IGNORE_OBJECTS:
-                        pass
-                    elif object_base in wx_object_classes_map:
-                        member_class_obj = wx_object_classes_map[object_base]
-                        assert isinstance(member_class_obj, WxObjectClass)
-
-                        member_class_obj.setup_for_dom_obj(obj)
-
-                        member_name = obj.getAttribute("name")
-                        if need_sizer:
-                            st.sizer_field_name = member_name
-                            need_sizer = False
-
-                        st.members.append((member_name, member_class_obj.wx_class_name))
-
-                        built_additional_params = build_additional_params(member_class_obj.constructor_params_form,
-                                                                          member_class_obj.properties_for_constructor, obj, None)
-                        st.add_init_line(member_name, member_class_obj.constructor_name, built_additional_params,
-                                         member_class_obj.constructor_needs_parent, parent_object_name=parent_object_name)
+    out = parse_source(source, input_label, reproducible, wx_object_classes_map, stats, options)
+    generated = generate_source(out, package_name, wxgo_package_name, output_stream, stats, stream_chunk_size,
+                                options)
 
-                        for tag_name, (go_property_name, value_func) in member_class_obj.properties.iteritems():
-                            value = child_element_text(obj, tag_name, None)
-                            if value is not None:
-                                if value_func is not None:
-                                    value = value_func(value)
-                                st.add_property_line(member_name, go_property_name, value)
+    if stats_hook is not None:
+        stats_hook(stats)
+    return generated
 
-                        # add any event handlers
 
-                        for event_tag in child_elements(obj, "events"):
-                            for handler_tag in child_elements(event_tag, "handler"):
-                                event = handler_tag.getAttribute("event")
-                                callback = element_text(handler_tag)
-                                st.add_binding(callback, event, member_name)
+def parse_source(source, input_label="<string>", reproducible=False, wx_object_classes_map=None, stats=None,
+                 options=None):
+    """
+    Parse a .wxg document into the structs to generate code for.  Each form's elements are dropped as it is
+    walked, and the result can be serialized with GenFile.to_bytes to generate code from again later.
+    :param source: the .wxg XML, or a file-like object to read it from
+    :type source: str or unicode or file
+    :param input_label: how to refer to the input in the comments at the top of the generated source
+    :type stats: conversion_stats.ConversionStats or None
+    :param options: the options to generate the code with, of which those that apply to walking the objects are used
+    :type options: GenerationOptions or None
+    :rtype: GenFile
+    """
+    if stats is None:
+        stats = ConversionStats()
 
-                        # handle containers (enqueuing any contained objects)
+    if isinstance(source, unicode):
+        source = source.encode("utf-8")
+    if isinstance(source, str):
+        source = StringIO.StringIO(source)
 
-                        if isinstance(member_class_obj, WxContainer):
-                            if member_class_obj.use_as_parent_object_for_enclosed_objects:
-                                # use this object as a member object name for
-                                parent_object_name = member_name
-
-                            if member_class_obj.subobject_wxg_name is None:
-                                # this container has a single enclosed object directly inside
-                                subobjects = [obj]
-                            else:
-                                # this container has an object wrapper around each enclosed object
-                                subobjects = child_elements(obj, "object")
+    out = GenFile(generation_comments(input_label, reproducible))
 
-                            for subobject in subobjects:
-                                subobject_class = subobject.getAttribute("class")
-                                if member_class_obj.subobject_wxg_name is not None:
-                                    assert subobject_class == member_class_obj.subobject_wxg_name
+    # form_class_map = {"EditFrame": "wx.Frame"}
 
-                                sizer_item_children = list(child_elements(subobject, "object"))
-                                if member_class_obj.expect_one_child:
-                                    assert len(sizer_item_children) == 1, "expected %r object to have exactly one child" % subobject_class
-                                for item_child in sizer_item_children:
+    if wx_object_classes_map is None:
+        wx_object_classes_map = default_registry()
 
-                                    ic_base = item_child.getAttribute("base")
+    for form in stats.timed_iter("parse", iter_application_objects(source)):
+        if form.nodeName == "object":
+            with stats.phase("walk"):
+                convert_form(form, out, wx_object_classes_map, stats, options)
 
-                                    if ic_base == "EditSpacer":
-                                        is_horiz = obj.getAttribute("orient") == "wxHORIZONTAL"
+    for struct in out.structs:
+        stats.count("structs")
+        stats.count("init_lines", len(struct.init_lines))
+        stats.count("layout_lines", len(struct.layout_lines))
+        stats.count("property_lines", len(struct.properties_lines))
+        stats.count("bindings", len(struct.bindings))
+    return out
 
-                                        if is_horiz:
-                                            height = int(child_element_text(item_child, "height"))
-                                            spacer_size = height
-                                        else:
-                                            width = int(child_element_text(item_child, "width"))
-                                            spacer_size = width
 
-                                        # additional_params = build_additional_params(member_class_obj.subobject_constructor_params_form,
-                                        #                                             member_class_obj.subobject_properties_for_constructor,
-                                        #                                             subobject)
+def generate_source(out, package_name, wxgo_package_name, output_stream=None, stats=None, stream_chunk_size=None,
+                    options=None):
+    """
+    Generate golang source from parsed structs; see convert_source for the parameters
+    :type out: GenFile
+    :rtype: str or None
+    """
+    if stats is None:
+        stats = ConversionStats()
+
+    if output_stream is not None and stream_chunk_size is not None:
+        with stats.phase("code_gen"):
+            length_written = out.code_gen(output_stream, package_name, chunk_size=stream_chunk_size, encoding="utf-8",
+                                          wxgo_package_name=wxgo_package_name, options=options)
+        stats.count("bytes_generated", length_written)
+        stats.count("bytes_written", length_written)
+        return None
 
-                                        proportion = int(child_element_text(subobject, "option", 0))
+    with stats.phase("code_gen"):
+        output_handle = StringIO.StringIO()
+        out.code_gen(output_handle, package_name, wxgo_package_name=wxgo_package_name, options=options)
+        generated = output_handle.getvalue()
+        if isinstance(generated, unicode):
+            generated = generated.encode("utf-8")
+    stats.count("bytes_generated", len(generated))
+
+    if output_stream is not None:
+        with stats.phase("write"):
+            output_stream.write(generated)
+        stats.count("bytes_written", len(generated))
+        return None
+    return generated
 
-                                        if proportion == 0:
-                                            st.add_layout_line(member_name, "%d" % spacer_size, None, False,
-                                                               method="AddSpacer")
-                                        else:
-                                            st.add_layout_line(member_name, "%d" % proportion, None, False,
-                                                               method="AddStretchSpacer")
-                                        continue
 
-                                    elif ic_base in IGNORE_OBJECTS:
-                                        continue
+def frame_fingerprint(source_digest, options, definitions_key):
+    """
+    The fingerprint of a top level object, from the digest of its XML, the converter's own fingerprint, the options the
+    code for it is generated with and the widget definitions it uses
+    :type options: GenerationOptions
+    :param definitions_key: the conversion_cache.definitions_fingerprint of the definitions for the bases of the
+    objects in it
+    """
+    return hashlib.sha1(json.dumps([converter_fingerprint(), source_digest, options.key(), definitions_key])).hexdigest()
 
-                                    item_child_name = item_child.getAttribute("name")
-                                    item_pops.append((item_child, member_name, parent_object_name))
 
-                                    additional_params = build_additional_params(member_class_obj.subobject_constructor_params_form,
-                                                                                member_class_obj.subobject_properties_for_constructor,
-                                                                                subobject, item_child)
-                                    # if parent_field_name == form_struct_field_name:
-                                    #     continue
+def generate_fragments(source, wx_object_classes_map=None, previous_fragments=None, stats=None, options=None):
+    """
+    Generate the code for each top level object of a .wxg document separately, reusing the code from
+    previous_fragments for any object whose fingerprint is found there rather than parsing and walking it again
+    :param source: seekable file-like object to read the .wxg XML from
+    :param previous_fragments: fragments from an earlier run, keyed by fingerprint
+    :type previous_fragments: dict[str, FrameFragment] or None
+    :type stats: conversion_stats.ConversionStats or None
+    :type options: GenerationOptions or None
+    :rtype: list of FrameFragment
+    """
+    if stats is None:
+        stats = ConversionStats()
+    if previous_fragments is None:
+        previous_fragments = {}
+    if options is None:
+        options = GenerationOptions()
+    if wx_object_classes_map is None:
+        wx_object_classes_map = default_registry()
+
+    with stats.phase("scan"):
+        encoding, spans = scan_application_objects(source)
+    sources = definition_sources(wx_object_classes_map)
+
+    fragments = []
+    for span in spans:
+        if span.name != "object":
+            continue
+        fingerprint = frame_fingerprint(span.digest, options, definitions_fingerprint(sources, span.bases))
+        previous = previous_fragments.get(fingerprint)
+        if previous is not None:
+            fragments.append(FrameFragment(fingerprint, previous.struct_name, previous.code, False))
+            stats.count("frames_reused")
+            continue
+
+        with stats.phase("parse"):
+            form = parse_application_object(source, span, encoding)
+        out = GenFile([])
+        with stats.phase("walk"):
+            convert_form(form, out, wx_object_classes_map, stats, options)
+        struct_name = None
+        with stats.phase("code_gen"):
+            output_handle = StringIO.StringIO()
+            emitter = CodeEmitter(output_handle)
+            for struct in out.structs:
+                struct_name = struct.name
+                out.emit_struct(emitter, struct, options)
+            emitter.flush()
+        fragments.append(FrameFragment(fingerprint, struct_name, output_handle.getvalue(), True))
+        stats.count("frames_regenerated")
+    return fragments
+
+
+def assemble_fragments(fragments, comments, package_name, wxgo_package_name):
+    """
+    Put together a golang source file from the code generated for each top level object
+    :type fragments: list of FrameFragment
+    :param comments: the generation comments for the top of the file
+    :return: the source, UTF-8 encoded
+    :rtype: str
+    """
+    output_handle = StringIO.StringIO()
+    emitter = CodeEmitter(output_handle)
+    GenFile(comments).emit_header(emitter, package_name, wxgo_package_name)
+    emitter.fragments.extend(fragment.code for fragment in fragments)
+    emitter.flush()
+    generated = output_handle.getvalue()
+    if isinstance(generated, unicode):
+        generated = generated.encode("utf-8")
+    return generated
+
+
+def convert_form(form, out, wx_object_classes_map, stats=None, options=None):
+    """
+    Walk one top level object of the application, adding a struct for it to the output file if it is a form.  Each
+    element's children are released (see wxg_parser.WxgElement.release) once they have been walked, so the form can
+    only be walked once.
+    :type form: wxg_parser.WxgElement
+    :type out: GenFile
+    :type stats: conversion_stats.ConversionStats or None
+    :param options: the options to generate the code with, of which optimize_sizers and embed_bitmaps apply here
+    :type options: GenerationOptions or None
+    """
+    if stats is None:
+        stats = ConversionStats()
+    if options is None:
+        options = GenerationOptions()
+
+    form_base = form.getAttribute("base")
+    if form_base == "EditFrame":
+        form_classname = "wx.Frame"
+        form_constructor = "wx.NewFrame"
+        form_struct_field_name = form_classname.rsplit(".", 1)[-1]
+        st = out.new_struct(form.getAttribute("class"), form_classname, form_constructor, form_struct_field_name, child_element_text(form, "title"))
+
+        size = child_element_text(form, "size", None)
+        if size is not None:
+            size_expr = make_size_expr(size)
+            st.add_property_line(None, "SetSize", size_expr)
+
+        bgcolor = child_element_text(form, "background", None)
+        if bgcolor is not None:
+            color_obj_expr = colour_obj_for_web_colour(bgcolor)
+            st.add_property_line(None, "SetBackgroundColour", color_obj_expr)
+
+        item_pops = [(obj, form_struct_field_name, None) for obj in child_elements(form, "object")]
+        form.release()
+
+        need_sizer = True
+
+        while len(item_pops) > 0:
+            obj, parent_field_name, parent_object_name = item_pops.pop(0)
+
+            object_base = obj.getAttribute("base")
+            stats.count_object(object_base)
+            if object_base in IGNORE_OBJECTS:
+                pass
+            elif object_base in wx_object_classes_map:
+                member_class_obj = wx_object_classes_map[object_base]
+                assert isinstance(member_class_obj, WxObjectClass)
+
+                member_spec = member_class_obj.resolve(obj)
+
+                member_name = obj.getAttribute("name")
+                if need_sizer:
+                    st.sizer_field_name = member_name
+                    need_sizer = False
+
+                st.add_member(member_name, member_spec.wx_class_name)
+
+                built_additional_params = member_spec.constructor_plan.build(obj, None, stats)
+                st.add_init_line(member_name, member_spec.constructor_name, built_additional_params,
+                                 member_spec.constructor_needs_parent, parent_object_name=parent_object_name,
+                                 base=object_base)
+
+                obj_index = element_index(obj)
+                for tag_name, go_property_name, value_func in member_class_obj.property_plan:
+                    value = obj_index.texts.get(tag_name)
+                    if value is not None:
+                        if value_func is not None:
+                            value = value_func(value)
+                        st.add_property_line(member_name, go_property_name, value)
+
+                if options.embed_bitmaps and object_base in EMBEDDED_BITMAP_TAGS:
+                    bitmap = obj_index.texts.get(EMBEDDED_BITMAP_TAGS[object_base])
+                    if bitmap is not None and is_file_bitmap(bitmap):
+                        st.add_property_line(member_name, "SetBitmap", bitmap_expression(bitmap))
+
+                # add any event handlers
+
+                for event_tag in obj_index.child_elements("events"):
+                    for handler_tag in child_elements(event_tag, "handler"):
+                        event = handler_tag.getAttribute("event")
+                        callback = element_text(handler_tag)
+                        st.add_binding(callback, event, member_name)
+
+                # handle containers (enqueuing any contained objects)
+
+                if isinstance(member_class_obj, WxContainer):
+                    if member_class_obj.use_as_parent_object_for_enclosed_objects:
+                        # use this object as a member object name for
+                        parent_object_name = member_name
+
+                    if member_class_obj.subobject_wxg_name is None:
+                        # this container has a single enclosed object directly inside
+                        subobjects = [obj]
+                    else:
+                        # this container has an object wrapper around each enclosed object
+                        subobjects = child_elements(obj, "object")
+
+                    for subobject in subobjects:
+                        subobject_class = subobject.getAttribute("class")
+                        if member_class_obj.subobject_wxg_name is not None:
+                            assert subobject_class == member_class_obj.subobject_wxg_name
+
+                        sizer_item_children = list(child_elements(subobject, "object"))
+                        if member_class_obj.expect_one_child:
+                            assert len(sizer_item_children) == 1, "expected %r object to have exactly one child" % subobject_class
+                        for item_child in sizer_item_children:
+
+                            ic_base = item_child.getAttribute("base")
+
+                            if ic_base == "EditSpacer":
+                                is_horiz = obj.getAttribute("orient") == "wxHORIZONTAL"
+
+                                if is_horiz:
+                                    height = int(child_element_text(item_child, "height"))
+                                    spacer_size = height
+                                else:
+                                    width = int(child_element_text(item_child, "width"))
+                                    spacer_size = width
+
+                                # additional_params = build_additional_params(member_class_obj.subobject_constructor_params_form,
+                                #                                             member_class_obj.subobject_properties_for_constructor,
+                                #                                             subobject)
+
+                                proportion = int(child_element_text(subobject, "option", 0))
+
+                                if proportion == 0:
+                                    st.add_layout_line(member_name, "%d" % spacer_size, None, False,
+                                                       method="AddSpacer", proportion=0)
+                                else:
+                                    st.add_layout_line(member_name, "%d" % proportion, None, False,
+                                                       method="AddStretchSpacer", proportion=proportion)
+                                continue
+
+                            elif ic_base in IGNORE_OBJECTS:
+                                continue
+
+                            item_child_name = item_child.getAttribute("name")
+                            item_pops.append((item_child, member_name, parent_object_name))
+
+                            additional_params = member_class_obj.subobject_plan.build(subobject, item_child, stats)
+                            # if parent_field_name == form_struct_field_name:
+                            #     continue
+
+                            if member_class_obj.subobject_wxg_name == "sizeritem":
+                                subobject_index = element_index(subobject)
+                                flag = subobject_index.texts.get("flag")
+                                st.add_layout_line(member_name, item_child_name, additional_params,
+                                                   method=member_class_obj.add_method_name,
+                                                   proportion=golang_int(subobject_index.texts.get("option")),
+                                                   flag="0" if flag is None else const_convert(flag),
+                                                   border=golang_int(subobject_index.texts.get("border")))
+                            else:
+                                st.add_layout_line(member_name, item_child_name, additional_params, method=member_class_obj.add_method_name)
 
-                                    st.add_layout_line(member_name, item_child_name, additional_params, method=member_class_obj.add_method_name)
+                        if subobject is not obj:
+                            subobject.release()
 
-                        member_class_obj.teardown_for_dom_obj(obj)
+                # nothing reads this object's children again, other than the objects now enqueued in item_pops, so
+                # let go of the rest of its subtree as the walk goes, rather than keeping the whole form to the end
+                obj.release()
 
-                    else:
-                        assert False, "Unknown base %s; did you remember to add its definition to the OBJECTS list?" % object_base
+            else:
+                assert False, "Unknown base %s; did you remember to register its definition (see widget_registry)?" % object_base
 
-        out.code_gen(output_handle, package_name)
+        if options.optimize_sizers:
+            result = optimize_struct_sizers(st)
+            stats.count("sizers_removed", result.sizers_removed)
+            stats.count("spacers_merged", result.spacers_merged)
 
 
+@memoize()
 def colour_obj_for_web_colour(color_str):
     assert color_str.startswith("#") and len(color_str) == 7
     color_str = color_str[1:]
@@ -295,53 +522,3 @@ def colour_obj_for_web_colour(color_str):
     color_obj_expr = "wx.NewColour(%s)" % ", ".join(["byte(%d)" % x for x in rgb])
     return color_obj_expr
 
-
-def build_additional_params(constructor_params_form, properties_for_constructor, dom_obj, item_child):
-    if constructor_params_form is None:
-        built_additional_params = None
-    else:
-        constructor_param_values = []
-        for properties_entry in properties_for_constructor:
-            if len(properties_entry) == 2:
-                property_name, convert_func = properties_entry
-                default_value = ""
-            elif len(properties_entry) == 3:
-                property_name, convert_func, default_value = properties_entry
-            else:
-                assert False, "invalid properties_for_constructor entry %r" % properties_entry
-            if property_name == "DOM_OBJECT":
-                pre_conversion_value = dom_obj
-            elif property_name == "DOM_CHILD_OBJECT":
-                pre_conversion_value = item_child
-            elif property_name.startswith("@"):
-                pre_conversion_value = dom_obj.getAttribute(property_name[1:])
-            else:
-                pre_conversion_value = child_element_text(dom_obj, property_name, None)
-            if pre_conversion_value is None:
-                converted_value = default_value
-            else:
-                try:
-                    converted_value = convert_func(pre_conversion_value)
-                except:
-                    print "During conversion of %s class=%s %s value %r:" % (dom_obj.nodeName, dom_obj.getAttribute("class"), property_name, pre_conversion_value)
-                    raise
-            if converted_value is None or converted_value == "":
-                msg = "During conversion of %s class=%s property '%s' value %r, got converted value %r" % (dom_obj.nodeName,
-                                                                                                           dom_obj.getAttribute("class"),
-                                                                                                           property_name,
-                                                                                                           pre_conversion_value,
-                                                                                                           converted_value)
-                assert False, msg
-            constructor_param_values.append(converted_value)
-        if len(constructor_param_values) == 1:
-            constructor_param_values = constructor_param_values[0]
-        else:
-            constructor_param_values = tuple(constructor_param_values)
-        try:
-            built_additional_params = constructor_params_form % constructor_param_values
-        except TypeError:
-            print >> sys.stderr, "Got"
-            print >> sys.stderr, repr(constructor_params_form)
-            print >> sys.stderr, repr(constructor_param_values)
-            raise
-    return built_additional_params
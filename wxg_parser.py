@@ -0,0 +1,238 @@
+import hashlib
+import xml.parsers.expat
+
+# shared by all the elements without attributes or children, which is most of them (the properties of the objects);
+# nothing changes an element's attributes, and its first child replaces _NO_CHILDREN with a list
+_NO_ATTRIBUTES = {}
+_NO_CHILDREN = ()
+
+
+class WxgElement(object):
+    """
+    A lightweight stand-in for xml.dom.minidom.Element, holding only what the converter reads from a wxg element:
+    its tag name, attributes, child elements and text.  Whitespace-only text between child elements is not kept.
+    """
+    __slots__ = ("nodeName", "attributes", "childNodes", "parentNode", "text", "index")
+
+    def __init__(self, name, attributes, parent):
+        self.nodeName = name
+        self.attributes = attributes
+        self.childNodes = _NO_CHILDREN
+        """:type: list of WxgElement or tuple"""
+        self.parentNode = parent
+        self.text = None
+        """:type: str or None"""
+        self.index = None
+        """:type: xml_helpers.ElementIndex or None"""
+
+    def getAttribute(self, name):
+        # same as minidom, a missing attribute reads as empty
+        return self.attributes.get(name, "")
+
+    def release(self):
+        """Let go of the element's children and their index once nothing will read them again; its own name,
+        attributes, text and parent stay as they are"""
+        self.childNodes = _NO_CHILDREN
+        self.index = None
+
+    def __repr__(self):
+        return "<WxgElement %s %r>" % (self.nodeName, self.attributes)
+
+
+class _FormCollector(object):
+    """Builds WxgElement trees from expat events, handing off each object directly under the application element
+    as soon as it is complete"""
+
+    def __init__(self):
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+        self.parser.CharacterDataHandler = self.character_data
+
+        self.application = None
+        """:type: WxgElement"""
+        self.completed = []
+        self._stack = []
+        self._text_parts = []
+
+    def start_element(self, name, attributes):
+        if len(attributes) == 0:
+            attributes = _NO_ATTRIBUTES
+        if len(self._stack) == 0:
+            assert name == "application", "expected application root element, got %r" % name
+            element = WxgElement(name, attributes, None)
+            self.application = element
+        else:
+            parent = self._stack[-1]
+            element = WxgElement(name, attributes, parent)
+            if parent is not self.application:
+                # objects directly under the application are handed off rather than kept on the application element
+                if parent.childNodes is _NO_CHILDREN:
+                    parent.childNodes = [element]
+                else:
+                    parent.childNodes.append(element)
+        self._stack.append(element)
+        self._text_parts.append([])
+
+    def end_element(self, name):
+        element = self._stack.pop()
+        parts = self._text_parts.pop()
+        if len(parts) > 0 and (len(element.childNodes) == 0 or "".join(parts).strip() != ""):
+            element.text = "".join(parts)
+        if element.parentNode is self.application:
+            self.completed.append(element)
+
+    def character_data(self, data):
+        self._text_parts[-1].append(data)
+
+
+def iter_application_objects(handle, chunk_size=65536):
+    """
+    Parse a wxg file incrementally, yielding each top level object element under the application element as soon as
+    its end tag has been read.  Nothing keeps a reference to an object after it has been yielded, so the caller can
+    let go of it once it is consumed and memory use stays bounded by the largest single top level object.
+    :type handle: file
+    :rtype: collections.Iterable[WxgElement]
+    """
+    collector = _FormCollector()
+    while True:
+        data = handle.read(chunk_size)
+        collector.parser.Parse(data, len(data) == 0)
+        completed = collector.completed
+        collector.completed = []
+        for element in completed:
+            yield element
+        if len(data) == 0:
+            break
+    assert collector.application is not None, "no application element found"
+
+
+class ApplicationObjectSpan(object):
+    """
+    Where a top level object under the application element is in a wxg file, a digest of its XML and the bases of the
+    objects in it
+    """
+    __slots__ = ("name", "start", "end", "digest", "bases")
+
+    def __init__(self, name, start, end, bases):
+        """
+        :param start: byte offset of the object's start tag
+        :param end: byte offset of the object's end tag, or for an empty element tag, of the end of that tag
+        :param bases: the base attributes of the object and the objects inside it
+        :type bases: set of str
+        """
+        self.name = name
+        self.start = start
+        self.end = end
+        self.bases = bases
+        self.digest = None
+        """:type: str"""
+
+
+class _ObjectScanner(object):
+    """Finds the top level objects under the application element from expat events, without building elements"""
+
+    def __init__(self):
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.XmlDeclHandler = self.xml_declaration
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+
+        self.xml_declaration_encoding = None
+        self.found_application = False
+        self.completed = []
+        """:type: list of ApplicationObjectSpan"""
+        # no object still to be completed starts before this byte offset
+        self.settled_offset = 0
+        self._depth = 0
+        self._object_start = None
+        self._object_bases = None
+
+    def xml_declaration(self, version, encoding, standalone):
+        self.xml_declaration_encoding = encoding
+
+    def start_element(self, name, attributes):
+        if self._depth == 0:
+            assert name == "application", "expected application root element, got %r" % name
+            self.found_application = True
+        elif self._depth == 1:
+            self._object_start = self.parser.CurrentByteIndex
+            self._object_bases = set()
+        if self._depth >= 1:
+            base = attributes.get("base")
+            if base is not None:
+                self._object_bases.add(base)
+        self._depth += 1
+
+    def end_element(self, name):
+        self._depth -= 1
+        if self._depth == 1:
+            object_end = self.parser.CurrentByteIndex
+            self.completed.append(ApplicationObjectSpan(name, self._object_start, object_end, self._object_bases))
+            self.settled_offset = object_end
+
+
+def scan_application_objects(handle, chunk_size=65536):
+    """
+    Find the top level objects under the application element of a wxg file, with a SHA-1 hex digest of the XML of
+    each (from its start tag up to its end tag), so that unchanged objects can be recognized without building their
+    elements.  This is several times quicker than iter_application_objects; parse_application_object then builds the
+    elements of any object that is needed.
+    :type handle: file
+    :return: the encoding given in the XML declaration, if any, and the objects in the order they appear
+    :rtype: (str or None, list of ApplicationObjectSpan)
+    """
+    scanner = _ObjectScanner()
+    spans = []
+    # the input read from source_offset on, which covers any object not yet completed
+    source_chunks = []
+    source_offset = 0
+    while True:
+        data = handle.read(chunk_size)
+        source_chunks.append(data)
+        scanner.parser.Parse(data, len(data) == 0)
+        if len(scanner.completed) > 0:
+            source = "".join(source_chunks)
+            for span in scanner.completed:
+                span.digest = hashlib.sha1(source[span.start - source_offset:span.end - source_offset]).hexdigest()
+                spans.append(span)
+            scanner.completed = []
+            source_chunks = [source[scanner.settled_offset - source_offset:]]
+            source_offset = scanner.settled_offset
+        if len(data) == 0:
+            break
+    assert scanner.found_application, "no application element found"
+    return scanner.xml_declaration_encoding, spans
+
+
+def parse_application_object(handle, span, encoding=None):
+    """
+    Build the elements of a top level object found by scan_application_objects
+    :param handle: the file that was scanned; it must be seekable
+    :type span: ApplicationObjectSpan
+    :param encoding: the encoding from the XML declaration of the file
+    :rtype: WxgElement
+    """
+    handle.seek(span.start)
+    data = handle.read(span.end - span.start)
+    if encoding is None:
+        declaration = '<?xml version="1.0"?>'
+    else:
+        declaration = '<?xml version="1.0" encoding="%s"?>' % encoding.encode("ascii")
+    end_tag = ("</%s>" % span.name).encode(encoding or "utf-8")
+    # the span has no end tag; it either ends just before one, or is a whole empty element tag (which expat reports
+    # the same way), though text ending in "/>" looks like the latter too
+    candidates = [data + end_tag]
+    if data.endswith("/>"):
+        candidates.insert(0, data)
+    for candidate in candidates:
+        collector = _FormCollector()
+        try:
+            collector.parser.Parse(declaration + "<application>" + candidate + "</application>", True)
+        except xml.parsers.expat.ExpatError:
+            if candidate is candidates[-1]:
+                raise
+            continue
+        assert len(collector.completed) == 1
+        return collector.completed[0]
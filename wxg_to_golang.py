@@ -1,9 +1,23 @@
 import argparse
+import json
 import os
 import sys
+import time
+import traceback
 
+import bitmap_resources
+import codegen
+import conversion_stats
+import generation_options
+import output_files
+import startup_timing
+import widget_registry
 import wxg_golang_converter
 
+# the modules of the other modes (batch_conversion, conversion_server, split_output, watch_mode) and of the cache and
+# dependency files (conversion_cache, depfiles) are imported where they're used, so a plain conversion doesn't pay for
+# importing multiprocessing, SocketServer and ctypes with them
+
 
 def contents(input_filename):
     with open(input_filename, "r") as handle:
@@ -12,11 +26,11 @@ def contents(input_filename):
 
 def parse_args():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--in", required=True,
+    parser.add_argument("--in",
                         help=".wxg file to generate code for",
                         dest="input")
-    parser.add_argument("--out", required=True,
-                        help="golang file to output with generated code")
+    parser.add_argument("--out",
+                        help="golang file to output with generated code, or - for stdout")
     parser.add_argument("--force", "-f",
                         default=False, action="store_true",
                         help="overwrite existing file")
@@ -26,7 +40,175 @@ def parse_args():
     parser.add_argument("--wxgo-package-name",
                         default="github.com/dontpanic92/wxGo",
                         help="golang package name of the version of wxGo to use")
-    return parser.parse_args()
+    parser.add_argument("--reproducible",
+                        default=False, action="store_true",
+                        help="leave the generation time out of the output and give the input path relative to the "
+                             "output, so the same input always generates the same bytes")
+    parser.add_argument("--incremental",
+                        default=False, action="store_true",
+                        help="keep each frame's fingerprint and generated code in a manifest next to the output "
+                             "(OUT.frames.json, or .wxg_frames.json in a --split-frames directory), and only walk "
+                             "and regenerate the frames whose XML or converter changed since")
+    parser.add_argument("--optimize-sizers",
+                        default=False, action="store_true",
+                        help="leave out box sizers that make no difference to the layout, such as one holding a "
+                             "single item that fills it, and merge adjacent spacers, reporting how many objects "
+                             "that removed")
+    parser.add_argument("--lazy-notebook-pages",
+                        default=False, action="store_true",
+                        help="generate code that adds each notebook page empty and builds its contents the first "
+                             "time it is selected, rather than building every page up front")
+    parser.add_argument("--startup-timing",
+                        default=False, action="store_true",
+                        help="generate code that times the construction of each object and the set_properties and "
+                             "do_layout steps, and write the Go files that record the timings alongside the output; "
+                             "they are only recorded in builds with the %s tag, and WxgDumpTimings prints them"
+                             % startup_timing.TIMING_BUILD_TAG)
+    parser.add_argument("--embed-bitmaps",
+                        default=False, action="store_true",
+                        help="generate code that shows the image files of static bitmaps, and write the images, "
+                             "packed with each distinct image once, to OUT_bitmaps.go (%s in a --split-frames "
+                             "directory) along with %s, which decodes each image the first time it is shown"
+                             % (bitmap_resources.SPLIT_RESOURCE_FILENAME, bitmap_resources.RUNTIME_FILENAME))
+    parser.add_argument("--max-function-statements", type=int, default=None, metavar="N",
+                        help="generate code that moves widget constructions, event bindings, layout calls and "
+                             "property calls out to helper methods of at most N each once a frame has more than N "
+                             "of them, so the Go compiler isn't slowed down by very large functions")
+    parser.add_argument("--table-event-dispatch",
+                        default=False, action="store_true",
+                        help="generate code that gives the windows with event handlers consecutive IDs and binds "
+                             "each type of event once for the whole range, looking the handler up in a table; the "
+                             "IDs are reserved with wx.WindowNewControlId as each frame is created, so they can't "
+                             "clash with IDs given explicitly elsewhere")
+    parser.add_argument("--fast-construction",
+                        default=False, action="store_true",
+                        help="generate code that takes the form struct by pointer in its methods, keeps each frame "
+                             "frozen while it is built and lays it out just once")
+    parser.add_argument("--split-frames",
+                        default=False, action="store_true",
+                        help="treat --out as a directory and write a golang file per top level frame to it, "
+                             "generating them in parallel (see --jobs)")
+    parser.add_argument("--depfile", nargs="?", const="", metavar="PATH",
+                        help="also write a Make dependency file, as read by Ninja too, listing the input, the images "
+                             "embedded with --embed-bitmaps and the converter's own modules, so a build tool can skip "
+                             "running the converter when none of them changed; to PATH or by default OUT.d (each "
+                             "output's own OUT.d in batch mode).  An output that comes out the same keeps its "
+                             "modification time, so set restat = 1 on Ninja rules")
+    parser.add_argument("--save-ir", metavar="PATH",
+                        help="also save the parsed form of --in to this file, so code can be generated from it again "
+                             "(e.g. with other package names) without parsing the .wxg; --out is optional with this")
+    parser.add_argument("--from-ir", metavar="PATH",
+                        help="generate code from a file saved with --save-ir instead of from a .wxg given with --in")
+    parser.add_argument("--stats", choices=["json", "text"],
+                        help="report timings and counts for each phase of each conversion on stderr, as a JSON object "
+                             "per line or as text")
+    parser.add_argument("--stats-memory",
+                        default=False, action="store_true",
+                        help="include the peak memory use at the end of each phase in --stats")
+    parser.add_argument("--cache-dir",
+                        help="directory to cache generated code in, keyed by a hash of the input and options; "
+                             "may be shared by several concurrent runs; not used with --split-frames")
+    parser.add_argument("--cache-max-size", type=int, metavar="MB",
+                        help="size in MB past which least recently used cache entries are removed (default 256)")
+    watch_group = parser.add_argument_group("watch mode", "keep running and regenerate outputs when their inputs change")
+    watch_group.add_argument("--watch",
+                             default=False, action="store_true",
+                             help="after converting, watch the inputs (including new .wxg files under --batch-dir "
+                                  "directories) and regenerate the affected outputs whenever they are saved")
+    watch_group.add_argument("--debounce", type=float, default=0.25, metavar="SECONDS",
+                             help="wait until inputs have been quiet for this long before regenerating "
+                                  "(default %(default)s)")
+    watch_group.add_argument("--poll-interval", type=float, default=1.0, metavar="SECONDS",
+                             help="how often to check the inputs when polling (default %(default)s)")
+    watch_group.add_argument("--poll",
+                             default=False, action="store_true",
+                             help="check the inputs by polling even where inotify is available")
+    server_group = parser.add_argument_group("server mode",
+                                             "serve JSON conversion requests instead of converting files given on the "
+                                             "command line; see conversion_server.py for the protocol")
+    server_group.add_argument("--serve-socket", metavar="PATH",
+                              help="listen for requests on a Unix socket at this path")
+    server_group.add_argument("--serve-stdio",
+                              default=False, action="store_true",
+                              help="read requests from stdin and write responses to stdout")
+    server_group.add_argument("--max-pending", type=int,
+                              help="number of outstanding conversions past which the server stops reading further "
+                                   "requests until some finish (default 64)")
+    server_group.add_argument("--request-timeout", type=float, metavar="SECONDS",
+                              help="give up on a conversion with no result after this long, e.g. because the worker "
+                                   "converting it died, and send an error response for it (default 300)")
+    batch_group = parser.add_argument_group("batch mode", "convert many .wxg files in one run instead of --in/--out")
+    batch_group.add_argument("--batch-glob", action="append", default=[], metavar="PATTERN",
+                             help="convert the .wxg files matching a glob pattern; may be repeated")
+    batch_group.add_argument("--batch-dir", action="append", default=[], metavar="DIR",
+                             help="convert all the .wxg files under a directory; may be repeated")
+    batch_group.add_argument("--manifest",
+                             help="file listing an input .wxg and output golang file pair per line")
+    batch_group.add_argument("--out-dir",
+                             help="directory for the golang files generated for --batch-glob and --batch-dir inputs; "
+                                  "by default each is written next to its .wxg file")
+    batch_group.add_argument("--jobs", "-j", type=int, default=None,
+                             help="number of worker processes to use in batch, server or --split-frames mode; "
+                                  "defaults to the number of CPUs")
+    options = parser.parse_args()
+
+    options.batch = len(options.batch_glob) > 0 or len(options.batch_dir) > 0 or options.manifest is not None
+    options.serve = options.serve_socket is not None or options.serve_stdio
+    if options.jobs is not None and options.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if options.max_function_statements is not None and options.max_function_statements < 1:
+        parser.error("--max-function-statements must be at least 1")
+    if options.serve:
+        if options.serve_socket is not None and options.serve_stdio:
+            parser.error("--serve-socket and --serve-stdio can't be combined")
+        if options.batch or options.watch or options.input is not None or options.out is not None:
+            parser.error("server mode can't be combined with --in/--out, batch or watch options")
+        if options.optimize_sizers or options.lazy_notebook_pages or options.fast_construction or \
+                options.table_event_dispatch or options.max_function_statements is not None:
+            parser.error("--optimize-sizers, --lazy-notebook-pages, --fast-construction, --table-event-dispatch and "
+                         "--max-function-statements are per-request options in server mode")
+        if options.startup_timing or options.embed_bitmaps or options.depfile is not None:
+            parser.error("--startup-timing, --embed-bitmaps and --depfile write files alongside the output, so can't "
+                         "be used in server mode")
+        if options.max_pending is not None and options.max_pending < 1:
+            parser.error("--max-pending must be at least 1")
+        if options.request_timeout is not None and options.request_timeout <= 0:
+            parser.error("--request-timeout must be more than 0")
+    elif options.batch:
+        if options.input is not None or options.out is not None:
+            parser.error("--in/--out can't be combined with batch mode options")
+        if options.depfile:
+            parser.error("--depfile takes no PATH in batch mode, where each output gets its own OUT.d")
+    elif options.from_ir is not None:
+        if options.input is not None or options.watch:
+            parser.error("--from-ir can't be combined with --in or --watch")
+        if options.out is None:
+            parser.error("--out is required with --from-ir")
+        if options.optimize_sizers or options.embed_bitmaps:
+            parser.error("--optimize-sizers and --embed-bitmaps apply when parsing; use them with --save-ir instead "
+                         "of --from-ir")
+    elif options.input is None or (options.out is None and options.save_ir is None):
+        parser.error("--in and --out are required unless using batch mode")
+    elif options.out == "-" and (options.watch or options.incremental or options.startup_timing or
+                                 options.embed_bitmaps):
+        parser.error("--out - can't be combined with --watch, --incremental, --startup-timing or --embed-bitmaps")
+    elif options.out is None and options.embed_bitmaps:
+        parser.error("--embed-bitmaps writes the images alongside --out, so needs it with --save-ir")
+    if options.out == "-" and options.depfile is not None:
+        parser.error("--depfile needs an output file as the target, so can't be used with --out -")
+    if (options.serve or options.batch or options.watch) and options.save_ir is not None:
+        parser.error("--save-ir can only be used when converting a single file")
+    if options.incremental and (options.serve or options.from_ir is not None or options.save_ir is not None):
+        parser.error("--incremental can't be combined with server mode, --from-ir or --save-ir")
+    if options.split_frames:
+        if options.serve or options.batch or options.watch or options.from_ir is not None or options.save_ir is not None:
+            parser.error("--split-frames can only be used when converting a single file with --in")
+        if options.out == "-":
+            parser.error("--split-frames needs a directory for --out")
+        if options.cache_dir is not None:
+            parser.error("--cache-dir can't be combined with --split-frames; use --incremental to reuse the code of "
+                         "unchanged frames instead")
+    return options
 
 
 def die(msg):
@@ -34,19 +216,365 @@ def die(msg):
     sys.exit(1)
 
 
+def convert_options(options):
+    """The wxg_golang_converter.convert keyword arguments for the command line options"""
+    cache = None
+    if options.cache_dir is not None:
+        import conversion_cache
+        max_size = conversion_cache.DEFAULT_MAX_SIZE
+        if options.cache_max_size is not None:
+            max_size = options.cache_max_size * 1024 * 1024
+        cache = conversion_cache.ConversionCache(options.cache_dir, max_size)
+    return dict(package_name=options.package_name,
+                wxgo_package_name=options.wxgo_package_name,
+                reproducible=options.reproducible,
+                cache=cache,
+                incremental=options.incremental,
+                options=generation_options_for(options))
+
+
+def generation_options_for(options):
+    """The code generation options for the command line options
+    :rtype: generation_options.GenerationOptions"""
+    return generation_options.GenerationOptions(optimize_sizers=options.optimize_sizers,
+                                                lazy_notebook_pages=options.lazy_notebook_pages,
+                                                fast_construction=options.fast_construction,
+                                                table_event_dispatch=options.table_event_dispatch,
+                                                max_function_statements=options.max_function_statements,
+                                                startup_timing=options.startup_timing,
+                                                embed_bitmaps=options.embed_bitmaps)
+
+
+def depfile_for(options, output_filename):
+    """The dependency file to write for an output with --depfile, or None"""
+    if options.depfile is None:
+        return None
+    if options.depfile == "":
+        import depfiles
+        return depfiles.depfile_filename_for(output_filename)
+    return options.depfile
+
+
+def stats_options(options):
+    """The ConversionStats keyword arguments for the command line options, or None if not collecting stats"""
+    if options.stats is None:
+        return None
+    return dict(track_memory=options.stats_memory)
+
+
+def report_stats(options, input_filename, output_filename, stats_dict):
+    if options.stats == "json":
+        record = dict(stats_dict)
+        record["input"] = input_filename
+        record["output"] = output_filename
+        print >> sys.stderr, json.dumps(record, sort_keys=True)
+    else:
+        print >> sys.stderr, "Stats for %s -> %s:" % (input_filename, output_filename)
+        print >> sys.stderr, conversion_stats.format_stats_text(stats_dict)
+
+
+def report_sizer_optimization(stats):
+    """Say how many objects the sizer optimisation removed
+    :type stats: conversion_stats.ConversionStats"""
+    sizers_removed = stats.counters.get("sizers_removed", 0)
+    spacers_merged = stats.counters.get("spacers_merged", 0)
+    print >> sys.stderr, "Sizer optimisation removed %d object(s): %d sizer(s), %d spacer(s)" % (
+        sizers_removed + spacers_merged, sizers_removed, spacers_merged)
+
+
+def report_frames(fragments):
+    """Say which frames an incremental conversion regenerated"""
+    regenerated = [fragment.struct_name for fragment in fragments
+                   if fragment.regenerated and fragment.struct_name is not None]
+    reused = len([fragment for fragment in fragments if not fragment.regenerated and fragment.struct_name is not None])
+    print >> sys.stderr, "Regenerated %d frame(s)%s, reused %d" % (len(regenerated),
+                                                                 ": %s" % ", ".join(regenerated) if regenerated else "",
+                                                                 reused)
+
+
+def collect_batch_jobs(options):
+    """:rtype: list of batch_conversion.ConversionJob"""
+    import batch_conversion
+    jobs = []
+    jobs += batch_conversion.jobs_from_globs(options.batch_glob, options.out_dir)
+    for directory in options.batch_dir:
+        jobs += batch_conversion.jobs_from_directory(directory, options.out_dir)
+    if options.manifest is not None:
+        try:
+            jobs += batch_conversion.jobs_from_manifest(options.manifest)
+        except (IOError, ValueError) as e:
+            die(str(e))
+    return jobs
+
+
+def batch_main(options):
+    import batch_conversion
+    jobs = collect_batch_jobs(options)
+
+    if len(jobs) == 0:
+        die("No .wxg files to convert")
+
+    def report(result):
+        """:type result: batch_conversion.ConversionResult"""
+        if result.error is None:
+            print >> sys.stderr, "%s -> %s %s (%.3fs)" % (result.job.input_filename, result.job.output_filename,
+                                                          "written" if result.written else "unchanged", result.elapsed)
+            if result.stats is not None:
+                report_stats(options, result.job.input_filename, result.job.output_filename, result.stats)
+        else:
+            print >> sys.stderr, "FAILED %s:" % result.job.input_filename
+            print >> sys.stderr, result.error
+
+    start_time = time.time()
+    results = batch_conversion.run_batch(jobs, convert_options(options),
+                                         force=options.force, processes=options.jobs, result_callback=report,
+                                         stats_options=stats_options(options),
+                                         depfiles=options.depfile is not None)
+    wall_time = time.time() - start_time
+
+    failures = [result for result in results if result.error is not None]
+    print >> sys.stderr, "Converted %d of %d files in %.2fs (%.1f files/s), %d failed" % (len(results) - len(failures),
+                                                                                         len(results),
+                                                                                         wall_time,
+                                                                                         len(results) / wall_time,
+                                                                                         len(failures))
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+def watch_main(options):
+    import batch_conversion
+    import watch_mode
+    if options.batch:
+        collect_jobs = lambda: collect_batch_jobs(options)
+        extra_directories = options.batch_dir
+    else:
+        single_job = batch_conversion.ConversionJob(options.input, options.out)
+        collect_jobs = lambda: [single_job]
+        extra_directories = ()
+
+    jobs = collect_jobs()
+    for job in jobs:
+        if not os.path.exists(job.input_filename):
+            die("Input file '%s' not found" % job.input_filename)
+        if not options.force and os.path.exists(job.output_filename):
+            die("Output file '%s' already exists; use -f to overwrite" % job.output_filename)
+
+    # keep the widget registry loaded between conversions
+    wx_object_classes_map = widget_registry.default_registry()
+    job_convert_options = convert_options(options)
+
+    def convert_job(job):
+        """:type job: batch_conversion.ConversionJob"""
+        output_dir = os.path.dirname(job.output_filename)
+        if output_dir != "" and not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        return wxg_golang_converter.convert(job.input_filename, job.output_filename,
+                                            wx_object_classes_map=wx_object_classes_map,
+                                            frames_hook=report_frames if options.incremental else None,
+                                            depfile=depfile_for(options, job.output_filename),
+                                            **job_convert_options)
+
+    for job in jobs:
+        try:
+            written = convert_job(job)
+        except Exception:
+            print >> sys.stderr, "FAILED %s:" % job.input_filename
+            print >> sys.stderr, traceback.format_exc().rstrip()
+            continue
+        print >> sys.stderr, "%s -> %s %s" % (job.input_filename, job.output_filename, "written" if written else "unchanged")
+
+    watch_mode.watch(collect_jobs, convert_job, extra_directories,
+                     debounce=options.debounce, poll_interval=options.poll_interval, use_polling=options.poll)
+
+
+def single_output_stream(options, output_filename):
+    """
+    Check a single file conversion may write to output_filename, returning the stream to write to for --out -
+    :rtype: file or None
+    """
+    if output_filename == "-":
+        output_stream = sys.stdout
+        # keep anything else printed along the way out of the generated code
+        sys.stdout = sys.stderr
+        return output_stream
+    if output_filename is not None and not options.force and os.path.exists(output_filename):
+        die("Output file '%s' already exists; use -f to overwrite" % output_filename)
+    return None
+
+
+def write_generated(output_filename, output_stream, generated):
+    if output_stream is not None:
+        output_stream.write(generated)
+        return
+    written = output_files.write_if_changed(output_filename, generated)
+    print >> sys.stderr, "%s %s" % (output_filename, "written" if written else "unchanged")
+
+
+def save_ir_main(options):
+    """Convert a single file, saving its parsed form with --save-ir as well as (optionally) generating code"""
+    input_filename = options.input
+    output_filename = options.out
+    output_stream = single_output_stream(options, output_filename)
+    stats = None
+    if options.stats is not None:
+        stats = conversion_stats.ConversionStats(**stats_options(options))
+    elif options.optimize_sizers:
+        stats = conversion_stats.ConversionStats()
+
+    if output_filename is None or output_stream is not None:
+        input_label = input_filename
+    else:
+        input_label = wxg_golang_converter.input_label_for(input_filename, output_filename, options.reproducible)
+    with open(input_filename, "rb") as input_handle:
+        gen_file = wxg_golang_converter.parse_source(input_handle, input_label, options.reproducible, stats=stats,
+                                                     options=generation_options_for(options))
+    output_files.write_if_changed(options.save_ir, gen_file.to_bytes())
+
+    if output_filename is not None:
+        write_generated(output_filename, output_stream,
+                        wxg_golang_converter.generate_source(gen_file, options.package_name, options.wxgo_package_name,
+                                                             stats=stats, options=generation_options_for(options)))
+        if options.startup_timing and output_stream is None:
+            startup_timing.write_support_files(os.path.dirname(output_filename) or ".", options.package_name)
+        if options.embed_bitmaps:
+            bitmap_resources.write_resource_files(input_filename,
+                                                  bitmap_resources.resource_filename_for(output_filename),
+                                                  options.package_name, options.wxgo_package_name, input_label, stats)
+    if options.depfile is not None:
+        import depfiles
+        target = output_filename if output_filename is not None else options.save_ir
+        depfiles.write_depfile(depfile_for(options, target), target, input_filename, options.embed_bitmaps)
+    if options.optimize_sizers:
+        report_sizer_optimization(stats)
+    if options.stats is not None:
+        report_stats(options, input_filename, output_filename, stats.as_dict())
+
+
+def ir_main(options):
+    """Generate code from a file saved with --save-ir"""
+    if not os.path.exists(options.from_ir):
+        die("Input file '%s' not found" % options.from_ir)
+    output_stream = single_output_stream(options, options.out)
+    stats = None
+    if options.stats is not None:
+        stats = conversion_stats.ConversionStats(**stats_options(options))
+
+    with open(options.from_ir, "rb") as handle:
+        gen_file = codegen.GenFile.from_bytes(handle.read())
+    write_generated(options.out, output_stream,
+                    wxg_golang_converter.generate_source(gen_file, options.package_name, options.wxgo_package_name,
+                                                         stats=stats, options=generation_options_for(options)))
+    if options.startup_timing and output_stream is None:
+        startup_timing.write_support_files(os.path.dirname(options.out) or ".", options.package_name)
+    if options.depfile is not None:
+        import depfiles
+        depfiles.write_depfile(depfile_for(options, options.out), options.out, options.from_ir)
+    if stats is not None:
+        report_stats(options, options.from_ir, options.out, stats.as_dict())
+
+
+def split_main(options):
+    """Convert a single file to a golang file per frame in the --out directory"""
+    import split_output
+    input_filename = options.input
+    output_directory = options.out
+    if not options.force and os.path.isdir(output_directory) and \
+            any(filename.endswith(split_output.SPLIT_FILE_SUFFIX) for filename in os.listdir(output_directory)):
+        die("Output directory '%s' already has generated files; use -f to overwrite" % output_directory)
+    stats = None
+    stats_hook = None
+    if options.stats is not None:
+        stats = conversion_stats.ConversionStats(**stats_options(options))
+        stats_hook = lambda finished_stats: report_stats(options, input_filename, output_directory, finished_stats.as_dict())
+    elif options.optimize_sizers:
+        stats = conversion_stats.ConversionStats()
+
+    options_for_convert = convert_options(options)
+    # parse_args rejects --cache-dir with --split-frames, so there is no cache to pass on
+    del options_for_convert["cache"]
+    results = split_output.convert_split(input_filename, output_directory, processes=options.jobs, stats=stats,
+                                         stats_hook=stats_hook,
+                                         frames_hook=report_frames if options.incremental else None,
+                                         depfile=depfile_for(options, output_directory), **options_for_convert)
+    for output_filename, written in results:
+        print >> sys.stderr, "%s %s" % (output_filename, "written" if written else "unchanged")
+    if options.optimize_sizers:
+        report_sizer_optimization(stats)
+
+
 def main():
     options = parse_args()
 
+    if options.serve:
+        import conversion_server
+        max_pending = conversion_server.DEFAULT_MAX_PENDING if options.max_pending is None else options.max_pending
+        request_timeout = conversion_server.DEFAULT_REQUEST_TIMEOUT
+        if options.request_timeout is not None:
+            request_timeout = options.request_timeout
+        if options.serve_socket is not None:
+            conversion_server.serve_unix_socket(options.serve_socket, options.jobs, max_pending, request_timeout)
+        else:
+            conversion_server.serve_stdio(options.jobs, max_pending, request_timeout)
+        return
+
+    if options.watch:
+        watch_main(options)
+        return
+
+    if options.batch:
+        batch_main(options)
+        return
+
+    if options.from_ir is not None:
+        ir_main(options)
+        return
+
     input_filename = options.input
     output_filename = options.out
 
     if not os.path.exists(input_filename):
         die("Input file '%s' not found" % input_filename)
 
+    if options.save_ir is not None:
+        save_ir_main(options)
+        return
+
+    if options.split_frames:
+        split_main(options)
+        return
+
+    stats = None
+    stats_hook = None
+    if options.stats is not None:
+        stats = conversion_stats.ConversionStats(**stats_options(options))
+        stats_hook = lambda finished_stats: report_stats(options, input_filename, output_filename, finished_stats.as_dict())
+    elif options.optimize_sizers:
+        stats = conversion_stats.ConversionStats()
+
+    if output_filename == "-":
+        output_stream = sys.stdout
+        # keep anything else printed along the way out of the generated code
+        sys.stdout = sys.stderr
+        with open(input_filename, "rb") as input_handle:
+            wxg_golang_converter.convert_source(input_handle, options.package_name, options.wxgo_package_name,
+                                                output_stream=output_stream, input_label=input_filename,
+                                                reproducible=options.reproducible, stats=stats, stats_hook=stats_hook,
+                                                stream_chunk_size=codegen.DEFAULT_CHUNK_SIZE,
+                                                options=generation_options_for(options))
+        if options.optimize_sizers:
+            report_sizer_optimization(stats)
+        return
+
     if not options.force and os.path.exists(output_filename):
         die("Output file '%s' already exists; use -f to overwrite" % output_filename)
 
-    wxg_golang_converter.convert(input_filename, output_filename, options.package_name, options.wxgo_package_name)
+    written = wxg_golang_converter.convert(input_filename, output_filename, stats=stats, stats_hook=stats_hook,
+                                           frames_hook=report_frames if options.incremental else None,
+                                           depfile=depfile_for(options, output_filename), **convert_options(options))
+    print >> sys.stderr, "%s %s" % (output_filename, "written" if written else "unchanged")
+    if options.optimize_sizers:
+        report_sizer_optimization(stats)
 
 
 if __name__ == "__main__":
@@ -1,50 +1,66 @@
-import xml.dom.minidom
+class ElementIndex(object):
+    """
+    Tag name keyed view of the direct children of an element, built once per element so that repeated lookups of
+    properties, constructor parameters and event tags don't each rescan all of its children
+    """
+    __slots__ = ("attributes", "elements", "texts", "lookup_tables")
+
+    def __init__(self, element):
+        """:type element: wxg_parser.WxgElement"""
+        self.attributes = element.attributes
+        self.elements = {}
+        """:type: dict[str, list of wxg_parser.WxgElement]"""
+        for child in element.childNodes:
+            self.elements.setdefault(child.nodeName, []).append(child)
+        self.texts = {}
+        """:type: dict[str, str]"""
+        for name, children in self.elements.iteritems():
+            self.texts[name] = "".join([child.text for child in children if child.text is not None])
+        self.lookup_tables = {}
+        """:type: dict[(str, str), dict[str, wxg_parser.WxgElement]]"""
+
+    def attribute(self, name):
+        return self.attributes.get(name, "")
+
+    def child_elements(self, name):
+        return self.elements.get(name, ())
+
+    def child_text(self, name, default_value=""):
+        return self.texts.get(name, default_value)
+
+
+def element_index(node):
+    """Get the index of the direct children of a node, building it on first use
+    :type node: wxg_parser.WxgElement
+    :rtype: ElementIndex
+    """
+    index = node.index
+    if index is None:
+        index = ElementIndex(node)
+        node.index = index
+    return index
 
 
 def child_elements(node, name):
-    """Iterate through direct child elements of a node that have the given tag name"""
-    assert isinstance(node, xml.dom.minidom.Node), "child element was %r, not node" % type(node)
-    for subnode in node.childNodes:
-        if subnode.nodeType != xml.dom.minidom.Node.ELEMENT_NODE:
-            continue
-        assert isinstance(subnode, xml.dom.minidom.Element)
-        if subnode.nodeName != name:
-            continue
-        yield subnode
+    """Iterate through direct child elements of a node that have the given tag name
+    :type node: wxg_parser.WxgElement
+    """
+    return iter(element_index(node).child_elements(name))
 
 
 def child_element_text(node, name, default_value=""):
     """Get the text of the direct child element(s) of a node"""
-    parts = []
-    found = False
-    for element in child_elements(node, name):
-        found = True
-        for node in element.childNodes:
-            if node.nodeType == element.TEXT_NODE:
-                assert isinstance(node, xml.dom.minidom.Text)
-                # noinspection PyUnresolvedReferences
-                parts.append(node.nodeValue)
-    if not found:
-        return default_value
-    return "".join(parts)
+    return element_index(node).child_text(name, default_value)
 
 
 def element_text(element, default_value=""):
-    parts = []
-    found = False
-    for node in element.childNodes:
-        if node.nodeType == element.TEXT_NODE:
-            found = True
-            assert isinstance(node, xml.dom.minidom.Text)
-            # noinspection PyUnresolvedReferences
-            parts.append(node.nodeValue)
-    if not found:
+    if element.text is None:
         return default_value
-    return "".join(parts)
+    return element.text
 
 
 def get_path_elements(node, path):
-    """:rtype: collections.Iterable[xml.dom.minidom.Element]"""
+    """:rtype: collections.Iterable[wxg_parser.WxgElement]"""
     if "/" in path:
         first, rest = path.split("/", 1)
         if first == "..":
@@ -58,3 +74,24 @@ def get_path_elements(node, path):
     else:
         for result in child_elements(node, path):
             yield result
+
+
+def get_path_lookup_table(node, path, attr_name):
+    """
+    Get a table of the elements at a path keyed by the value of one of their attributes, where the first element
+    wins for a repeated value.  The table is kept on the index of the element the path leads down from, so e.g. all the
+    pages of a notebook share one table for ../tabs/tab.
+    :rtype: dict[str, wxg_parser.WxgElement]
+    """
+    while path.startswith("../"):
+        node = node.parentNode
+        path = path[3:]
+    index = element_index(node)
+    key = (path, attr_name)
+    table = index.lookup_tables.get(key)
+    if table is None:
+        table = {}
+        for element in get_path_elements(node, path):
+            table.setdefault(element.getAttribute(attr_name), element)
+        index.lookup_tables[key] = table
+    return table